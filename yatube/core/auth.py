@@ -0,0 +1,82 @@
+"""Короткоживущий кеш пользователей внутри процесса.
+
+``AuthenticationMiddleware`` на каждый запрос достаёт пользователя из базы.
+Здесь найденный пользователь запоминается на ``AUTH_USER_CACHE_TIMEOUT``
+секунд. Хеш сессии сверяется при каждом запросе, поэтому смена пароля
+разлогинивает сразу. Изменения ``is_active`` и прав в других процессах
+становятся видны не позже чем через ``AUTH_USER_CACHE_TIMEOUT``.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+MAX_CACHED_USERS = 10000
+
+_users = {}
+_lock = threading.Lock()
+
+
+def get_cached_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = _load_user(request)
+    return request._cached_user
+
+
+def _load_user(request):
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    backend = session.get(BACKEND_SESSION_KEY)
+    if not timeout or user_id is None:
+        return auth.get_user(request)
+
+    key = (backend, str(user_id))
+    entry = _users.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        user = entry[1]
+        session_hash = session.get(HASH_SESSION_KEY)
+        if session_hash and constant_time_compare(
+                session_hash, user.get_session_auth_hash()):
+            return _clone(user)
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        with _lock:
+            if len(_users) >= MAX_CACHED_USERS:
+                _users.clear()
+            _users[key] = (time.monotonic() + timeout, _clone(user))
+    return user
+
+
+def _clone(user):
+    clone = copy.copy(user)
+    clone._state = copy.copy(user._state)
+    clone._state.fields_cache = {}
+    return clone
+
+
+def forget_user(user_id):
+    with _lock:
+        for key in [key for key in _users if key[1] == str(user_id)]:
+            del _users[key]
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_changed_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -0,0 +1,62 @@
+"""Замеры производительности для ``python manage.py bench``.
+
+Сценарии регистрируются декоратором ``scenario`` в модулях
+``<приложение>/benchmarks.py``. Сценарий получает число повторов и отдаёт
+пары (название замера, результат ``measure``). Команда запускает их
+на тестовой базе, поэтому сценарии сами создают нужные данные.
+"""
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+scenarios = {}
+
+
+def scenario(name):
+    def decorator(func):
+        scenarios[name] = func
+        return func
+    return decorator
+
+
+def measure(func, repeat, trace_memory=False, rounds=1):
+    """Среднее время, число запросов и объём памяти на один вызов.
+
+    При ``rounds`` > 1 замер повторяется и берётся самый быстрый раунд:
+    так меньше влияет шум от других процессов.
+    """
+    func()
+    if trace_memory:
+        tracemalloc.start()
+    best = None
+    for _ in range(rounds):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    result = {
+        'ms': best * 1000 / repeat,
+        'queries': len(queries) / repeat,
+        'per_second': repeat / best if best else float('inf'),
+    }
+    if trace_memory:
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def fetched_bytes(queryset):
+    """Сколько байт данных возвращает SQL-запрос ``queryset``."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return sum(
+        len(value) if isinstance(value, bytes) else len(str(value).encode())
+        for row in rows for value in row if value is not None
+    )
@@ -0,0 +1,278 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, override_settings
+from django.utils import timezone
+
+from .bench import fetched_bytes, measure, scenario
+from .ratelimit import ratelimit
+
+SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+AUTH_MIDDLEWARES = (
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
+)
+
+
+@scenario('sessions')
+def sessions(repeat):
+    """Накладные расходы на запрос залогиненного пользователя."""
+    user = get_user_model().objects.create_user(username='bench-sessions')
+    for engine in SESSION_ENGINES:
+        for auth_middleware in AUTH_MIDDLEWARES:
+            middleware = [
+                auth_middleware if name in AUTH_MIDDLEWARES else name
+                for name in settings.MIDDLEWARE
+            ]
+            with override_settings(SESSION_ENGINE=engine,
+                                   MIDDLEWARE=middleware):
+                client = Client()
+                client.force_login(user)
+                label = '{} + {}'.format(
+                    engine.rsplit('.', 1)[1], auth_middleware.split('.')[0])
+                yield label, measure(
+                    lambda: client.get('/about/author/'), repeat)
+
+
+def year_uncached(request):
+    return {'year': timezone.now().year}
+
+
+@scenario('context_processors')
+def context_processors(repeat):
+    """Время рендера главной для анонима при разных контекст-процессорах."""
+    current = settings.TEMPLATES[0]['OPTIONS']['context_processors']
+    configurations = (
+        ('без контекст-процессоров', []),
+        ('исходный набор', [
+            'django.template.context_processors.debug',
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+            'core.benchmarks.year_uncached',
+        ]),
+        ('текущие настройки', current),
+    )
+    client = Client()
+    for label, processors in configurations:
+        templates = copy.deepcopy(settings.TEMPLATES)
+        templates[0]['OPTIONS']['context_processors'] = processors
+        with override_settings(TEMPLATES=templates):
+            yield label, measure(lambda: client.get('/'), repeat, rounds=5)
+
+
+@scenario('ratelimit')
+def ratelimit_overhead(repeat):
+    """Накладные расходы проверки лимита на один запрос.
+
+    Замер идёт на кеше ``RATELIMIT_CACHE``; чтобы мерить общий кеш,
+    запускайте с ``CACHE_LOCATION``.
+    """
+    user = get_user_model().objects.create_user(username='bench-ratelimit')
+    request = RequestFactory().post('/')
+    request.user = user
+    cache = caches[settings.RATELIMIT_CACHE]
+    backend = type(cache).__name__
+    rates = (
+        ('пользователь + IP', '{}/h'.format(repeat * 100)),
+        ('пользователь + IP, отказ', '1/d'),
+    )
+
+    def view(request):
+        return HttpResponse()
+
+    yield 'без лимита', measure(lambda: view(request), repeat, rounds=5)
+    for label, rate in rates:
+        with override_settings(RATELIMITS={'bench': {
+                'user': rate, 'ip': rate}}):
+            cache.clear()
+            limited = ratelimit('bench')(view)
+            calls = count_cache_calls(cache, lambda: limited(request))
+            result = measure(lambda: limited(request), repeat, rounds=5)
+            result['cache_calls'] = calls
+            yield f'{label} ({backend})', result
+
+
+def count_cache_calls(cache, func, prefix='ratelimit:'):
+    """Сколько обращений к ключам ``prefix`` делает повторный ``func``.
+
+    Вложенные вызовы (``decr`` у LocMemCache вызывает ``incr``) не
+    считаются.
+    """
+    func()
+    calls = []
+    depth = []
+    names = ('get', 'set', 'add', 'delete', 'incr', 'decr', 'touch')
+    originals = {name: getattr(cache, name) for name in names}
+
+    def counted(name):
+        def wrapper(key, *args, **kwargs):
+            if not depth and key.startswith(prefix):
+                calls.append(name)
+            depth.append(name)
+            try:
+                return originals[name](key, *args, **kwargs)
+            finally:
+                depth.pop()
+        return wrapper
+
+    for name in names:
+        setattr(cache, name, counted(name))
+    try:
+        func()
+    finally:
+        for name in names:
+            delattr(cache, name)
+    return len(calls)
+
+
+BENCH_HASHERS = (
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'core.hashers.ScryptPasswordHasher',
+)
+
+
+@scenario('auth')
+def auth(repeat):
+    """Вход и регистрация в секунду на одно ядро для разных хешеров."""
+    User = get_user_model()
+    for hasher in BENCH_HASHERS:
+        label = hasher.rsplit('.', 1)[1]
+        with override_settings(PASSWORD_HASHERS=[hasher],
+                               RATELIMIT_ENABLED=False):
+            User.objects.create_user(
+                username=f'bench-{label}', password='bench-password')
+            client = Client()
+            yield f'вход: {label}', measure(
+                lambda: client.post('/auth/login/', {
+                    'username': f'bench-{label}',
+                    'password': 'bench-password',
+                }), repeat)
+            counter = iter(range(repeat * 2 + 1))
+            yield f'регистрация: {label}', measure(
+                lambda: Client().post('/auth/signup/', {
+                    'username': f'signup{label}{next(counter)}',
+                    'password1': 'Kx9-quiet-river-stone',
+                    'password2': 'Kx9-quiet-river-stone',
+                }), repeat)
+
+
+@scenario('cards')
+def cards(repeat):
+    """Страница ленты: полные строки постов и проекция для карточек."""
+    from posts.models import Post
+
+    author = get_user_model().objects.create_user(
+        username='bench-cards', password='bench-password',
+        first_name='Имя', last_name='Фамилия')
+    for number in range(10):
+        Post.objects.create(text=f'Пост {number} ' + 'длинный текст ' * 2000,
+                            author=author)
+    querysets = (
+        ('select_related', lambda: Post.objects.select_related(
+            'group', 'author')[:10]),
+        ('cards()', lambda: Post.objects.cards()[:10]),
+    )
+    for label, make_queryset in querysets:
+        result = measure(lambda: list(make_queryset()), repeat,
+                         trace_memory=True)
+        result['bytes'] = fetched_bytes(make_queryset())
+        yield label, result
+
+
+@scenario('pull_feed')
+def pull_feed(repeat):
+    """Лента подписок: запрос с подзапросом и слияние лент авторов."""
+    from django.core.cache import cache
+    from posts.feeds import MergedFeed
+    from posts.models import Follow, Post
+
+    User = get_user_model()
+    reader = User.objects.create_user(username='bench-reader')
+    authors = [User.objects.create_user(username=f'bench-author{number}')
+               for number in range(50)]
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author) for author in authors)
+    Post.objects.bulk_create(
+        Post(text=f'Пост {number}', author=author)
+        for author in authors for number in range(40))
+    author_ids = [author.pk for author in authors]
+    cache.clear()
+    feeds = (
+        ('feed_for()', lambda: list(Post.objects.feed_for(reader)[:10])),
+        ('MergedFeed', lambda: MergedFeed(author_ids)[0:10]),
+    )
+    for label, page in feeds:
+        yield label, measure(page, repeat, rounds=3)
+
+
+@scenario('comment_threads')
+def comment_threads(repeat):
+    """Ветка комментариев: рекурсия по родителям и диапазон путей."""
+    from posts.models import Comment, Post
+
+    author = get_user_model().objects.create_user(username='bench-threads')
+
+    def recursive(parent_ids, post):
+        comments = list(Comment.objects.select_related('author').filter(
+            post=post, parent_id__in=parent_ids).order_by('pk'))
+        if comments:
+            comments += recursive([c.pk for c in comments], post)
+        return comments
+
+    for shape in ('deep', 'wide'):
+        post = Post.objects.create(text=shape, author=author)
+        root = Comment.objects.create(text='0', post=post, author=author)
+        parent = root
+        for number in range(200):
+            parent = Comment.objects.create(
+                text=str(number), post=post, author=author,
+                parent=parent if shape == 'deep' else root)
+        yield f'{shape}: parent_id', measure(
+            lambda: recursive([root.pk], post), repeat)
+        yield f'{shape}: path', measure(
+            lambda: list(post.comments.threads()), repeat)
+
+
+@scenario('likes')
+def likes(repeat):
+    """Лайки на странице ленты: COUNT по карточке и готовый счётчик."""
+    from django.db.models import Count
+    from posts.likes import LikedSet
+    from posts.models import Like, Post
+
+    User = get_user_model()
+    author = User.objects.create_user(username='bench-liked')
+    User.objects.bulk_create(
+        User(username=f'bench-fan{number}') for number in range(200))
+    readers = User.objects.filter(username__startswith='bench-fan')
+    posts = [Post.objects.create(text=f'Пост {number}', author=author)
+             for number in range(10)]
+    Like.objects.bulk_create(
+        Like(user=reader, post=post) for reader in readers for post in posts)
+    reader = User.objects.get(username='bench-fan0')
+
+    def per_card():
+        for post in Post.objects.cards()[:10]:
+            post.likes.count()
+            post.likes.filter(user=reader).exists()
+
+    def annotated():
+        list(Post.objects.cards().annotate(likes_total=Count('likes'))[:10])
+
+    def counter():
+        page = list(Post.objects.cards()[:10])
+        liked = LikedSet(reader, page)
+        [post.pk in liked for post in page]
+
+    for label, func in (('COUNT на карточку', per_card),
+                        ('annotate(Count)', annotated),
+                        ('likes_count + LikedSet', counter)):
+        yield label, measure(func, repeat, rounds=3)
@@ -0,0 +1,136 @@
+"""Кеш объектов со сквозным чтением.
+
+Запись в кеше хранит номер поколения ключа. ``invalidate`` увеличивает
+поколение, поэтому значение, собранное по старым данным и записанное уже
+после сброса, не будет отдано. Пересобирает отсутствующее значение только
+тот, кто первым взял блокировку; остальные ждут его результата.
+
+Поколения, блокировки и сами записи должны лежать в кеше, общем для
+всех процессов сайта и воркера задач (см. ``CACHES`` в настройках):
+с ``LocMemCache`` сброс виден только процессу, который его сделал.
+Поколения хранятся без срока, а отсутствующее поколение (кеш мог его
+вытеснить) заводится заново со случайным значением, поэтому старая
+запись не совпадёт с ним после вытеснения.
+"""
+import random
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+LOCK_TIMEOUT = 10
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+
+def _generation_key(key):
+    return f'{key}:generation'
+
+
+def _new_generation(key):
+    """Заводит поколение ключа, которого нет в кеше, и возвращает его."""
+    cache.add(_generation_key(key), random.getrandbits(48), None)
+    return cache.get(_generation_key(key))
+
+
+def _lookup(key):
+    found = cache.get_many([key, _generation_key(key)])
+    generation = found.get(_generation_key(key))
+    if generation is None:
+        generation = _new_generation(key)
+    entry = found.get(key)
+    if entry is not None and entry[0] == generation:
+        return generation, entry
+    return generation, None
+
+
+def read_through(key, build, timeout):
+    """Значение ``key`` из кеша или результат ``build()``."""
+    generation, entry = _lookup(key)
+    if entry is not None:
+        return entry[1]
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            generation, entry = _lookup(key)
+            if entry is not None:
+                return entry[1]
+        return build()
+    try:
+        value = build()
+        # Поколение сменилось, пока шла сборка: значение устарело и не
+        # должно затереть запись, сделанную ``write_through``.
+        if cache.get(_generation_key(key)) == generation:
+            cache.set(key, (generation, value), timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def read_many(keys, build_missing, timeout):
+    """Пакетный вариант ``read_through`` без блокировок.
+
+    ``build_missing(keys)`` получает ключи, которых нет в кеше или которые
+    устарели, и возвращает словарь значений для них. Кеш читается и
+    пишется одним обращением.
+    """
+    generation_keys = {key: _generation_key(key) for key in keys}
+    found = cache.get_many([*keys, *generation_keys.values()])
+    values, missing = {}, []
+    for key in keys:
+        generation = found.get(generation_keys[key])
+        if generation is None:
+            generation = _new_generation(key)
+        entry = found.get(key)
+        if entry is not None and entry[0] == generation:
+            values[key] = entry[1]
+        else:
+            missing.append((key, generation))
+    if missing:
+        built = build_missing([key for key, _ in missing])
+        cache.set_many({
+            key: (generation, built[key]) for key, generation in missing
+        }, timeout)
+        values.update(built)
+    return values
+
+
+def _bump(key):
+    try:
+        cache.incr(_generation_key(key))
+    except ValueError:
+        # Поколения нет: новое случайное и так не совпадёт со старыми
+        # записями.
+        _new_generation(key)
+
+
+def write_through(key, value, timeout):
+    """Записывает свежее ``value`` вместо сброса ``key``.
+
+    Читатели сразу получают новое значение и не пересобирают его, в том
+    числе по отстающей реплике. Как и ``invalidate``, повторяет запись
+    после коммита транзакции.
+    """
+    def write():
+        _bump(key)
+        generation = cache.get(_generation_key(key))
+        if generation is None:
+            generation = _new_generation(key)
+        cache.set(key, (generation, value), timeout)
+
+    write()
+    transaction.on_commit(write)
+
+
+def invalidate(key):
+    """Сбрасывает ``key`` сейчас и ещё раз после коммита транзакции.
+
+    Повторный сброс не даёт закешировать данные, прочитанные
+    конкурентным запросом до коммита.
+    """
+    _bump(key)
+    transaction.on_commit(partial(_bump, key))
@@ -0,0 +1,42 @@
+"""Проверка, что кеши, через которые общаются процессы, общие.
+
+Кеш в памяти процесса (``LocMemCache``) не виден другим воркерам:
+сброс кеша, события pub/sub и счётчики лимитов остаются внутри одного
+процесса. Если сайт запущен в нескольких процессах
+(``WEB_CONCURRENCY``), с таким кешем он не стартует.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def is_process_local(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS
+
+
+def shared_caches():
+    """Что из проекта держится на каком кеше."""
+    return [
+        ('default', 'сброс кеша объектов (core.caching)'),
+        ('default', 'рассылка событий (core.pubsub)'),
+        (settings.RATELIMIT_CACHE, 'лимиты запросов (core.ratelimit)'),
+    ]
+
+
+def check_shared_caches():
+    if settings.WEB_CONCURRENCY <= 1:
+        return
+    broken = [
+        f'{feature} (кеш {alias!r})'
+        for alias, feature in shared_caches() if is_process_local(alias)
+    ]
+    if broken:
+        raise ImproperlyConfigured(
+            f'Сайт запущен в {settings.WEB_CONCURRENCY} процессах, но '
+            f'кеш виден только своему процессу, поэтому между ними не '
+            f'будут работать: {", ".join(broken)}. Укажите общий кеш '
+            f'в CACHE_LOCATION.')
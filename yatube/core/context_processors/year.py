@@ -1,8 +1,23 @@
+import time
+
 from django.utils import timezone
 
+_memo = {'year': None, 'expires': 0.0}
+
+
+def current_year():
+    """Текущий год, который пересчитывается не чаще раза в сутки."""
+    now = time.time()
+    if now >= _memo['expires']:
+        today = timezone.now()
+        _memo['year'] = today.year
+        _memo['expires'] = now + 60 * 60 * 24 - (
+            today.hour * 3600 + today.minute * 60 + today.second)
+    return _memo['year']
+
 
 def year(request):
     """Добавляет переменную с текущим годом."""
     return {
-        'year': timezone.now().year
+        'year': current_year()
     }
@@ -0,0 +1,92 @@
+"""Маршрутизация чтения на реплики базы данных.
+
+Чтение моделей ``posts`` уходит на реплику только внутри вьюх, обёрнутых в
+``replica_reads``, и только вне транзакции. После записи через вьюху
+с ``primary_after_write`` пользователь получает cookie, и в течение
+``REPLICA_STICKY_SECONDS`` его запросы читают с основной базы, чтобы
+он сразу видел свои изменения несмотря на отставание реплик.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'primary_until'
+
+_state = threading.local()
+
+
+class ReplicaRouter:
+    # Сессии и пользователи всегда читаются с основной базы: свежая
+    # сессия на отстающей реплике разлогинила бы пользователя.
+    app_labels = {'posts'}
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        if (
+            replica
+            and model._meta.app_label in self.app_labels
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.writes = getattr(_state, 'writes', 0) + 1
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def reading_from_replica():
+    """Направляет чтение на одну из реплик до конца блока."""
+    previous = getattr(_state, 'replica', None)
+    if settings.DATABASE_REPLICAS:
+        _state.replica = random.choice(settings.DATABASE_REPLICAS)
+    try:
+        yield
+    finally:
+        _state.replica = previous
+
+
+def primary_pinned(request):
+    try:
+        return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+def replica_reads(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if primary_pinned(request):
+            return view(request, *args, **kwargs)
+        with reading_from_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def primary_after_write(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        writes = getattr(_state, 'writes', 0)
+        response = view(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and getattr(_state, 'writes', 0) > writes):
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+            )
+        return response
+    return wrapper
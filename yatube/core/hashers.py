@@ -0,0 +1,110 @@
+"""Хешер паролей на scrypt и пул потоков для хеширования.
+
+Хеширование пароля намеренно дорогое. Чтобы волна входов не забирала
+все потоки веб-сервера, хеши считаются в отдельном пуле ограниченного
+размера (``PASSWORD_HASHING_WORKERS``): остальные запросы ждут своей
+очереди, а рендер страниц продолжает получать процессор. ``hashlib``
+отпускает GIL на время вычисления, поэтому пул потоков здесь работает
+параллельно.
+"""
+import base64
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+_pool = None
+
+
+def run_in_pool(func, *args, **kwargs):
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix='password-hashing',
+        )
+    return _pool.submit(func, *args, **kwargs).result()
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """scrypt из стандартной библиотеки.
+
+    При смене параметров старые хеши пересчитываются при следующем входе
+    пользователя (``must_update``).
+    """
+    algorithm = 'scrypt'
+    work_factor = 2 ** 14
+    block_size = 8
+    parallelism = 1
+    maxmem = 0
+
+    def _hash(self, password, salt, work_factor, block_size, parallelism):
+        hash_ = run_in_pool(
+            hashlib.scrypt,
+            password.encode(),
+            salt=salt.encode(),
+            n=work_factor,
+            r=block_size,
+            p=parallelism,
+            maxmem=self.maxmem or 256 * work_factor * block_size,
+            dklen=64,
+        )
+        return base64.b64encode(hash_).decode('ascii').strip()
+
+    def encode(self, password, salt, work_factor=None, block_size=None,
+               parallelism=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        work_factor = work_factor or self.work_factor
+        block_size = block_size or self.block_size
+        parallelism = parallelism or self.parallelism
+        hash_ = self._hash(password, salt, work_factor, block_size,
+                           parallelism)
+        return (f'{self.algorithm}${work_factor}${salt}${block_size}'
+                f'${parallelism}${hash_}')
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = (
+            encoded.split('$', 5))
+        assert algorithm == self.algorithm
+        return {
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'])
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), self.algorithm),
+            (_('work factor'), decoded['work_factor']),
+            (_('block size'), decoded['block_size']),
+            (_('parallelism'), decoded['parallelism']),
+            (_('salt'), mask_hash(decoded['salt'])),
+            (_('hash'), mask_hash(decoded['hash'])),
+        ])
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # Стоимость scrypt нельзя добрать частями, как итерации PBKDF2.
+        pass
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.utils.module_loading import autodiscover_modules
+
+from core.bench import scenarios
+
+
+class Command(BaseCommand):
+    help = 'Запускает замеры производительности на тестовой базе.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Сценарии для запуска.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--list', action='store_true', help='Показать сценарии.')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('benchmarks')
+        if options['list']:
+            self.stdout.write('\n'.join(sorted(scenarios)))
+            return
+        names = options['names'] or sorted(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                'Неизвестные сценарии: ' + ', '.join(sorted(unknown)))
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            for name in names:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for label, result in scenarios[name](options['repeat']):
+                    self.stdout.write(self.format_result(label, result))
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+    def format_result(self, label, result):
+        parts = [
+            f'{result["ms"]:8.2f} мс',
+            f'{result["queries"]:5.1f} запр.',
+            f'{result["per_second"]:9.1f} /с',
+        ]
+        if 'peak_kb' in result:
+            parts.append(f'{result["peak_kb"]:9.1f} КБ')
+        if 'bytes' in result:
+            parts.append(f'{result["bytes"]:9.0f} байт')
+        if 'cache_calls' in result:
+            parts.append(f'{result["cache_calls"]:3d} обращ. к кешу')
+        return f'  {label:<48}' + ' '.join(parts)
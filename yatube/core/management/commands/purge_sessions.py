@@ -0,0 +1,49 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+DB_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = ('Удаляет истёкшие сессии пачками. С --interval работает '
+            'как фоновый процесс и повторяет очистку.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Повторять очистку каждые N секунд.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            removed = self.purge(options['chunk_size'])
+            self.stdout.write(f'Удалено истёкших сессий: {removed}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def purge(self, chunk_size):
+        if settings.SESSION_ENGINE not in DB_ENGINES:
+            engine = import_module(settings.SESSION_ENGINE)
+            try:
+                engine.SessionStore.clear_expired()
+            except NotImplementedError:
+                pass
+            return 0
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        removed = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[
+                :chunk_size])
+            if not keys:
+                return removed
+            removed += Session.objects.filter(session_key__in=keys).delete()[0]
@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS. Нужна для локальной проверки реплик.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Копировать можно только SQLite: настройте репликацию '
+                'средствами СУБД.')
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: скопировано')
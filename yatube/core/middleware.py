@@ -0,0 +1,176 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.staticfiles import finders
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .auth import get_cached_user
+
+# Имена, которые меняются вместе с содержимым: хеш ManifestStaticFilesStorage,
+# хеш ContentAddressedStorage и ключи превью sorl-thumbnail.
+IMMUTABLE_NAME_RE = re.compile(
+    r'\.[0-9a-f]{12}\.\w+$'
+    r'|/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}(?:[0-9a-f]{32})?\.\w+$'
+)
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class RangeFile:
+    """Читает из файла не больше ``length`` байт начиная с ``start``."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFilesMiddleware:
+    """Отдаёт статику и медиафайлы, не доходя до URL-ов и вьюх.
+
+    Файл отдаётся через ``FileResponse``, поэтому WSGI-сервер может
+    использовать ``wsgi.file_wrapper`` (sendfile). Поддерживаются
+    заранее сжатые копии (``.br``, ``.gz``), условные запросы
+    и ``Range``. Файлы с хешем в имени кешируются навсегда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    def serve(self, request):
+        path = request.path_info
+        for prefix, root in (
+            (settings.STATIC_URL, settings.STATIC_ROOT),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT),
+        ):
+            if prefix and root and path.startswith(prefix):
+                name = path[len(prefix):]
+                break
+        else:
+            return None
+
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        full_path = self.find(root, name)
+        if full_path is None and settings.DEBUG and prefix == (
+                settings.STATIC_URL):
+            full_path = finders.find(name)
+        if full_path is None:
+            return None
+        return self.file_response(request, full_path)
+
+    def find(self, root, name):
+        try:
+            full_path = safe_join(root, name)
+        except (SuspiciousFileOperation, ValueError):
+            return None
+        if os.path.isfile(full_path):
+            return full_path
+        return None
+
+    def file_response(self, request, full_path):
+        content_type, _ = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+        encoding, served_path = self.choose_encoding(request, full_path)
+        stat_result = os.stat(served_path)
+        size, mtime = stat_result[stat.ST_SIZE], stat_result[stat.ST_MTIME]
+        etag = f'"{mtime:x}-{size:x}{"-" + encoding if encoding else ""}"'
+
+        if (
+            request.META.get('HTTP_IF_NONE_MATCH') == etag
+            or not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime, size)
+        ):
+            response = HttpResponse(status=304)
+        else:
+            response = self.body_response(request, served_path, size,
+                                          ranged=encoding is None)
+            response['Content-Type'] = content_type
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        if self.has_compressed_variants(full_path):
+            response['Vary'] = 'Accept-Encoding'
+        if IMMUTABLE_NAME_RE.search(full_path.replace(os.sep, '/')):
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, '
+                f'immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_DEFAULT_MAX_AGE}')
+        return response
+
+    def body_response(self, request, path, size, ranged):
+        file = open(path, 'rb')
+        range_header = request.META.get('HTTP_RANGE', '')
+        match = RANGE_RE.match(range_header) if ranged else None
+        if match is None or match.groups() == ('', ''):
+            response = FileResponse(file)
+            if ranged:
+                response['Accept-Ranges'] = 'bytes'
+            return response
+
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start > end or start >= size:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        response = FileResponse(RangeFile(file, start, end - start + 1),
+                                status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    def choose_encoding(self, request, full_path):
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                return encoding, full_path + suffix
+        return None, full_path
+
+    def has_compressed_variants(self, full_path):
+        return any(
+            os.path.isfile(full_path + suffix) for _, suffix in ENCODINGS)
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` с кешем пользователей ``core.auth``."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
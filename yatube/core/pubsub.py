@@ -0,0 +1,75 @@
+"""Простой pub/sub поверх кеша Django.
+
+Кеш играет роль брокера: событие получает номер из счётчика канала
+(``cache.incr`` атомарен) и хранится под своим ключом ``ttl`` секунд.
+Подписчики того же процесса просыпаются сразу, подписчики других
+процессов замечают новые номера при опросе раз в ``poll_interval``.
+Брокеру нужен кеш, общий для всех воркеров (``CACHE_LOCATION``): с
+``LocMemCache`` события не выходят за пределы процесса, поэтому сайт в
+нескольких процессах с таким кешем не запускается (``core.checks``).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+class Broker:
+    def __init__(self, channel, ttl=300, poll_interval=1.0, backlog=100):
+        self.channel = channel
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.backlog = backlog
+        self._condition = threading.Condition()
+
+    def _sequence_key(self):
+        return f'pubsub:{self.channel}:seq'
+
+    def _event_key(self, event_id):
+        return f'pubsub:{self.channel}:{event_id}'
+
+    def publish(self, data):
+        cache.add(self._sequence_key(), 0, None)
+        event_id = cache.incr(self._sequence_key())
+        cache.set(self._event_key(event_id), data, self.ttl)
+        with self._condition:
+            self._condition.notify_all()
+        return event_id
+
+    def last_id(self):
+        return cache.get(self._sequence_key(), 0)
+
+    def read(self, after_id):
+        """События с номером больше ``after_id``, не больше ``backlog``."""
+        last_id = self.last_id()
+        if last_id <= after_id:
+            return []
+        event_ids = range(max(after_id + 1, last_id - self.backlog + 1),
+                          last_id + 1)
+        found = cache.get_many([self._event_key(i) for i in event_ids])
+        return [
+            (event_id, found[self._event_key(event_id)])
+            for event_id in event_ids
+            if self._event_key(event_id) in found
+        ]
+
+    def wait(self, after_id, timeout):
+        """Ждёт новых событий не дольше ``timeout`` секунд."""
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.read(after_id)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            with self._condition:
+                self._condition.wait(min(remaining, self.poll_interval))
+
+
+def get_broker(channel):
+    with _brokers_lock:
+        if channel not in _brokers:
+            _brokers[channel] = Broker(channel)
+        return _brokers[channel]
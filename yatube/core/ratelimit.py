@@ -0,0 +1,115 @@
+"""Ограничение частоты запросов к изменяющим данные вьюхам.
+
+Каждое ограничение — корзина токенов на пользователя или IP: в ней
+помещается ``limit`` запросов, и она пополняется равномерно, по токену
+каждые ``period / limit`` секунд, так что на стыке периодов двойного
+всплеска не бывает. Состояние корзины — одно число, момент, когда она
+снова будет полной (алгоритм GCRA). Оно хранится в кеше
+``RATELIMIT_CACHE`` и меняется атомарными ``incr``/``decr`` без
+блокировок: разрешённый запрос обычно стоит одно обращение к кешу.
+Лимит общий для всех воркеров, только если этот кеш общий: сайт в
+нескольких процессах с локальным кешем не запускается
+(``core.checks``).
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Ключ корзины живёт столько периодов с последней записи через add/set
+# (incr срок не продлевает). После этого корзина снова полна, так что
+# непрерывный поток запросов получает не больше ``limit`` лишних токенов
+# за KEY_PERIODS периодов.
+KEY_PERIODS = 10
+
+
+def parse_rate(rate):
+    """``'10/m'`` -> ``(10, 60)``."""
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _take(cache, key, interval, now, timeout):
+    """Атомарно сдвигает момент заполнения корзины на ``interval``.
+
+    Возвращает новое значение; пустой ключ создаётся через ``add``.
+    """
+    try:
+        return cache.incr(key, interval)
+    except ValueError:
+        if cache.add(key, now + interval, timeout):
+            return now + interval
+        # Ключ успел создать параллельный запрос.
+        return cache.incr(key, interval)
+
+
+def hit(scope, ident, rate, now=None):
+    """Забирает из корзины один токен.
+
+    Возвращает ``None``, если запрос разрешён, иначе число секунд до
+    появления следующего токена.
+    """
+    limit, period = parse_rate(rate)
+    # Время в кеше — целые миллисекунды, чтобы работали incr и decr.
+    period_ms = period * 1000
+    interval = max(1, period_ms // limit)
+    now = int((time.time() if now is None else now) * 1000)
+    key = f'ratelimit:{scope}:{ident}'
+    timeout = period * KEY_PERIODS
+    cache = caches[settings.RATELIMIT_CACHE]
+    full_at = _take(cache, key, interval, now, timeout)
+    if full_at - interval < now:
+        # Корзина уже была полной: отсчёт идёт от now, а не от старого
+        # значения. Параллельный запрос в этот момент может потеряться —
+        # это не больше одного лишнего токена.
+        full_at = now + interval
+        cache.set(key, full_at, timeout)
+    elif full_at - now > period_ms:
+        cache.decr(key, interval)
+        return max(1, math.ceil((full_at - now - period_ms) / 1000))
+    return None
+
+
+def check(request, scope):
+    rates = settings.RATELIMITS.get(scope, {})
+    buckets = [('ip', client_ip(request))]
+    if request.user.is_authenticated:
+        buckets.insert(0, ('user', request.user.pk))
+    for kind, ident in buckets:
+        if kind in rates:
+            retry_after = hit(f'{scope}:{kind}', ident, rates[kind])
+            if retry_after is not None:
+                return retry_after
+    return None
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html',
+                      {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = retry_after
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Декоратор вьюхи: лимиты берутся из ``settings.RATELIMITS[scope]``.
+
+    Учитываются только запросы с методами из ``methods``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after is not None:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map', '.ico',
+)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище с адресацией по содержимому.
+
+    Имя файла — это SHA-256 его содержимого, разложенный по подкаталогам:
+    ``posts/9f/86/9f86d0...15.jpg``. Одинаковые загрузки хранятся один раз,
+    а занятость имени проверять не нужно. Файл могут использовать несколько
+    записей, поэтому удалять его можно только после подсчёта ссылок
+    (см. команду ``collect_media_garbage``).
+    """
+    hash_algorithm = 'sha256'
+    shard_levels = 2
+    shard_width = 2
+
+    def hashed_name(self, directory, digest, extension):
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_levels)
+        ]
+        return posixpath.join(directory, *shards, digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        hasher = hashlib.new(self.hash_algorithm)
+
+        os.makedirs(self.location, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.upload-', dir=self.location)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+
+            name = self.hashed_name(
+                directory, hasher.hexdigest(), extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # Повторная загрузка «оживляет» файл: иначе
+                # collect_media_garbage может удалить его как сироту,
+                # пока новая ссылка на него ещё не сохранена.
+                os.utime(full_path)
+                return name
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+            return name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и заранее сжатыми копиями.
+
+    При ``collectstatic`` рядом с текстовыми файлами кладутся ``.gz``
+    и, если установлен пакет ``brotli``, ``.br``: их отдаёт
+    ``core.middleware.StaticFilesMiddleware``. Файлы, которых нет
+    в манифесте (например, до первого ``collectstatic``), отдаются
+    по исходному имени.
+    """
+    manifest_strict = False
+    min_compression_ratio = 0.95
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            processed_names.add(name)
+            if isinstance(hashed_name, str):
+                processed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        variants = [('.gz', gzip.compress(content, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content) * self.min_compression_ratio:
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
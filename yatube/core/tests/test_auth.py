@@ -0,0 +1,50 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..auth import _users
+
+User = get_user_model()
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        _users.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-password')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    # Число уведомлений в шапке берётся из кеша, только если он общий.
+    @mock.patch('notifications.inbox.is_process_local', return_value=False)
+    def test_logged_in_request_makes_no_queries(self, _):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_purge_sessions_removes_only_expired(self):
+        Session.objects.create(
+            session_key='expired', session_data='',
+            expire_date=timezone.now() - timedelta(days=1))
+        call_command('purge_sessions', chunk_size=1, stdout=StringIO())
+        self.assertFalse(
+            Session.objects.filter(session_key='expired').exists())
+        self.assertTrue(Session.objects.exists())
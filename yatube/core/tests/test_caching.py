@@ -0,0 +1,102 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import caching
+
+
+class ReadThroughTest(SimpleTestCase):
+    # invalidate откладывает второй сброс через transaction.on_commit.
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.build = mock.Mock(return_value='value')
+
+    def test_value_is_built_once(self):
+        for _ in range(2):
+            self.assertEqual(
+                caching.read_through('key', self.build, 60), 'value')
+        self.build.assert_called_once()
+
+    def test_none_is_cached_too(self):
+        self.build.return_value = None
+        for _ in range(2):
+            self.assertIsNone(caching.read_through('key', self.build, 60))
+        self.build.assert_called_once()
+
+    def test_invalidate_forces_rebuild(self):
+        caching.read_through('key', self.build, 60)
+        caching.invalidate('key')
+        caching.read_through('key', self.build, 60)
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_value_built_before_invalidation_is_not_served(self):
+        def build():
+            caching.invalidate('key')
+            return 'stale'
+
+        self.assertEqual(caching.read_through('key', build, 60), 'stale')
+        self.assertEqual(
+            caching.read_through('key', self.build, 60), 'value')
+
+    def test_evicted_generation_does_not_match_old_entry(self):
+        caching.read_through('key', self.build, 60)
+        caching.invalidate('key')
+        # Кеш вытеснил поколение, а устаревшая запись осталась.
+        cache.delete(caching._generation_key('key'))
+        caching.read_through('key', self.build, 60)
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_written_value_is_served_without_build(self):
+        caching.read_through('key', self.build, 60)
+        caching.write_through('key', 'fresh', 60)
+        self.assertEqual(
+            caching.read_through('key', self.build, 60), 'fresh')
+        self.build.assert_called_once()
+
+    def test_value_built_before_write_is_not_served(self):
+        def build():
+            caching.write_through('key', 'fresh', 60)
+            return 'stale'
+
+        caching.read_through('key', build, 60)
+        self.assertEqual(
+            caching.read_through('key', self.build, 60), 'fresh')
+
+    def test_concurrent_miss_waits_for_builder(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        builder = threading.Thread(
+            target=caching.read_through, args=('key', slow_build, 60))
+        builder.start()
+        started.wait(5)
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(
+            caching.read_through('key', self.build, 60), 'value')
+        builder.join()
+        self.build.assert_not_called()
+
+
+class ReadManyTest(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_missing_and_invalidated_keys_are_built(self):
+        build = mock.Mock(side_effect=lambda keys: {
+            key: key.upper() for key in keys})
+        caching.read_many(['a', 'b'], build, 60)
+        caching.invalidate('b')
+        self.assertEqual(caching.read_many(['a', 'b', 'c'], build, 60),
+                         {'a': 'A', 'b': 'B', 'c': 'C'})
+        self.assertEqual(build.call_args_list, [
+            mock.call(['a', 'b']), mock.call(['b', 'c'])])
@@ -0,0 +1,29 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_shared_caches, is_process_local
+
+MEMCACHED = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': ['127.0.0.1:11211'],
+    }
+}
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_single_process_may_use_local_cache(self):
+        self.assertTrue(is_process_local())
+        check_shared_caches()
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_several_processes_refuse_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured) as raised:
+            check_shared_caches()
+        for module in ('core.caching', 'core.pubsub', 'core.ratelimit'):
+            self.assertIn(module, str(raised.exception))
+
+    @override_settings(WEB_CONCURRENCY=4, CACHES=MEMCACHED)
+    def test_several_processes_accept_shared_cache(self):
+        self.assertFalse(is_process_local())
+        check_shared_caches()
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+
+from ..counters import CounterBuffer, buffers, flush_due
+
+User = get_user_model()
+
+
+class CounterBufferTest(TestCase):
+    def setUp(self):
+        self.on_flush = mock.Mock()
+        self.buffer = CounterBuffer(Post, 'likes_count', self.on_flush)
+        self.addCleanup(buffers.remove, self.buffer)
+        author = User.objects.create_user(username='author')
+        self.posts = [
+            Post.objects.create(text=f'Пост {number}', author=author)
+            for number in range(3)
+        ]
+
+    def counts(self):
+        return [
+            Post.objects.get(pk=post.pk).likes_count for post in self.posts]
+
+    def test_increments_are_written_in_one_statement(self):
+        first, second, third = self.posts
+        for post, delta in ((first, 1), (second, 1), (first, 1), (third, 0)):
+            self.buffer.add(post.pk, delta)
+        self.assertEqual(self.buffer.pending(first.pk), 2)
+        self.assertEqual(self.counts(), [0, 0, 0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE')]), 1)
+        self.assertEqual(self.counts(), [2, 1, 0])
+        self.on_flush.assert_called_once_with([(first.pk, 2), (second.pk, 1)])
+        self.assertEqual(self.buffer.pending(first.pk), 0)
+
+    def test_failed_flush_rolls_back_and_keeps_increments(self):
+        self.on_flush.side_effect = DatabaseError
+        self.buffer.add(self.posts[0].pk)
+        with self.assertRaises(DatabaseError):
+            self.buffer.flush()
+        self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertEqual(self.buffer.pending(self.posts[0].pk), 1)
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_flush_after_request_logs_errors(self):
+        self.on_flush.side_effect = DatabaseError
+        self.buffer.add(self.posts[0].pk)
+        with self.assertLogs('core.counters', 'ERROR'):
+            flush_due()
+        self.assertEqual(self.buffer.pending(self.posts[0].pk), 1)
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_buffer_is_flushed_after_request(self):
+        self.buffer.add(self.posts[0].pk)
+        self.client.get('/')
+        self.assertEqual(self.counts(), [1, 0, 0])
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..db import (
+    STICKY_COOKIE, primary_after_write, reading_from_replica, replica_reads,
+)
+
+User = get_user_model()
+
+
+def queried_database(request):
+    return HttpResponse(Post.objects.all().db)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view = replica_reads(queried_database)
+
+    def test_reads_go_to_replica_only_inside_decorated_view(self):
+        response = self.view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        self.assertEqual(Post.objects.all().db, 'default')
+
+    def test_writes_and_other_apps_use_primary(self):
+        with reading_from_replica():
+            self.assertEqual(User.objects.all().db, 'default')
+            self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_sticky_cookie_pins_reads_to_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '9999999999'
+        self.assertEqual(self.view(request).content, b'default')
+
+    def test_expired_sticky_cookie_is_ignored(self):
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.view(request).content, b'replica1')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryAfterWriteTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_request_without_write_sets_no_cookie(self):
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_decorator_counts_only_own_writes(self):
+        view = primary_after_write(lambda request: HttpResponse())
+        response = view(RequestFactory().get('/'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..hashers import ScryptPasswordHasher
+
+User = get_user_model()
+
+
+class FastScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = 2 ** 8
+
+
+class ScryptPasswordHasherTest(SimpleTestCase):
+    def setUp(self):
+        self.hasher = FastScryptPasswordHasher()
+
+    def test_encode_and_verify(self):
+        encoded = self.hasher.encode('secret', 'salt')
+        self.assertTrue(encoded.startswith('scrypt$256$salt$8$1$'))
+        self.assertTrue(self.hasher.verify('secret', encoded))
+        self.assertFalse(self.hasher.verify('wrong', encoded))
+
+    def test_changed_parameters_need_update(self):
+        encoded = self.hasher.encode('secret', 'salt')
+        self.assertFalse(self.hasher.must_update(encoded))
+        self.assertTrue(ScryptPasswordHasher().must_update(encoded))
+
+    def test_safe_summary_masks_hash(self):
+        summary = self.hasher.safe_summary(
+            self.hasher.encode('secret', 'salt'))
+        self.assertEqual(summary['work factor'], 256)
+        self.assertTrue(summary['hash'].endswith('*' * 10))
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'core.tests.test_hashers.FastScryptPasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+], RATELIMIT_ENABLED=False)
+class RehashOnLoginTest(TestCase):
+    def test_old_hash_is_replaced_on_login(self):
+        user = User.objects.create(
+            username='old-timer',
+            password=make_password('secret', hasher='md5'))
+        self.assertTrue(Client().login(username='old-timer',
+                                       password='secret'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(check_password('secret', user.password))
+
+    def test_signup_uses_preferred_hasher(self):
+        Client().post(reverse('users:signup'), {
+            'username': 'newcomer',
+            'password1': 'Kx9-quiet-river-stone',
+            'password2': 'Kx9-quiet-river-stone',
+        })
+        self.assertTrue(
+            User.objects.get(username='newcomer').password.startswith(
+                'scrypt$'))
@@ -0,0 +1,97 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+MEDIA_CONTENT = b'0123456789' * 10
+CSS_CONTENT = b'body { color: red; }\n' * 50
+
+
+class StaticFilesMiddlewareTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.source_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.static_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.hashed_name = 'posts/ab/cd/' + 'abcd' * 16 + '.jpg'
+        os.makedirs(os.path.join(cls.media_root, 'posts/ab/cd'))
+        with open(os.path.join(cls.media_root, cls.hashed_name), 'wb') as f:
+            f.write(MEDIA_CONTENT)
+        with open(os.path.join(cls.media_root, 'plain.txt'), 'wb') as f:
+            f.write(MEDIA_CONTENT)
+        with open(os.path.join(cls.media_root, 'a%41.txt'), 'wb') as f:
+            f.write(MEDIA_CONTENT)
+        os.makedirs(os.path.join(cls.source_dir, 'css'))
+        with open(os.path.join(cls.source_dir, 'css/site.css'), 'wb') as f:
+            f.write(CSS_CONTENT)
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root,
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_DIRS=[cls.source_dir],
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        for directory in (cls.media_root, cls.source_dir, cls.static_root):
+            shutil.rmtree(directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hashed_media_is_immutable(self):
+        response = self.client.get('/media/' + self.hashed_name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), MEDIA_CONTENT)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_plain_media_is_not_immutable(self):
+        response = self.client.get('/media/plain.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        response = self.client.get(
+            '/media/' + self.hashed_name, HTTP_RANGE='bytes=5-14')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 5-14/100')
+        self.assertEqual(
+            b''.join(response.streaming_content), MEDIA_CONTENT[5:15])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            '/media/' + self.hashed_name, HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional_request(self):
+        etag = self.client.get('/media/plain.txt')['ETag']
+        response = self.client.get('/media/plain.txt', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_percent_in_name_is_decoded_once(self):
+        response = self.client.get('/media/a%2541.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), MEDIA_CONTENT)
+
+    def test_path_traversal_is_not_served(self):
+        response = self.client.get('/media/../yatube/settings.py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_static_is_hashed_and_precompressed(self):
+        url = staticfiles_storage.url('css/site.css')
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            CSS_CONTENT)
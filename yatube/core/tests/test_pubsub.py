@@ -0,0 +1,34 @@
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..pubsub import Broker
+
+
+class BrokerTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.broker = Broker('test', poll_interval=0.05, backlog=2)
+
+    def test_read_returns_events_after_id(self):
+        first = self.broker.publish('first')
+        self.broker.publish('second')
+        self.assertEqual(self.broker.read(first), [(first + 1, 'second')])
+        self.assertEqual(self.broker.read(self.broker.last_id()), [])
+
+    def test_read_is_limited_by_backlog(self):
+        for number in range(5):
+            self.broker.publish(number)
+        self.assertEqual(
+            [data for _, data in self.broker.read(0)], [3, 4])
+
+    def test_wait_wakes_up_on_publish(self):
+        timer = threading.Timer(0.1, self.broker.publish, ['event'])
+        timer.start()
+        events = self.broker.wait(0, timeout=5)
+        timer.join()
+        self.assertEqual(events, [(1, 'event')])
+
+    def test_wait_returns_empty_on_timeout(self):
+        self.assertEqual(self.broker.wait(0, timeout=0.1), [])
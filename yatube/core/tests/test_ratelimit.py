@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..ratelimit import hit, parse_rate
+
+User = get_user_model()
+
+
+class TokenBucketTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+
+    def test_bucket_refills_one_token_per_interval(self):
+        self.assertIsNone(hit('scope', 1, '2/m', now=60))
+        self.assertIsNone(hit('scope', 1, '2/m', now=60))
+        self.assertEqual(hit('scope', 1, '2/m', now=70), 20)
+        self.assertIsNone(hit('scope', 1, '2/m', now=90))
+        self.assertEqual(hit('scope', 1, '2/m', now=90), 30)
+
+    def test_no_double_burst_at_period_boundary(self):
+        self.assertIsNone(hit('scope', 1, '2/m', now=59))
+        self.assertIsNone(hit('scope', 1, '2/m', now=59))
+        self.assertIsNotNone(hit('scope', 1, '2/m', now=60))
+        self.assertIsNotNone(hit('scope', 1, '2/m', now=61))
+
+    def test_buckets_are_separate_per_ident(self):
+        self.assertIsNone(hit('scope', 1, '1/m', now=0))
+        self.assertIsNone(hit('scope', 2, '1/m', now=0))
+        self.assertIsNotNone(hit('scope', 1, '1/m', now=0))
+
+    def test_denied_hit_does_not_take_a_token(self):
+        self.assertIsNone(hit('scope', 1, '1/m', now=0))
+        self.assertEqual(hit('scope', 1, '1/m', now=30), 30)
+        self.assertEqual(hit('scope', 1, '1/m', now=45), 15)
+        self.assertIsNone(hit('scope', 1, '1/m', now=60))
+
+    def test_full_bucket_is_counted_from_now(self):
+        self.assertIsNone(hit('scope', 1, '2/m', now=0))
+        self.assertIsNone(hit('scope', 1, '2/m', now=500))
+        self.assertIsNone(hit('scope', 1, '2/m', now=500))
+        self.assertEqual(hit('scope', 1, '2/m', now=500), 30)
+
+    def test_allowed_hit_is_one_cache_call(self):
+        hit('scope', 1, '10/m', now=0)
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add, \
+                mock.patch.object(cache, 'set', wraps=cache.set) as set_, \
+                mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            self.assertIsNone(hit('scope', 1, '10/m', now=1))
+        self.assertEqual(incr.call_count, 1)
+        add.assert_not_called()
+        set_.assert_not_called()
+
+
+@override_settings(RATELIMITS={
+    'add_comment': {'user': '2/m'},
+    'signup': {'ip': '1/m'},
+})
+class RateLimitedViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='spammer')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.client = Client()
+
+    def test_user_gets_429_after_limit(self):
+        self.client.force_login(self.user)
+        url = reverse('posts:add_comment', args=[self.post.pk])
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(url, {'text': 'Спам'}).status_code, 302)
+        response = self.client.post(url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_signup_is_limited_per_ip(self):
+        url = reverse('users:signup')
+        self.client.post(url, {})
+        self.assertEqual(self.client.post(url, {}).status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_limits_can_be_disabled(self):
+        url = reverse('users:signup')
+        for _ in range(3):
+            self.assertEqual(self.client.post(url, {}).status_code, 200)
@@ -0,0 +1,43 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from ..storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_name_is_sharded_content_hash(self):
+        digest = hashlib.sha256(b'meme').hexdigest()
+        name = self.storage.save('posts/meme.JPG', ContentFile(b'meme'))
+        self.assertEqual(
+            name, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'meme')
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.storage.save('posts/a.gif', ContentFile(b'same'))
+        second = self.storage.save('posts/b.gif', ContentFile(b'same'))
+        other = self.storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.storage.listdir('')[0], ['posts'])
+        self.assertEqual(self.storage.listdir('')[1], [])
+
+    def test_reused_blob_mtime_is_refreshed(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'same'))
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+        self.storage.save('posts/b.gif', ContentFile(b'same'))
+        self.assertGreater(os.path.getmtime(path), 0)
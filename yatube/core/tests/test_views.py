@@ -0,0 +1,17 @@
+from django.test import RequestFactory, SimpleTestCase
+from django.utils import timezone
+
+from ..context_processors.year import current_year, year
+from ..views import server_error
+
+
+class CoreViewsTest(SimpleTestCase):
+    def test_year_is_current(self):
+        self.assertEqual(year(None), {'year': timezone.now().year})
+        self.assertEqual(current_year(), timezone.now().year)
+
+    def test_server_error_renders_without_request_context(self):
+        response = server_error(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 500)
+        self.assertContains(
+            response, str(timezone.now().year), status_code=500)
@@ -1,4 +1,8 @@
+from django.http import HttpResponseServerError
 from django.shortcuts import render
+from django.template import loader
+
+from .context_processors.year import current_year
 
 
 def page_not_found(request, exception):
@@ -10,7 +14,11 @@ def csrf_failure(request, reason=''):
 
 
 def server_error(request):
-    return render(request, 'core/500.html', status=500)
+    # Без RequestContext: контекст-процессоры ходят в сессию и базу,
+    # а они могут быть причиной ошибки.
+    template = loader.get_template('core/500.html')
+    return HttpResponseServerError(
+        template.render({'year': current_year()}))
 
 
 def permission_denied(request, exception):
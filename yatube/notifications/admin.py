@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Notification
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'kind', 'post_id', 'actor_count',
+                    'is_read', 'pub_date')
+    list_filter = ('kind', 'is_read')
+    list_select_related = ('recipient',)
+    raw_id_fields = ('recipient', 'last_actor')
+    show_full_result_count = False
+
+
+admin.site.register(Notification, NotificationAdmin)
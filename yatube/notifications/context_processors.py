@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .inbox import unread_count
+
+
+def unread_notifications(request):
+    """Число непрочитанных уведомлений; читается, только если нужно."""
+    def load():
+        if not request.user.is_authenticated:
+            return 0
+        return unread_count(request.user.pk)
+
+    return {'unread_notifications': SimpleLazyObject(load)}
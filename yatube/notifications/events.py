@@ -0,0 +1,43 @@
+"""Запись событий для уведомлений.
+
+``notify`` делает одну вставку в ``Event`` и следит, чтобы на текущее
+окно ``NOTIFICATIONS_DELAY`` была поставлена задача ``coalesce_events``.
+Окно входит в ключ идемпотентности задачи, поэтому всплеск событий
+даёт одну задачу, а сам процесс помнит уже запланированное окно и
+не пытается вставить её повторно.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Event
+from .tasks import coalesce_events
+
+_scheduled_window = None
+
+
+def schedule_coalescing():
+    delay = settings.NOTIFICATIONS_DELAY
+    now = time.time()
+    window = int(now // delay)
+    if window == _scheduled_window:
+        return
+    coalesce_events.enqueue(
+        idempotency_key=f'notifications:{window}',
+        countdown=(window + 1) * delay - now,
+    )
+
+    def remember():
+        global _scheduled_window
+        _scheduled_window = window
+
+    transaction.on_commit(remember)
+
+
+def notify(recipient_id, actor_id, kind, post_id=None):
+    if recipient_id == actor_id:
+        return
+    Event.objects.create(recipient_id=recipient_id, actor_id=actor_id,
+                         kind=kind, post_id=post_id)
+    schedule_coalescing()
@@ -0,0 +1,158 @@
+"""Сворачивание событий в уведомления и счётчик непрочитанных.
+
+События (``Event``) копятся в таблице-очереди. ``coalesce`` разбирает
+их пачками: события одного типа для одного получателя и поста
+добавляются к его непрочитанному уведомлению или создают новое.
+Участники уведомления хранятся в ``NotificationActor``, так что
+повторные события одного человека не увеличивают ``actor_count``.
+Число непрочитанных хранится в ``Inbox`` и меняется вместе с
+уведомлениями, поэтому шапке сайта не нужен ``COUNT(*)``. События
+разбирает процесс воркера задач, поэтому число кешируется, только если
+кеш общий для процессов; иначе оно читается из базы по первичному ключу.
+"""
+from django.db import models, transaction
+
+from core.caching import invalidate, read_through
+from core.checks import is_process_local
+
+from .models import Event, Inbox, Notification, NotificationActor
+
+COALESCE_BATCH = 500
+UNREAD_TIMEOUT = 60 * 60
+
+
+def _unread_key(user_id):
+    return f'notifications_unread:{user_id}'
+
+
+def _load_unread(user_id):
+    return Inbox.objects.filter(user_id=user_id).values_list(
+        'unread_count', flat=True).first() or 0
+
+
+def unread_count(user_id):
+    if is_process_local():
+        # Сброс из воркера задач не дошёл бы до кеша этого процесса.
+        return _load_unread(user_id)
+    return read_through(
+        _unread_key(user_id), lambda: _load_unread(user_id), UNREAD_TIMEOUT)
+
+
+def _add_unread(deltas):
+    Inbox.objects.bulk_create(
+        [Inbox(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+    increment = models.Case(
+        *[models.When(user_id=user_id, then=models.Value(delta))
+          for user_id, delta in deltas.items()],
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+    Inbox.objects.filter(user_id__in=list(deltas)).update(
+        unread_count=models.F('unread_count') + increment)
+    for user_id in deltas:
+        invalidate(_unread_key(user_id))
+
+
+def _counted_actors(notifications, groups):
+    """Пары ``(уведомление, участник)`` пачки, которые уже посчитаны."""
+    return set(NotificationActor.objects.filter(
+        notification_id__in=[n.pk for n in notifications],
+        actor_id__in={actor for actors, _ in groups.values()
+                      for actor in actors},
+    ).values_list('notification_id', 'actor_id'))
+
+
+def _new_notification(actors, last):
+    return Notification(
+        recipient_id=last.recipient_id, kind=last.kind,
+        post_id=last.post_id, last_actor_id=last.actor_id,
+        actor_count=len(actors), pub_date=last.created,
+    )
+
+
+def _apply(events):
+    groups = {}
+    for event in events:
+        key = (event.recipient_id, event.kind, event.post_id)
+        actors = groups[key][0] if key in groups else set()
+        actors.add(event.actor_id)
+        groups[key] = (actors, event)
+
+    current = {
+        (notification.recipient_id, notification.kind,
+         notification.post_id): notification
+        for notification in Notification.objects.filter(
+            is_read=False,
+            recipient_id__in={recipient for recipient, _, _ in groups},
+        )
+    }
+    seen = _counted_actors(current.values(), groups)
+    created, updated = [], {}
+    for key, (actors, last) in groups.items():
+        notification = current.get(key)
+        if notification is None:
+            created.append(_new_notification(actors, last))
+        else:
+            notification.actor_count += len({
+                actor for actor in actors
+                if (notification.pk, actor) not in seen})
+            notification.last_actor_id = last.actor_id
+            notification.pub_date = last.created
+            updated[key] = notification
+    if updated:
+        # Уведомление могли прочитать после выборки выше: такие строки
+        # UPDATE не тронет, и события получат новое уведомление.
+        Notification.objects.filter(is_read=False).bulk_update(
+            updated.values(), ['actor_count', 'last_actor', 'pub_date'])
+        read = set(Notification.objects.filter(
+            pk__in=[n.pk for n in updated.values()], is_read=True,
+        ).values_list('pk', flat=True))
+        for key, notification in updated.items():
+            if notification.pk in read:
+                created.append(_new_notification(*groups[key]))
+    Notification.objects.bulk_create(created)
+    deltas = {}
+    for notification in created:
+        recipient_id = notification.recipient_id
+        deltas[recipient_id] = deltas.get(recipient_id, 0) + 1
+    if created:
+        # bulk_create не везде возвращает pk: перечитываем новые строки.
+        current.update({
+            (notification.recipient_id, notification.kind,
+             notification.post_id): notification
+            for notification in Notification.objects.filter(
+                is_read=False,
+                recipient_id__in={n.recipient_id for n in created},
+            )
+        })
+    NotificationActor.objects.bulk_create(
+        [
+            NotificationActor(notification_id=current[key].pk, actor_id=actor)
+            for key, (actors, _) in groups.items() for actor in actors
+        ],
+        ignore_conflicts=True,
+    )
+    if deltas:
+        _add_unread(deltas)
+
+
+def coalesce(batch_size=COALESCE_BATCH):
+    """Разбирает накопленные события, возвращает их число."""
+    done = 0
+    while True:
+        with transaction.atomic():
+            events = list(Event.objects.order_by('pk')[:batch_size])
+            if not events:
+                return done
+            _apply(events)
+            Event.objects.filter(
+                pk__in=[event.pk for event in events]).delete()
+        done += len(events)
+
+
+def mark_read(user_id):
+    with transaction.atomic():
+        Notification.objects.filter(
+            recipient_id=user_id, is_read=False).update(is_read=True)
+        Inbox.objects.filter(user_id=user_id).update(unread_count=0)
+    invalidate(_unread_key(user_id))
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_id', models.IntegerField(verbose_name='получатель')),
+                ('actor_id', models.IntegerField(verbose_name='кто')),
+                ('kind', models.CharField(choices=[('follow', 'подписка'), ('comment', 'комментарий'), ('mention', 'упоминание')], max_length=10, verbose_name='тип')),
+                ('post_id', models.IntegerField(blank=True, null=True, verbose_name='пост')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Inbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0, verbose_name='непрочитанных')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('follow', 'подписка'), ('comment', 'комментарий'), ('mention', 'упоминание')], max_length=10, verbose_name='тип')),
+                ('post_id', models.IntegerField(blank=True, null=True, verbose_name='пост')),
+                ('actor_count', models.PositiveIntegerField(default=1, verbose_name='участников')),
+                ('is_read', models.BooleanField(default=False, verbose_name='прочитано')),
+                ('pub_date', models.DateTimeField(verbose_name='последнее событие')),
+                ('last_actor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='последний')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'уведомление',
+                'verbose_name_plural': 'уведомления',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-pub_date', '-id'], name='notificatio_recipie_a6d189_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'kind', 'post_id', 'is_read'], name='notificatio_recipie_7ba6c3_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_last_actors(apps, schema_editor):
+    # Прежние участники неизвестны: запоминаем хотя бы последнего, чтобы
+    # его новые события не увеличили actor_count ещё раз.
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    rows = Notification.objects.filter(
+        is_read=False, last_actor__isnull=False,
+    ).values_list('pk', 'last_actor_id').iterator()
+    batch = []
+    for pk, actor_id in rows:
+        batch.append(NotificationActor(notification_id=pk, actor_id=actor_id))
+        if len(batch) == 1000:
+            NotificationActor.objects.bulk_create(batch)
+            batch = []
+    NotificationActor.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_id', models.IntegerField(verbose_name='кто')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='notifications.Notification')),
+            ],
+            options={
+                'unique_together': {('notification', 'actor_id')},
+            },
+        ),
+        migrations.RunPython(add_last_actors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+FOLLOW = 'follow'
+COMMENT = 'comment'
+MENTION = 'mention'
+KINDS = (
+    (FOLLOW, 'подписка'),
+    (COMMENT, 'комментарий'),
+    (MENTION, 'упоминание'),
+)
+
+
+class Event(models.Model):
+    """Необработанное событие. Пишется одной вставкой в горячей вьюхе,
+    а в уведомления его сворачивает фоновая задача."""
+    recipient_id = models.IntegerField('получатель')
+    actor_id = models.IntegerField('кто')
+    kind = models.CharField('тип', max_length=10, choices=KINDS)
+    post_id = models.IntegerField('пост', null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class NotificationQuerySet(models.QuerySet):
+    def inbox(self, user):
+        return self.filter(recipient=user).select_related(
+            'last_actor').order_by('-pub_date', '-pk')
+
+    def before(self, cursor):
+        """Записи после курсора ``(pub_date, pk)`` в порядке ``inbox()``."""
+        pub_date, pk = cursor
+        return self.filter(
+            models.Q(pub_date__lt=pub_date)
+            | models.Q(pub_date=pub_date, pk__lt=pk))
+
+
+class Notification(models.Model):
+    """Уведомление, в которое свёрнуты однотипные события.
+
+    Пока уведомление не прочитано, новые события того же типа по тому
+    же посту добавляются в него: «5 человек прокомментировали пост».
+    ``pub_date`` — время последнего события.
+    """
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+    )
+    kind = models.CharField('тип', max_length=10, choices=KINDS)
+    post_id = models.IntegerField('пост', null=True, blank=True)
+    last_actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='последний',
+    )
+    actor_count = models.PositiveIntegerField('участников', default=1)
+    is_read = models.BooleanField('прочитано', default=False)
+    pub_date = models.DateTimeField('последнее событие')
+
+    objects = NotificationQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'уведомление'
+        verbose_name_plural = 'уведомления'
+        indexes = [
+            models.Index(fields=['recipient', '-pub_date', '-id']),
+            models.Index(fields=['recipient', 'kind', 'post_id', 'is_read']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.recipient_id}'
+
+
+class NotificationActor(models.Model):
+    """Кто участвовал в уведомлении: ``actor_count`` считает каждого
+    один раз, сколько бы событий он ни добавил."""
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='actors',
+    )
+    actor_id = models.IntegerField('кто')
+
+    class Meta:
+        unique_together = ('notification', 'actor_id')
+
+
+class Inbox(models.Model):
+    """Число непрочитанных уведомлений, чтобы не считать их ``COUNT``."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='inbox',
+    )
+    unread_count = models.PositiveIntegerField('непрочитанных', default=0)
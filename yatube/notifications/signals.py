@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Comment, Follow
+from posts.tags import mentions_added
+
+from .events import notify
+from .models import COMMENT, FOLLOW, MENTION
+
+
+@receiver(post_save, sender=Follow)
+def notify_followed(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        notify(instance.author_id, instance.user_id, FOLLOW)
+
+
+@receiver(post_save, sender=Comment)
+def notify_commented(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        notify(instance.post.author_id, instance.author_id, COMMENT,
+               instance.post_id)
+
+
+@receiver(mentions_added)
+def notify_mentioned(sender, post, user_ids, **kwargs):
+    for user_id in user_ids:
+        notify(user_id, post.author_id, MENTION, post.pk)
@@ -0,0 +1,13 @@
+from tasks.registry import task
+
+from . import inbox
+from .models import Event
+
+
+@task(priority=5)
+def coalesce_events():
+    inbox.coalesce()
+    # События, закоммиченные уже во время разбора, ждут следующего окна.
+    if Event.objects.exists():
+        from .events import schedule_coalescing
+        schedule_coalescing()
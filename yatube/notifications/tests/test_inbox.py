@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+from tasks.models import Task
+
+from .. import events, inbox
+from ..inbox import coalesce, unread_count
+from ..models import (
+    COMMENT, FOLLOW, MENTION, Event, Inbox, Notification,
+)
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATIONS_DELAY=3600)
+class InboxTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        events._scheduled_window = None
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def comment(self, reader):
+        Comment.objects.create(text='Комментарий', post=self.post,
+                               author=reader)
+
+    def test_events_are_appended_and_scheduled_once(self):
+        for reader in self.readers:
+            self.comment(reader)
+        self.comment(self.author)
+        self.assertEqual(Event.objects.count(), 3)
+        self.assertEqual(Task.objects.filter(
+            name='notifications.tasks.coalesce_events').count(), 1)
+
+    def test_events_coalesce_into_one_notification(self):
+        for reader in self.readers:
+            self.comment(reader)
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        self.assertEqual(coalesce(batch_size=2), 4)
+        self.assertFalse(Event.objects.exists())
+
+        comment, follow = (
+            Notification.objects.get(kind=kind) for kind in (COMMENT, FOLLOW))
+        self.assertEqual(comment.actor_count, 3)
+        self.assertEqual(comment.last_actor, self.readers[2])
+        self.assertEqual(follow.actor_count, 1)
+        self.assertEqual(unread_count(self.author.pk), 2)
+
+    def test_actors_are_counted_once_across_batches(self):
+        self.comment(self.readers[0])
+        coalesce()
+        for reader in (self.readers[0], self.readers[1], self.readers[0]):
+            self.comment(reader)
+        coalesce()
+        self.comment(self.readers[1])
+        coalesce()
+        notification = Notification.objects.get(kind=COMMENT)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.last_actor, self.readers[1])
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    def test_read_notification_is_not_extended(self):
+        self.comment(self.readers[0])
+        coalesce()
+        self.client.get(reverse('notifications:inbox'))
+        self.assertEqual(unread_count(self.author.pk), 0)
+        self.comment(self.readers[1])
+        coalesce()
+        self.assertEqual(Notification.objects.filter(kind=COMMENT).count(), 2)
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    def test_events_read_during_coalescing_get_new_notification(self):
+        self.comment(self.readers[0])
+        coalesce()
+        self.comment(self.readers[1])
+        counted_actors = inbox._counted_actors
+
+        def read_meanwhile(notifications, groups):
+            inbox.mark_read(self.author.pk)
+            return counted_actors(notifications, groups)
+
+        with mock.patch.object(
+                inbox, '_counted_actors', side_effect=read_meanwhile):
+            coalesce()
+        old, new = Notification.objects.filter(kind=COMMENT).order_by('pk')
+        self.assertTrue(old.is_read)
+        self.assertEqual(old.actor_count, 1)
+        self.assertFalse(new.is_read)
+        self.assertEqual(new.last_actor, self.readers[1])
+        self.assertEqual(unread_count(self.author.pk), 1)
+
+    def test_mentions_notify_once(self):
+        post = Post.objects.create(
+            text='Привет, @reader0 и @reader0', author=self.author)
+        post.text = 'Снова @reader0'
+        post.save()
+        coalesce()
+        notification = Notification.objects.get(kind=MENTION)
+        self.assertEqual(notification.recipient, self.readers[0])
+        self.assertEqual(notification.post_id, post.pk)
+
+    def test_unread_badge_is_served_without_counting(self):
+        self.comment(self.readers[0])
+        coalesce()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(unread_count(self.author.pk), 1)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'])
+        # С общим кешем число читается из него.
+        with mock.patch.object(inbox, 'is_process_local', return_value=False):
+            unread_count(self.author.pk)
+            with self.assertNumQueries(0):
+                self.assertEqual(unread_count(self.author.pk), 1)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('notifications:inbox'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+
+    def test_badge_sees_counts_written_by_other_processes(self):
+        self.assertEqual(unread_count(self.author.pk), 0)
+        # Воркер задач пишет Inbox, не трогая кеш сайта.
+        Inbox.objects.create(user=self.author, unread_count=2)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 2)
+
+    def test_inbox_is_paged_newest_first(self):
+        for number in range(25):
+            post = Post.objects.create(text=f'Пост {number}',
+                                       author=self.author)
+            Comment.objects.create(text='Комментарий', post=post,
+                                   author=self.readers[0])
+        coalesce()
+        url = reverse('notifications:inbox')
+        response = self.client.get(url)
+        first = response.context['notifications']
+        self.assertEqual(len(first), 20)
+        self.assertFalse(first[0].is_read)
+        response = self.client.get(
+            url, {'cursor': response.context['next_cursor']})
+        rest = response.context['notifications']
+        self.assertEqual(len(rest), 5)
+        self.assertEqual(
+            [n.pk for n in first + rest],
+            list(Notification.objects.order_by(
+                '-pub_date', '-pk').values_list('pk', flat=True)))
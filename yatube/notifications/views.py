@@ -0,0 +1,23 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from posts.utils import get_cursor_page
+
+from .inbox import mark_read
+from .models import Notification
+
+NOTIFICATIONS_PER_PAGE = 20
+
+
+@login_required
+def inbox(request):
+    notifications, next_cursor = get_cursor_page(
+        request, Notification.objects.inbox(request.user),
+        NOTIFICATIONS_PER_PAGE)
+    if 'cursor' not in request.GET:
+        mark_read(request.user.pk)
+    context = {
+        'notifications': notifications,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'notifications/inbox.html', context)
@@ -1,17 +1,132 @@
-from django.contrib import admin
+import logging
 
-from .models import Comment, Follow, Group, Post
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+
+from . import moderation
+from .models import Comment, Follow, Group, Post, PostViewDaily
+from .utils import EstimatedCountPaginator
+
+logger = logging.getLogger(__name__)
+
+
+class PostActionForm(ActionForm):
+    target_group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='без группы',
+    )
+
+
+def run_with_progress(modeladmin, request, operation, label):
+    done = 0
+    for done in operation:
+        logger.info('%s: обработано %d', label, done)
+    modeladmin.message_user(
+        request, f'{label}: обработано записей — {done}', messages.SUCCESS)
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group',
+                    'likes_count', 'views_count')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    action_form = PostActionForm
+    actions = ('reassign_group', 'delete_by_author', 'purge_comments')
     empty_value_display = '-пусто-'
 
+    def reassign_group(self, request, queryset):
+        field = PostActionForm.base_fields['target_group']
+        try:
+            group = field.clean(request.POST.get('target_group') or None)
+        except ValidationError as error:
+            self.message_user(request, error.messages[0], messages.ERROR)
+            return
+        run_with_progress(
+            self, request,
+            moderation.reassign_group(queryset, group),
+            'Перенос в группу',
+        )
+    reassign_group.short_description = 'Перенести в выбранную группу'
+
+    def delete_by_author(self, request, queryset):
+        author_ids = set(
+            queryset.order_by().values_list('author_id', flat=True)
+            .distinct())
+        run_with_progress(
+            self, request,
+            moderation.delete_posts_by_authors(author_ids),
+            'Удаление постов авторов',
+        )
+    delete_by_author.short_description = (
+        'Удалить все посты авторов выбранных постов')
+
+    def purge_comments(self, request, queryset):
+        run_with_progress(
+            self, request,
+            moderation.delete_comments(
+                Comment.objects.filter(post__in=queryset)),
+            'Удаление комментариев',
+        )
+    purge_comments.short_description = 'Удалить комментарии к выбранным'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'post')
+    search_fields = ('text',)
+    list_select_related = ('author',)
+    raw_id_fields = ('author', 'post')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    actions = ('delete_by_author',)
+
+    def delete_by_author(self, request, queryset):
+        author_ids = set(
+            queryset.order_by().values_list('author_id', flat=True)
+            .distinct())
+        run_with_progress(
+            self, request,
+            moderation.delete_comments(
+                Comment.objects.filter(author_id__in=author_ids)),
+            'Удаление комментариев авторов',
+        )
+    delete_by_author.short_description = (
+        'Удалить все комментарии авторов выбранных комментариев')
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+class PostViewDailyAdmin(admin.ModelAdmin):
+    list_display = ('date', 'post_id', 'views')
+    list_filter = ('date',)
+    date_hierarchy = 'date'
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(PostViewDaily, PostViewDailyAdmin)
@@ -0,0 +1,65 @@
+"""Счётчик просмотров постов.
+
+Просмотр не пишет в базу сразу: приращения копятся в буфере процесса
+(``core.counters``) и раз в ``COUNTER_FLUSH_INTERVAL`` секунд уходят одним
+``UPDATE`` в ``Post.views_count`` и в дневную сводку ``PostViewDaily``
+в одной транзакции. После сброса закешированная страница поста
+пересобирается с новым счётчиком.
+Запросы поисковых роботов и клиентов без ``User-Agent`` не считаются.
+"""
+import re
+
+from django.db import models
+from django.utils import timezone
+
+from core.counters import CounterBuffer
+
+from .detail import invalidate_post
+from .models import Post, PostViewDaily
+
+BOT_USER_AGENT_RE = re.compile(
+    r'bot|crawl|spider|slurp|preview|monitor|headless|curl|wget'
+    r'|python-requests|httpclient',
+    re.IGNORECASE,
+)
+
+
+def record_daily(deltas, day=None):
+    """Добавляет просмотры к сводке за день двумя запросами на пачку."""
+    day = day or timezone.localdate()
+    # Недостающие строки создаются пустыми, а затем все строки
+    # получают приращения одним UPDATE: одновременный сброс из другого
+    # процесса не потеряет просмотры на конфликте вставки.
+    PostViewDaily.objects.bulk_create(
+        [PostViewDaily(post_id=post_id, date=day) for post_id, _ in deltas],
+        ignore_conflicts=True,
+    )
+    increment = models.Case(
+        *[models.When(post_id=post_id, then=models.Value(delta))
+          for post_id, delta in deltas],
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+    PostViewDaily.objects.filter(
+        date=day, post_id__in=[post_id for post_id, _ in deltas],
+    ).update(views=models.F('views') + increment)
+
+
+def _on_flush(deltas):
+    record_daily(deltas)
+    # Страница поста кешируется вместе со счётчиком просмотров.
+    for post_id, _ in deltas:
+        invalidate_post(post_id)
+
+
+views_buffer = CounterBuffer(Post, 'views_count', _on_flush)
+
+
+def is_bot(request):
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    return not user_agent or bool(BOT_USER_AGENT_RE.search(user_agent))
+
+
+def record_view(request, post):
+    if request.method == 'GET' and not is_bot(request):
+        views_buffer.add(post.pk)
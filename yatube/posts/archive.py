@@ -0,0 +1,107 @@
+"""Перенос старых постов и их комментариев в архивные таблицы.
+
+Горячие таблицы ``Post`` и ``Comment`` и их индексы остаются маленькими,
+а страницы, которым нужны старые записи, дочитывают их из архива.
+Хештеги и упоминания переносятся вместе с постом. Строки ``Like``
+удаляются: архивный пост нельзя лайкнуть, а число лайков остаётся
+в ``likes_count``.
+"""
+from django.db import transaction
+
+from . import stats
+from .models import (
+    ArchivedComment, ArchivedMention, ArchivedPost, ArchivedPostTag, Comment,
+    Mention, Post, PostTag,
+)
+from .moderation import CHUNK_SIZE, delete_post_rows, iter_id_chunks
+
+POST_FIELDS = ('id', 'text', 'text_html', 'text_excerpt', 'pub_date',
+               'author_id', 'group_id', 'image', 'likes_count',
+               'views_count')
+COMMENT_FIELDS = (
+    'id', 'text', 'pub_date', 'post_id', 'author_id', 'path', 'depth',
+    'reply_count',
+)
+# Строки, которые ссылаются на пост, и их архивные таблицы.
+RELATED_ROWS = (
+    (PostTag, ArchivedPostTag, ('post_id', 'tag_id', 'pub_date')),
+    (Mention, ArchivedMention, ('post_id', 'user_id', 'pub_date')),
+)
+
+
+def archive_posts(before, chunk_size=CHUNK_SIZE):
+    """Переносит посты старше ``before`` пачками.
+
+    Каждая пачка переносится в своей транзакции и удаляется из горячих
+    таблиц запросом на таблицу, без сигналов. Счётчики групп не
+    меняются: архивные посты по-прежнему в них учитываются.
+    """
+    done = 0
+    with stats.paused():
+        for chunk in iter_id_chunks(
+                Post.objects.filter(pub_date__lt=before), chunk_size):
+            with transaction.atomic():
+                ArchivedPost.objects.bulk_create(
+                    ArchivedPost(**row) for row in
+                    Post.objects.filter(pk__in=chunk).values(*POST_FIELDS)
+                )
+                ArchivedComment.objects.bulk_create(
+                    ArchivedComment(**row) for row in
+                    Comment.objects.filter(post_id__in=chunk)
+                    .values(*COMMENT_FIELDS)
+                )
+                for model, archived_model, fields in RELATED_ROWS:
+                    archived_model.objects.bulk_create(
+                        archived_model(**row) for row in
+                        model.objects.filter(post_id__in=chunk)
+                        .values(*fields)
+                    )
+                delete_post_rows(chunk)
+            done += len(chunk)
+            yield done
+
+
+def author_posts(author):
+    """Все посты автора: сначала свежие, затем архивные."""
+    return ChainedSequence(
+        Post.objects.by_author(author),
+        ArchivedPost.objects.by_author(author),
+    )
+
+
+class ChainedSequence:
+    """Несколько упорядоченных запросов как одна последовательность.
+
+    Подходит для ``Paginator``: срез читает из каждого запроса только
+    попавшую в него часть.
+    """
+    ordered = True
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.count()
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.count())
+        items = []
+        for queryset, size in zip(self.querysets, self.counts()):
+            if start < size and stop > 0:
+                items.extend(queryset[max(start, 0):min(stop, size)])
+            start -= size
+            stop -= size
+        return items
@@ -0,0 +1,22 @@
+from django.utils.functional import SimpleLazyObject
+
+from .follows import get_following
+from .unread import UnreadCount, count_unread
+
+
+def following(request):
+    """Подписки пользователя; загружаются, только если шаблон их использует."""
+    return {
+        'followed_authors': SimpleLazyObject(lambda: get_following(request)),
+    }
+
+
+def unread_posts(request):
+    """Непрочитанные посты ленты подписок, тоже лениво."""
+    def load():
+        if not request.user.is_authenticated:
+            return UnreadCount(0)
+        return count_unread(
+            request.user.pk, get_following(request).author_ids)
+
+    return {'unread_posts': SimpleLazyObject(load)}
@@ -0,0 +1,69 @@
+"""Кешированные данные страницы поста."""
+from core.caching import invalidate, read_through
+
+from .models import ArchivedPost, Post
+
+DETAIL_TIMEOUT = 300
+COMMENTS_PER_PAGE = 50
+# Сколько уровней ответов видно сразу; глубже — по ссылке
+# (``views.comment_replies``).
+COMMENT_THREAD_DEPTH = 3
+
+
+def _post_key(post_id):
+    return f'post_detail:{post_id}'
+
+
+def _author_key(author_id):
+    return f'author_posts_count:{author_id}'
+
+
+def get_post(post_id):
+    """Пост из горячей таблицы или из архива, иначе ``None``."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.select_related('group', 'author').filter(
+            pk=post_id).first()
+        if post is not None:
+            return post
+    return None
+
+
+def _build_post_payload(post_id):
+    post = get_post(post_id)
+    if post is None:
+        return None
+    comments = list(
+        post.comments.threads(COMMENT_THREAD_DEPTH)[:COMMENTS_PER_PAGE + 1])
+    tags = list(post.post_tags.order_by('tag__name').values_list(
+        'tag__name', flat=True))
+    return {
+        'post': post,
+        'tags': tags,
+        'comments': comments[:COMMENTS_PER_PAGE],
+        'has_more_comments': len(comments) > COMMENTS_PER_PAGE,
+    }
+
+
+def get_post_payload(post_id):
+    """Пост с автором и группой и первая страница комментариев."""
+    return read_through(
+        _post_key(post_id),
+        lambda: _build_post_payload(post_id),
+        DETAIL_TIMEOUT,
+    )
+
+
+def get_author_posts_count(author):
+    return read_through(
+        _author_key(author.pk),
+        lambda: author.posts.count() + author.archived_posts.count(),
+        DETAIL_TIMEOUT,
+    )
+
+
+def invalidate_post(post_id):
+    invalidate(_post_key(post_id))
+
+
+def invalidate_author(author_id):
+    invalidate(_author_key(author_id))
@@ -0,0 +1,59 @@
+"""Уведомления о новых постах для ленты через Server-Sent Events."""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from core.pubsub import get_broker
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'posts'
+
+
+def publish_post(post):
+    """Рассылает подписчикам готовую карточку нового поста."""
+    try:
+        html = render_to_string(
+            'posts/includes/article_card.html',
+            {'post': post, 'show_group_link': True},
+        )
+        get_broker(CHANNEL).publish({
+            'post_id': post.pk,
+            'author_id': post.author_id,
+            'group_id': post.group_id,
+            'html': html,
+        })
+    except Exception:
+        logger.exception('Не удалось опубликовать пост %s', post.pk)
+
+
+def format_event(event_id, data):
+    return f'id: {event_id}\nevent: post\ndata: {json.dumps(data)}\n\n'
+
+
+def stream_events(last_id, author_ids=None):
+    """Генератор ответа ``text/event-stream``.
+
+    Поток закрывается через ``SSE_STREAM_TIMEOUT`` секунд, после чего
+    браузер переподключается с заголовком ``Last-Event-ID``: так
+    соединение не занимает поток воркера бесконечно.
+    """
+    broker = get_broker(CHANNEL)
+    yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+    deadline = time.monotonic() + settings.SSE_STREAM_TIMEOUT
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = broker.wait(
+            last_id, min(remaining, settings.SSE_HEARTBEAT_INTERVAL))
+        if not events:
+            yield ': ping\n\n'
+            continue
+        for event_id, data in events:
+            last_id = event_id
+            if author_ids is None or data['author_id'] in author_ids:
+                yield format_event(event_id, data)
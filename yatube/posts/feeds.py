@@ -0,0 +1,179 @@
+"""Лента подписок через слияние лент авторов.
+
+Для каждого автора в кеше лежат ``(pub_date, pk)`` его последних
+``TIMELINE_SIZE`` постов, прочитанные по индексу ``(author, -pub_date,
+-id)``. Страница ленты получается k-путевым слиянием этих списков на
+куче, так что базе не нужно соединять посты с подписками и сортировать
+результат: из неё читаются только карточки постов страницы.
+
+Подходит читателям с умеренным числом подписок
+(``PULL_FEED_MAX_AUTHORS``): для остальных дешевле запрос с подзапросом.
+
+Ленты авторов, которых нет в кеше, читаются одним запросом с
+``ROW_NUMBER() OVER (PARTITION BY author_id ...)``. Новый пост сбрасывает
+ленту автора через общий кеш (``core.caching``), а короткий срок жизни
+ограничивает отставание, если лента была прочитана с отстающей реплики.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections
+
+from core.caching import invalidate, read_many
+
+from .models import Post
+
+TIMELINE_SIZE = 100
+TIMELINE_TIMEOUT = 60
+
+
+def _timeline_key(author_id):
+    return f'author_timeline:{author_id}'
+
+
+def _load_timeline(author_id, limit=None):
+    limit = limit or TIMELINE_SIZE
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk')
+    return list(posts.values_list('pub_date', 'pk')[:limit])
+
+
+def _supports_window_functions(connection):
+    # Django 2.2 не отмечает поддержку оконных функций в SQLite, хотя
+    # она есть начиная с 3.25.
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 25, 0)
+    return connection.features.supports_over_clause
+
+
+def _load_timelines(author_ids, limit=None):
+    """Последние ``limit`` записей каждого автора одним запросом."""
+    limit = limit or TIMELINE_SIZE
+    db = Post.objects.filter(author_id__in=author_ids).db
+    connection = connections[db]
+    if not _supports_window_functions(connection):
+        return {
+            author_id: _load_timeline(author_id, limit=limit)
+            for author_id in author_ids
+        }
+    # Каждый раздел читается по индексу (author, -pub_date, -id), а
+    # raw() приводит типы полей так же, как ORM.
+    rows = Post.objects.db_manager(db).raw(
+        'SELECT id, author_id, pub_date FROM ('
+        ' SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+        '  PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+        ' ) AS timeline_rank'
+        ' FROM {table} WHERE author_id IN ({ids})'
+        ') ranked WHERE timeline_rank <= %s'
+        ' ORDER BY author_id, timeline_rank'.format(
+            table=connection.ops.quote_name(Post._meta.db_table),
+            ids=', '.join(['%s'] * len(author_ids)),
+        ),
+        [*author_ids, limit],
+    )
+    timelines = {author_id: [] for author_id in author_ids}
+    for post in rows:
+        timelines[post.author_id].append((post.pub_date, post.pk))
+    return timelines
+
+
+def get_timelines(author_ids):
+    keys = {_timeline_key(author_id): author_id for author_id in author_ids}
+    values = read_many(
+        list(keys),
+        lambda missing: {
+            _timeline_key(author_id): timeline
+            for author_id, timeline in _load_timelines(
+                [keys[key] for key in missing]).items()
+        },
+        TIMELINE_TIMEOUT,
+    )
+    return {keys[key]: timeline for key, timeline in values.items()}
+
+
+def invalidate_timeline(author_id):
+    invalidate(_timeline_key(author_id))
+
+
+class MergedFeed:
+    """Лента авторов ``author_ids`` как последовательность для Paginator.
+
+    Поддерживает ``before(cursor)``, поэтому годится и для
+    ``get_cursor_page``. Срезы глубже ``TIMELINE_SIZE`` записей и
+    страницы после курсора, до которых кешированные ленты не достают,
+    отдаются обычному SQL-запросу.
+    """
+    ordered = True
+
+    def __init__(self, author_ids, cursor=None):
+        self.author_ids = list(author_ids)
+        self.cursor = cursor
+        self._count = None
+
+    def before(self, cursor):
+        return MergedFeed(self.author_ids, cursor)
+
+    def queryset(self):
+        posts = Post.objects.feed().filter(author_id__in=self.author_ids)
+        if self.cursor is not None:
+            posts = posts.before(self.cursor)
+        return posts
+
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset().count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if stop is None or stop > TIMELINE_SIZE:
+            return list(self.queryset()[index])
+        entries = self.merge(stop)
+        if entries is None:
+            return list(self.queryset()[index])
+        return self.load([pk for _, pk in entries[start:stop]])
+
+    def merge(self, size):
+        """Первые ``size`` записей ``(pub_date, pk)`` всех авторов.
+
+        ``None``, если после курсора кешированного списка какого-то
+        автора не хватает, чтобы ручаться за страницу: её тогда отдаёт
+        ``queryset()`` одним запросом, а не дочитывание по авторам.
+        """
+        streams = []
+        # Самая новая запись, которой может не оказаться в кеше.
+        horizon = None
+        for timeline in get_timelines(self.author_ids).values():
+            if self.cursor is not None:
+                stream = [entry for entry in timeline if entry < self.cursor]
+                truncated = (
+                    len(stream) < size and len(timeline) == TIMELINE_SIZE)
+                if truncated and (horizon is None or timeline[-1] > horizon):
+                    horizon = timeline[-1]
+                timeline = stream
+            streams.append(timeline)
+        entries = list(islice(heapq.merge(*streams, reverse=True), size))
+        if horizon is not None and (
+                len(entries) < size or entries[-1] < horizon):
+            return None
+        return entries
+
+    def load(self, pks):
+        # Фильтр по авторам отсекает ключи, которые уже принадлежат
+        # чужим постам, если кеш отстал от базы.
+        posts = Post.objects.cards().filter(
+            author_id__in=self.author_ids).in_bulk(pks)
+        return [posts[pk] for pk in pks if pk in posts]
+
+
+def feed_for(user, author_ids):
+    """Лента подписок: слияние для умеренного числа авторов, иначе SQL."""
+    if 0 < len(author_ids) <= settings.PULL_FEED_MAX_AUTHORS:
+        return MergedFeed(author_ids)
+    return Post.objects.feed_for(user)
@@ -0,0 +1,69 @@
+"""Множество авторов, на которых подписан пользователь.
+
+Идентификаторы авторов загружаются одним запросом, кешируются и
+запоминаются на время запроса, после чего проверка «подписан ли» —
+это проверка вхождения в множество. Кеш сбрасывается сигналами
+при любом изменении ``Follow``.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from .models import Follow
+
+CACHE_TIMEOUT = 60 * 60
+
+
+class FollowingSet:
+    def __init__(self, user_id, author_ids):
+        self.user_id = user_id
+        self.author_ids = author_ids
+
+    def __contains__(self, author_id):
+        return author_id in self.author_ids
+
+    def __iter__(self):
+        return iter(self.author_ids)
+
+    def __len__(self):
+        return len(self.author_ids)
+
+    @property
+    def cache_key(self):
+        """Часть ключа фрагментного кеша, зависящая от подписок.
+
+        Зависит только от набора авторов, поэтому читатели с одинаковыми
+        подписками получают один и тот же фрагмент.
+        """
+        return hashlib.md5(
+            ','.join(map(str, sorted(self.author_ids))).encode()
+        ).hexdigest()
+
+
+def _cache_key(user_id):
+    return f'following:{user_id}'
+
+
+def load_following(user):
+    if not user.is_authenticated:
+        return FollowingSet(None, frozenset())
+    key = _cache_key(user.pk)
+    author_ids = cache.get(key)
+    if author_ids is None:
+        author_ids = frozenset(
+            Follow.objects.filter(user_id=user.pk)
+            .values_list('author_id', flat=True)
+        )
+        cache.set(key, author_ids, CACHE_TIMEOUT)
+    return FollowingSet(user.pk, author_ids)
+
+
+def get_following(request):
+    """Подписки текущего пользователя, один раз за запрос."""
+    if not hasattr(request, '_following'):
+        request._following = load_following(request.user)
+    return request._following
+
+
+def invalidate_following(user_id):
+    cache.delete(_cache_key(user_id))
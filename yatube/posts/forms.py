@@ -1,5 +1,6 @@
 from django import forms
 
+from .images import check_image_header, schedule_image_processing
 from .models import Comment, Post
 
 
@@ -14,6 +15,25 @@ class PostForm(forms.ModelForm):
             raise forms.ValidationError('Не заполнено поле с текстом')
         return data
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image and 'image' in self.changed_data:
+            check_image_header(image)
+        return image
+
+    def save(self, commit=True):
+        process_image = bool(
+            self.instance.image and 'image' in self.changed_data)
+        if process_image and self.instance.pk is None:
+            # Новый пост объявит задача обработки картинки: иначе
+            # карточка для ленты строила бы превью из исходника.
+            self.instance.publish_after_processing = True
+        post = super().save(commit=commit)
+        if commit and process_image:
+            schedule_image_processing(
+                post, publish=getattr(post, 'publish_after_processing', False))
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
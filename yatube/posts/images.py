@@ -0,0 +1,141 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import get_thumbnail
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+OUTPUT_EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg'}
+
+
+def check_image_header(file):
+    """Проверяет размер, формат и разрешение загрузки.
+
+    Читается только заголовок файла: пиксели не декодируются.
+    """
+    if file.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл слишком большой: не больше %(limit)d МБ',
+            params={'limit': settings.POST_IMAGE_MAX_UPLOAD_SIZE // 2 ** 20},
+        )
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Не удалось распознать картинку')
+    finally:
+        file.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError('Неподдерживаемый формат картинки')
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError('Слишком большое разрешение картинки')
+
+
+def get_output_format():
+    """WebP, если Pillow собран с его поддержкой, иначе JPEG."""
+    if features.check('webp'):
+        return 'WEBP'
+    return 'JPEG'
+
+
+def needs_processing(image):
+    if getattr(image, 'is_animated', False):
+        return False
+    return (
+        image.format != get_output_format()
+        or max(image.size) > settings.POST_IMAGE_MAX_DIMENSION
+        or bool(image.getexif())
+    )
+
+
+def normalize_image(source):
+    """Уменьшает картинку, убирает EXIF и перекодирует её.
+
+    Возвращает кортеж (содержимое, расширение) или None,
+    если картинка уже нормализована.
+    """
+    max_dimension = settings.POST_IMAGE_MAX_DIMENSION
+    with Image.open(source) as image:
+        if not needs_processing(image):
+            return None
+        image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        output_format = get_output_format()
+        has_alpha = (
+            image.mode in ('RGBA', 'LA')
+            or 'transparency' in image.info
+        )
+        if not has_alpha:
+            image = image.convert('RGB')
+        elif output_format == 'WEBP':
+            image = image.convert('RGBA')
+        else:
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+
+        buffer = BytesIO()
+        image.save(
+            buffer,
+            output_format,
+            quality=settings.POST_IMAGE_QUALITY,
+            optimize=True,
+        )
+    return ContentFile(buffer.getvalue()), OUTPUT_EXTENSIONS[output_format]
+
+
+def warm_thumbnails(image):
+    """Заранее строит превью, которые используют шаблоны."""
+    for geometry, options in settings.POST_IMAGE_THUMBNAILS:
+        get_thumbnail(image, geometry, **options)
+
+
+def process_post_image(post_id, publish=False):
+    """Нормализует картинку поста и строит превью.
+
+    С ``publish`` затем рассылает карточку нового поста: превью к этому
+    времени уже построено из обработанной картинки.
+    """
+    from .detail import invalidate_post
+    from .events import publish_post
+    from .models import Post
+
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    with post.image.open('rb') as source:
+        result = normalize_image(source)
+    if result is not None:
+        content, extension = result
+        old_name = post.image.name
+        stem = os.path.splitext(os.path.basename(old_name))[0]
+        post.image.save(stem + extension, content, save=False)
+        # Исходный файл может быть нужен другим постам: его удалит
+        # collect_media_garbage, когда на него не останется ссылок.
+        updated = Post.objects.filter(pk=post_id, image=old_name).update(
+            image=post.image.name)
+        if not updated:
+            return
+        invalidate_post(post_id)
+    warm_thumbnails(post.image)
+    if publish:
+        post = Post.objects.select_related('author', 'group').filter(
+            pk=post_id).first()
+        if post is not None:
+            publish_post(post)
+
+
+def schedule_image_processing(post, publish=False):
+    """Ставит обработку картинки поста в очередь фоновых задач."""
+    from .tasks import process_post_image as process_task
+
+    process_task.enqueue(
+        (post.pk, publish),
+        idempotency_key=f'post-image:{post.pk}:{post.image.name}')
@@ -0,0 +1,93 @@
+"""Лайки постов.
+
+Строка ``Like`` на пару (пользователь, пост) делает повторный лайк
+безвредным, а ``Post.likes_count`` обновляется через буфер
+``core.counters``, поэтому карточке не нужен ``COUNT(*)``. Какие из
+постов страницы лайкнул читатель, узнаётся одним запросом на страницу.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from core.counters import CounterBuffer
+
+from .detail import invalidate_post
+from .models import Like, Post
+
+LIKED_TIMEOUT = 300
+
+
+def _invalidate_posts(deltas):
+    for post_id, _ in deltas:
+        invalidate_post(post_id)
+
+
+likes_buffer = CounterBuffer(Post, 'likes_count', _invalidate_posts)
+
+
+def _version_key(user_id):
+    return f'likes_version:{user_id}'
+
+
+def _changed(user_id, post_id, delta):
+    cache.add(_version_key(user_id), 0, None)
+    cache.incr(_version_key(user_id))
+    transaction.on_commit(lambda: likes_buffer.add(post_id, delta))
+
+
+def like(user, post):
+    """Ставит лайк, возвращает ``False``, если он уже стоял."""
+    try:
+        with transaction.atomic():
+            Like.objects.create(user=user, post=post)
+    except IntegrityError:
+        return False
+    _changed(user.pk, post.pk, 1)
+    return True
+
+
+def unlike(user, post):
+    deleted, _ = Like.objects.filter(user=user, post=post).delete()
+    if deleted:
+        _changed(user.pk, post.pk, -1)
+    return bool(deleted)
+
+
+def liked_ids(user, post_ids):
+    if not user.is_authenticated or not post_ids:
+        return frozenset()
+    return frozenset(Like.objects.filter(
+        user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+
+
+class LikedSet:
+    """Лайки читателя среди постов страницы; загружаются при первой
+    проверке, после того как шаблон уже прочитал посты."""
+
+    def __init__(self, user, posts):
+        self.user = user
+        self.posts = posts
+        self._ids = None
+
+    def __contains__(self, post_id):
+        if self._ids is None:
+            self._ids = self.load()
+        return post_id in self._ids
+
+    def load(self):
+        post_ids = [post.pk for post in self.posts]
+        if not self.user.is_authenticated or not post_ids:
+            return frozenset()
+        # Версия в ключе сбрасывает кеш при каждом лайке читателя.
+        key = 'liked:{}:{}'.format(self._version, hashlib.md5(
+            repr(post_ids).encode()).hexdigest())
+        ids = cache.get(key)
+        if ids is None:
+            ids = liked_ids(self.user, post_ids)
+            cache.set(key, ids, LIKED_TIMEOUT)
+        return ids
+
+    @property
+    def _version(self):
+        return f'{self.user.pk}.{cache.get(_version_key(self.user.pk), 0)}'
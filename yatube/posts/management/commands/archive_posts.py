@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.moderation import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше заданного срока вместе с комментариями '
+            'в архивные таблицы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POST_ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пачками в секундах, чтобы не мешать сайту.',
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        done = 0
+        for done in archive_posts(before, options['chunk_size']):
+            self.stdout.write(f'Перенесено постов: {done}')
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Архивировано постов: {done}'))
@@ -0,0 +1,66 @@
+import os
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов, на которые не осталось ссылок, '
+            'вместе с их превью.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=3600,
+            help='Не трогать файлы моложе стольких секунд: их пост '
+                 'может быть ещё не сохранён.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+
+    def reference_counts(self):
+        references = Counter()
+        for model in (Post, ArchivedPost):
+            references.update(dict(
+                model.objects.exclude(image='')
+                .values_list('image')
+                .annotate(refs=Count('pk'))
+                .order_by()
+            ))
+        return references
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        root = storage.path(field.upload_to)
+        if not os.path.isdir(root):
+            return
+
+        references = self.reference_counts()
+        deadline = time.time() - options['grace']
+        removed = 0
+        for directory, _, filenames in os.walk(root, topdown=False):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(
+                    os.sep, '/')
+                if references.get(name) or os.path.getmtime(path) > deadline:
+                    continue
+                removed += 1
+                if options['dry_run']:
+                    self.stdout.write(name)
+                    continue
+                delete_thumbnails(ImageFile(name, storage), delete_file=False)
+                storage.delete(name)
+            if directory != root and not os.listdir(directory):
+                os.rmdir(directory)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов без ссылок: {removed}'))
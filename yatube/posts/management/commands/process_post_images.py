@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.images import process_post_image
+from posts.models import Post
+
+
+def _process(post_id):
+    try:
+        process_post_image(post_id)
+        return post_id, None
+    except Exception as error:
+        return post_id, error
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет уже загруженные картинки постов через обработку: '
+            'уменьшение, удаление EXIF, перекодирование и построение превью.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Сколько картинок обрабатывать параллельно.',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = (
+            Post.objects.exclude(image='')
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for post_id, error in executor.map(
+                    _process, post_ids.iterator()):
+                if error is None:
+                    processed += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f'Пост {post_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {processed}, с ошибками: {failed}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики групп с нуля. Нужна после массовых '
+            'вставок в обход сигналов, например bulk_create.')
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        self.stdout.write(self.style.SUCCESS('Счётчики групп пересчитаны'))
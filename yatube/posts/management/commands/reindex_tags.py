@@ -0,0 +1,67 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.moderation import CHUNK_SIZE, iter_id_chunks
+from posts.tags import index_posts
+from posts.text import extract_rows
+
+
+class Command(BaseCommand):
+    help = ('Заново разбирает хештеги и упоминания во всех постах. '
+            'Текст разбирается пачками в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Размер пула процессов. 0 — разбирать в этом процессе.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        done = 0
+        chunks = self.chunks(options['chunk_size'])
+        if options['workers'] == 0:
+            for rows, pub_dates in chunks:
+                done += self.save(extract_rows(rows), pub_dates)
+        else:
+            done = self.run_in_pool(chunks, options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {done}'))
+
+    def chunks(self, chunk_size):
+        for chunk in iter_id_chunks(Post.objects.all(), chunk_size):
+            rows = list(Post.objects.filter(pk__in=chunk).values_list(
+                'pk', 'text', 'pub_date'))
+            yield (
+                [(pk, text) for pk, text, _ in rows],
+                {pk: pub_date for pk, _, pub_date in rows},
+            )
+
+    def save(self, extracted, pub_dates):
+        index_posts([
+            (pk, pub_dates[pk], tags, mentions)
+            for pk, tags, mentions in extracted
+        ])
+        return len(extracted)
+
+    def run_in_pool(self, chunks, workers):
+        # Как в render_post_bodies: процессы только разбирают текст,
+        # в базу пишет этот процесс, в работе до двух пачек на процесс.
+        done = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            pending = deque()
+            for rows, pub_dates in chunks:
+                pending.append((pool.submit(extract_rows, rows), pub_dates))
+                if len(pending) >= workers * 2:
+                    future, pub_dates = pending.popleft()
+                    done += self.save(future.result(), pub_dates)
+            while pending:
+                future, pub_dates = pending.popleft()
+                done += self.save(future.result(), pub_dates)
+        return done
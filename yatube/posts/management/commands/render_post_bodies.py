@@ -0,0 +1,72 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.moderation import CHUNK_SIZE, iter_id_chunks
+from posts.text import render_rows
+
+
+class Command(BaseCommand):
+    help = ('Заполняет готовый HTML и начало текста у постов, сохранённых '
+            'до их появления. Пачки рендерятся в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Размер пула процессов. 0 — рендерить в этом процессе.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерендерить все посты, а не только незаполненные.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Post, ArchivedPost):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.filter(text_html='')
+            total += self.backfill(model, queryset, options)
+        self.stdout.write(self.style.SUCCESS(f'Обновлено постов: {total}'))
+
+    def chunks(self, model, queryset, chunk_size):
+        for chunk in iter_id_chunks(queryset, chunk_size):
+            yield list(
+                model.objects.filter(pk__in=chunk).values_list('pk', 'text'))
+
+    def save(self, model, rendered):
+        model.objects.bulk_update(
+            [
+                model(pk=pk, text_html=text_html, text_excerpt=text_excerpt)
+                for pk, text_html, text_excerpt in rendered
+            ],
+            ['text_html', 'text_excerpt'],
+        )
+        return len(rendered)
+
+    def backfill(self, model, queryset, options):
+        chunks = self.chunks(model, queryset, options['chunk_size'])
+        done = 0
+        if options['workers'] == 0:
+            for rows in chunks:
+                done += self.save(model, render_rows(rows))
+            return done
+        # Дочерние процессы только рендерят текст, а записывает в базу
+        # этот процесс, поэтому им не нужны ни Django, ни соединения.
+        # В работе держится не больше двух пачек на процесс.
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            pending = deque()
+            for rows in chunks:
+                pending.append(pool.submit(render_rows, rows))
+                if len(pending) >= options['workers'] * 2:
+                    done += self.save(model, pending.popleft().result())
+            while pending:
+                done += self.save(model, pending.popleft().result())
+        return done
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_group_stats(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    posts = Post.objects.exclude(group=None).order_by()
+    GroupStats.objects.bulk_create(
+        GroupStats(group_id=row['group'], post_count=row['count'],
+                   last_pub_date=row['last'])
+        for row in posts.values('group').annotate(
+            count=Count('pk'), last=Max('pub_date'))
+    )
+    GroupAuthorStats.objects.bulk_create(
+        GroupAuthorStats(group_id=row['group'], author_id=row['author'],
+                         post_count=row['count'])
+        for row in posts.values('group', 'author').annotate(
+            count=Count('pk'))
+    )
+    for group_stats in GroupStats.objects.all():
+        names = (
+            GroupAuthorStats.objects.filter(group_id=group_stats.pk)
+            .order_by('-post_count', 'author_id')
+            .values_list('author__username', flat=True)[:3]
+        )
+        group_stats.top_authors = ','.join(names)
+        group_stats.save(update_fields=['top_authors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupAuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='постов')),
+                ('last_pub_date', models.DateTimeField(blank=True, null=True, verbose_name='последняя публикация')),
+                ('top_authors', models.TextField(blank=True, help_text='Имена пользователей через запятую', verbose_name='самые активные авторы')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='posts_post_group_i_1fdac4_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupauthorstats',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_stats', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='groupauthorstats',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group'),
+        ),
+        migrations.AddIndex(
+            model_name='groupauthorstats',
+            index=models.Index(fields=['group', '-post_count'], name='posts_group_group_i_777893_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='groupauthorstats',
+            unique_together={('group', 'author')},
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_rendered_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='posts_post_pub_dat_d3c0cd_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='posts_post_author__075f1d_idx'),
+        ),
+    ]
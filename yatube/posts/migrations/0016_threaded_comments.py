@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits = DIGITS[digit] + digits
+    return digits.rjust(8, '0')
+
+
+def fill_paths(apps, schema_editor):
+    # Существующие комментарии плоские: каждый становится корнем ветки.
+    for name in ('Comment', 'ArchivedComment'):
+        model = apps.get_model('posts', name)
+        for pk in model.objects.values_list('pk', flat=True).iterator():
+            model.objects.filter(pk=pk).update(path=path_segment(pk))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'path'], name='posts_archi_post_id_54df62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='views_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='просмотров'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='просмотров'),
+        ),
+        migrations.CreateModel(
+            name='PostViewDaily',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField(verbose_name='пост')),
+                ('date', models.DateField(verbose_name='день')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='просмотров')),
+            ],
+            options={
+                'ordering': ['-date', '-views'],
+                'unique_together': {('date', 'post_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def usernames_to_ids(apps, schema_editor):
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    for group_stats in GroupStats.objects.all():
+        author_ids = (
+            GroupAuthorStats.objects
+            .filter(group_id=group_stats.pk, post_count__gt=0)
+            .order_by('-post_count', 'author_id')
+            .values_list('author_id', flat=True)[:3]
+        )
+        group_stats.top_authors = ','.join(map(str, author_ids))
+        group_stats.save(update_fields=['top_authors'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_tags_and_mentions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='groupstats',
+            name='top_authors',
+            field=models.TextField(blank=True, help_text='id пользователей через запятую', verbose_name='самые активные авторы'),
+        ),
+        migrations.RunPython(usernames_to_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from posts.text import render
+
+CHUNK_SIZE = 500
+
+
+def backfill(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        rows = model.objects.filter(text_excerpt='').exclude(
+            text='').order_by('pk').values_list('pk', 'text')
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            objs = []
+            for pk, text in chunk:
+                text_html, text_excerpt = render(text)
+                objs.append(model(
+                    pk=pk, text_html=text_html, text_excerpt=text_excerpt))
+            model.objects.bulk_update(objs, ['text_html', 'text_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_group_stats_author_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
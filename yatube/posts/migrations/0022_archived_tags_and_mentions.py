@@ -0,0 +1,85 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from posts.text import extract_mentions, extract_tags
+
+CHUNK_SIZE = 500
+
+
+def index_archived_posts(apps, schema_editor):
+    # Прежняя архивация удаляла теги и упоминания постов: разбираем
+    # их заново из текста архивных постов.
+    ArchivedPost = apps.get_model('posts', 'ArchivedPost')
+    ArchivedPostTag = apps.get_model('posts', 'ArchivedPostTag')
+    ArchivedMention = apps.get_model('posts', 'ArchivedMention')
+    Tag = apps.get_model('posts', 'Tag')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    rows = ArchivedPost.objects.order_by('pk').values_list(
+        'pk', 'text', 'pub_date')
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        tags = {pk: extract_tags(text) for pk, text, _ in chunk}
+        mentions = {pk: extract_mentions(text) for pk, text, _ in chunk}
+        names = {name for names in tags.values() for name in names}
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list(
+            'name', 'pk'))
+        user_ids = dict(User.objects.filter(username__in={
+            username for usernames in mentions.values()
+            for username in usernames
+        }).values_list('username', 'pk'))
+        ArchivedPostTag.objects.bulk_create([
+            ArchivedPostTag(post_id=pk, tag_id=tag_ids[name],
+                            pub_date=pub_date)
+            for pk, _, pub_date in chunk for name in tags[pk]
+        ], ignore_conflicts=True)
+        ArchivedMention.objects.bulk_create([
+            ArchivedMention(post_id=pk, user_id=user_ids[username],
+                            pub_date=pub_date)
+            for pk, _, pub_date in chunk for username in mentions[pk]
+            if username in user_ids
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0021_backfill_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.ArchivedPost')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_post_tags', to='posts.Tag')),
+            ],
+            options={
+                'unique_together': {('post', 'tag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedMention',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.ArchivedPost')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('post', 'user')},
+            },
+        ),
+        migrations.RunPython(index_archived_posts, migrations.RunPython.noop),
+    ]
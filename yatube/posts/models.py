@@ -1,7 +1,11 @@
 from core.models import PubDateModel
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.base import DEFERRED
+from django.utils.safestring import mark_safe
+
+from .text import render
 
 User = get_user_model()
 
@@ -15,7 +19,90 @@ class Group(models.Model):
         return self.title
 
 
-class Post(PubDateModel):
+class PostQuerySet(models.QuerySet):
+    # Поля, которые нужны карточке в ленте. Полный текст и остальные
+    # колонки автора (включая хеш пароля) не читаются.
+    CARD_FIELDS = (
+        'id', 'pub_date', 'image', 'text_excerpt', 'author_id', 'group_id',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__title', 'group__slug', 'likes_count',
+    )
+
+    def cards(self):
+        return self.select_related('author', 'group').only(*self.CARD_FIELDS)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не вызывает save(), а карточкам нужно готовое
+        # начало текста: без него они догружали бы text по одной.
+        objs = list(objs)
+        for obj in objs:
+            if not obj.text_excerpt and obj.text:
+                obj.text_html, obj.text_excerpt = render(obj.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def feed(self):
+        """Карточки от новых к старым; ``pk`` делает порядок однозначным."""
+        return self.cards().order_by('-pub_date', '-pk')
+
+    def for_index(self):
+        return self.feed()
+
+    def for_group(self, group):
+        return self.feed().filter(group=group)
+
+    def by_author(self, author):
+        return self.feed().filter(author=author)
+
+    def feed_for(self, user):
+        """Посты авторов, на которых подписан ``user``.
+
+        Подзапрос вместо JOIN с подписками: повторная подписка на
+        автора не задвоит его посты.
+        """
+        return self.feed().filter(author__in=Follow.objects.filter(
+            user=user).values('author'))
+
+    def before(self, cursor):
+        """Записи после курсора ``(pub_date, pk)`` в порядке ``feed()``."""
+        pub_date, pk = cursor
+        return self.filter(
+            models.Q(pub_date__lt=pub_date)
+            | models.Q(pub_date=pub_date, pk__lt=pk))
+
+
+class RenderedTextModel(models.Model):
+    """Абстрактная модель. Хранит готовый HTML текста и его начало."""
+    text_html = models.TextField(editable=False, blank=True)
+    text_excerpt = models.TextField(editable=False, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.text_html, self.text_excerpt = render(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'text_html', 'text_excerpt'}
+        super().save(*args, **kwargs)
+
+    @property
+    def body(self):
+        if not self.text_html and self.text:
+            self.text_html = render(self.text)[0]
+        return mark_safe(self.text_html)
+
+    @property
+    def excerpt(self):
+        # В карточках text отложен: догружать его ради одной карточки —
+        # это запрос на каждую, поэтому начало считается, только если
+        # текст уже прочитан.
+        if not self.text_excerpt and self.__dict__.get('text'):
+            self.text_excerpt = render(self.text)[1]
+        return self.text_excerpt
+
+
+class Post(RenderedTextModel, PubDateModel):
     text = models.TextField('текст', help_text='Текст поста')
     author = models.ForeignKey(
         User,
@@ -36,15 +123,95 @@ class Post(PubDateModel):
         upload_to='posts/',
         blank=True,
     )
+    likes_count = models.IntegerField('лайков', default=0, editable=False)
+    views_count = models.IntegerField(
+        'просмотров', default=0, editable=False)
+
+    # Счётчики пишет core.counters; save() их не перезаписывает.
+    COUNTER_FIELDS = ('likes_count', 'views_count')
+    is_archived = False
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['group', '-pub_date']),
+            models.Index(fields=['-pub_date', '-id']),
+            models.Index(fields=['author', '-pub_date', '-id']),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = {*self.COUNTER_FIELDS, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Нужны сигналам, чтобы заметить перенос поста в другую группу
+        # или смену автора.
+        instance._loaded_group_id = instance.__dict__.get(
+            'group_id', DEFERRED)
+        instance._loaded_author_id = instance.__dict__.get(
+            'author_id', DEFERRED)
+        return instance
+
+
+class CommentQuerySet(models.QuerySet):
+    def threads(self, max_depth=None):
+        """Комментарии в порядке ветки: ответы идут сразу за родителем."""
+        comments = self.select_related('author').order_by('path')
+        if max_depth is not None:
+            comments = comments.filter(depth__lte=max_depth)
+        return comments
+
+    def subtree(self, comment, depth):
+        """Ответы на ``comment`` не глубже ``depth`` уровней под ним.
+
+        Ветка занимает непрерывный диапазон путей, поэтому это один
+        диапазонный запрос по индексу ``(post, path)``.
+        """
+        return self.filter(
+            post_id=comment.post_id,
+            path__gt=comment.path,
+            path__lt=comment.path + PATH_END,
+        ).threads(comment.depth + depth)
+
+
+# Путь комментария — идентификаторы предков и его собственный в base36
+# фиксированной ширины, поэтому сортировка по пути даёт порядок ветки.
+PATH_SEGMENT = 8
+PATH_END = '~'
+COMMENT_MAX_DEPTH = 30
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, digit = divmod(pk, 36)
+        digits = '0123456789abcdefghijklmnopqrstuvwxyz'[digit] + digits
+    return digits.rjust(PATH_SEGMENT, '0')
+
 
-class Comment(PubDateModel):
+class ThreadedCommentModel(models.Model):
+    """Абстрактная модель. Место комментария в ветке ответов."""
+    path = models.CharField(max_length=255, editable=False, blank=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class Comment(ThreadedCommentModel, PubDateModel):
     text = models.TextField('Текст', help_text='Текст комментария')
     post = models.ForeignKey(
         Post,
@@ -58,6 +225,40 @@ class Comment(PubDateModel):
         on_delete=models.CASCADE,
         related_name='comments',
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='replies',
+        verbose_name='ответ на',
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        parent = self.parent
+        # Слишком глубокие ответы прикрепляются к предку на пределе.
+        while parent is not None and parent.depth >= COMMENT_MAX_DEPTH:
+            parent = parent.parent
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Путь зависит от pk, который известен только после вставки.
+            self.path = (parent.path if parent is not None else '') + (
+                path_segment(self.pk))
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if parent is not None:
+                Comment.objects.filter(pk=parent.pk).update(
+                    reply_count=models.F('reply_count') + 1)
 
 
 class Follow(models.Model):
@@ -73,3 +274,236 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+
+
+class FeedCursor(models.Model):
+    """До какого поста пользователь дочитал ленту подписок."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_cursor',
+    )
+    seen_until = models.DateTimeField('просмотрено до')
+
+
+class Tag(models.Model):
+    name = models.CharField('название', max_length=64, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Хештег поста. Дата поста продублирована, чтобы лента тега читалась
+    по индексу ``(tag, -pub_date)`` без соединения с постами."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'tag')
+        indexes = [
+            models.Index(fields=['tag', '-pub_date', '-post']),
+        ]
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'user')
+        indexes = [
+            models.Index(fields=['user', '-pub_date']),
+        ]
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes',
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'post')
+
+
+class PostViewDaily(models.Model):
+    """Просмотры поста за день для отчётов.
+
+    ``post_id`` — просто число, чтобы история переживала архивацию поста.
+    """
+    post_id = models.IntegerField('пост')
+    date = models.DateField('день')
+    views = models.PositiveIntegerField('просмотров', default=0)
+
+    class Meta:
+        unique_together = ('date', 'post_id')
+        ordering = ['-date', '-views']
+
+
+class GroupStats(models.Model):
+    """Счётчики группы, которые обновляются при сохранении постов."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    post_count = models.PositiveIntegerField('постов', default=0)
+    last_pub_date = models.DateTimeField(
+        'последняя публикация', null=True, blank=True)
+    top_authors = models.TextField(
+        'самые активные авторы',
+        blank=True,
+        help_text='id пользователей через запятую',
+    )
+
+    def top_author_ids(self):
+        return [int(pk) for pk in self.top_authors.split(',') if pk]
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('group', 'author')
+        indexes = [
+            models.Index(fields=['group', '-post_count']),
+        ]
+
+
+class ArchivedPost(RenderedTextModel):
+    """Старый пост, перенесённый из ``Post`` командой ``archive_posts``.
+
+    Первичный ключ сохраняется, поэтому ссылки на пост не меняются.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('текст')
+    pub_date = models.DateTimeField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    likes_count = models.IntegerField('лайков', default=0, editable=False)
+    views_count = models.IntegerField(
+        'просмотров', default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['author', '-pub_date']),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedPostTag(models.Model):
+    """Хештег архивного поста, перенесённый из ``PostTag``."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='archived_post_tags',
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'tag')
+
+
+class ArchivedMention(models.Model):
+    """Упоминание в архивном посте, перенесённое из ``Mention``."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_mentions',
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('post', 'user')
+
+
+class ArchivedComment(ThreadedCommentModel):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст')
+    pub_date = models.DateTimeField()
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['pub_date']
+        indexes = [
+            models.Index(fields=['post', 'path']),
+        ]
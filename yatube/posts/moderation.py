@@ -0,0 +1,138 @@
+"""Массовые операции модерации.
+
+Записи обрабатываются пачками по первичному ключу: в память попадают только
+идентификаторы одной пачки, а изменения выполняются одним запросом на пачку.
+Каждая операция — генератор, который после каждой пачки отдаёт число
+обработанных записей.
+
+Удаление идёт мимо ``QuerySet.delete()``: у ``Post`` и ``Comment`` есть
+обработчики ``post_delete``, из-за которых Django удалял бы строки по
+одной и отправлял сигнал на каждую. Вместо этого зависимые таблицы и
+сами строки удаляются одним ``DELETE`` на пачку, а кеши и счётчики
+обновляются один раз после него.
+"""
+from collections import Counter
+
+from django.db import models, transaction
+
+from . import stats
+from .detail import invalidate_author, invalidate_post
+from .feeds import invalidate_timeline
+from .models import PATH_END, Comment, Post
+
+CHUNK_SIZE = 500
+
+
+def iter_id_chunks(queryset, chunk_size=CHUNK_SIZE):
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        chunk_qs = queryset if last_pk is None else queryset.filter(
+            pk__gt=last_pk)
+        chunk = list(chunk_qs[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def _raw_delete(queryset):
+    """``DELETE`` одним запросом, без сигналов и каскада Django."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_post_rows(post_ids):
+    """Удаляет посты вместе со строками, которые на них ссылаются.
+
+    Ссылающиеся таблицы (комментарии, лайки, теги, упоминания) — листья:
+    на них самих ссылаются только ответы из той же таблицы, которые
+    удаляются тем же запросом.
+    """
+    author_ids = set(Post.objects.filter(pk__in=post_ids).values_list(
+        'author_id', flat=True).distinct())
+    for relation in Post._meta.related_objects:
+        if relation.on_delete is models.CASCADE:
+            _raw_delete(relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': post_ids}))
+    _raw_delete(Post.objects.filter(pk__in=post_ids))
+    for post_id in post_ids:
+        invalidate_post(post_id)
+    for author_id in author_ids:
+        invalidate_author(author_id)
+        invalidate_timeline(author_id)
+
+
+def _delete_comment_rows(comment_ids):
+    """Удаляет комментарии вместе с ветками ответов под ними.
+
+    Возвращает число удалённых комментариев.
+    """
+    roots = Comment.objects.filter(pk__in=comment_ids).values_list(
+        'post_id', 'path')
+    if not roots:
+        return 0
+    subtree = models.Q()
+    for post_id, path in roots:
+        if not path:
+            continue
+        subtree |= models.Q(
+            post_id=post_id, path__gte=path, path__lt=path + PATH_END)
+    rows = list(Comment.objects.filter(
+        subtree | models.Q(pk__in=comment_ids),
+    ).values_list('pk', 'post_id', 'parent_id'))
+    deleted = {pk for pk, _, _ in rows}
+    # Уцелевшим родителям нужно уменьшить число ответов.
+    replies = Counter(
+        parent_id for _, _, parent_id in rows
+        if parent_id is not None and parent_id not in deleted
+    )
+    _raw_delete(Comment.objects.filter(pk__in=deleted))
+    if replies:
+        Comment.objects.filter(pk__in=replies).update(
+            reply_count=models.Case(
+                *[models.When(pk=pk, then=models.F('reply_count') - count)
+                  for pk, count in replies.items()],
+                output_field=models.IntegerField(),
+            ))
+    for post_id in {post_id for _, post_id, _ in rows}:
+        invalidate_post(post_id)
+    return len(deleted)
+
+
+def reassign_group(posts, group, chunk_size=CHUNK_SIZE):
+    group_ids = set(
+        posts.order_by().values_list('group_id', flat=True).distinct())
+    group_ids.add(group.pk if group else None)
+    done = 0
+    for chunk in iter_id_chunks(posts, chunk_size):
+        done += Post.objects.filter(pk__in=chunk).update(group=group)
+        for post_id in chunk:
+            invalidate_post(post_id)
+        yield done
+    stats.recount(group_ids)
+
+
+def delete_posts(posts, chunk_size=CHUNK_SIZE):
+    group_ids = set(
+        posts.order_by().values_list('group_id', flat=True).distinct())
+    done = 0
+    with stats.paused():
+        for chunk in iter_id_chunks(posts, chunk_size):
+            with transaction.atomic():
+                delete_post_rows(chunk)
+            done += len(chunk)
+            yield done
+    stats.recount(group_ids)
+
+
+def delete_posts_by_authors(author_ids, chunk_size=CHUNK_SIZE):
+    return delete_posts(
+        Post.objects.filter(author_id__in=author_ids), chunk_size)
+
+
+def delete_comments(comments, chunk_size=CHUNK_SIZE):
+    done = 0
+    for chunk in iter_id_chunks(comments, chunk_size):
+        with transaction.atomic():
+            done += _delete_comment_rows(chunk)
+        yield done
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.base import DEFERRED
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import stats
+from .detail import invalidate_author, invalidate_post
+from .events import publish_post
+from .feeds import invalidate_timeline
+from .follows import invalidate_following
+from .models import Comment, Follow, Post
+from .tags import index_post, mentions_added
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if DEFERRED in (getattr(instance, '_loaded_group_id', DEFERRED),
+                    getattr(instance, '_loaded_author_id', DEFERRED)):
+        instance._loaded_group_id, instance._loaded_author_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'author_id')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats_on_save(sender, instance, created, raw, **kwargs):
+    if raw or stats.is_paused():
+        return
+    if created:
+        old = (None, None)
+    else:
+        old = (instance._loaded_group_id, instance._loaded_author_id)
+    new = (instance.group_id, instance.author_id)
+    if old != new:
+        if old[0] is not None:
+            stats.post_removed(*old)
+        if new[0] is not None:
+            stats.post_added(*new, instance.pub_date)
+    instance._loaded_group_id, instance._loaded_author_id = new
+
+
+@receiver(post_delete, sender=Post)
+def update_group_stats_on_delete(sender, instance, **kwargs):
+    if instance.group_id is not None and not stats.is_paused():
+        stats.post_removed(instance.group_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_following_cache(sender, instance, **kwargs):
+    invalidate_following(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def announce_new_post(sender, instance, created, raw, **kwargs):
+    # Пост с новой картинкой объявляет задача её обработки.
+    publish_later = getattr(instance, 'publish_after_processing', False)
+    if created and not raw and not publish_later:
+        transaction.on_commit(lambda: publish_post(instance))
+
+
+@receiver(post_save, sender=Post)
+def index_post_tags(sender, instance, raw, update_fields, **kwargs):
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    added = index_post(instance)
+    if added:
+        mentions_added.send(sender=Post, post=instance,
+                            user_ids=[user_id for _, user_id in added])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_detail_cache(sender, instance, **kwargs):
+    invalidate_post(instance.pk)
+    if kwargs.get('created', True):
+        invalidate_author(instance.author_id)
+        invalidate_timeline(instance.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_reply_count(sender, instance, **kwargs):
+    if instance.parent_id is not None:
+        Comment.objects.filter(
+            pk=instance.parent_id, reply_count__gt=0,
+        ).update(reply_count=F('reply_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_post_comments_cache(sender, instance, **kwargs):
+    invalidate_post(instance.post_id)
@@ -0,0 +1,133 @@
+"""Инкрементальное обновление счётчиков групп."""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Value, When
+
+from .models import ArchivedPost, Group, GroupAuthorStats, GroupStats, Post
+
+TOP_AUTHORS = 3
+
+_state = threading.local()
+
+
+def _update_or_create(model, lookup, updates, defaults):
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def refresh_top_authors(group_id):
+    author_ids = (
+        GroupAuthorStats.objects
+        .filter(group_id=group_id, post_count__gt=0)
+        .order_by('-post_count', 'author_id')
+        .values_list('author_id', flat=True)[:TOP_AUTHORS]
+    )
+    GroupStats.objects.filter(group_id=group_id).update(
+        top_authors=','.join(map(str, author_ids)))
+
+
+def post_added(group_id, author_id, pub_date):
+    _update_or_create(
+        GroupStats,
+        {'group_id': group_id},
+        {
+            'post_count': F('post_count') + 1,
+            'last_pub_date': Case(
+                When(last_pub_date__gte=pub_date, then=F('last_pub_date')),
+                default=Value(pub_date),
+            ),
+        },
+        {'post_count': 1, 'last_pub_date': pub_date},
+    )
+    _update_or_create(
+        GroupAuthorStats,
+        {'group_id': group_id, 'author_id': author_id},
+        {'post_count': F('post_count') + 1},
+        {'post_count': 1},
+    )
+    refresh_top_authors(group_id)
+
+
+def post_removed(group_id, author_id):
+    last_pub_date = None
+    for model in (Post, ArchivedPost):
+        last_pub_date = model.objects.filter(group_id=group_id).aggregate(
+            last=Max('pub_date'))['last']
+        if last_pub_date is not None:
+            break
+    GroupStats.objects.filter(group_id=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1,
+        last_pub_date=last_pub_date,
+    )
+    GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id, post_count__gt=0,
+    ).update(post_count=F('post_count') - 1)
+    refresh_top_authors(group_id)
+
+
+def recount(group_ids):
+    """Пересчитывает счётчики указанных групп по постам и архиву."""
+    group_ids = set(group_ids) - {None}
+    post_counts, author_counts, last_pub_dates = Counter(), Counter(), {}
+    for model in (Post, ArchivedPost):
+        posts = model.objects.filter(group_id__in=group_ids).order_by()
+        for row in posts.values('group').annotate(
+                post_count=Count('pk'), last_pub_date=Max('pub_date')):
+            post_counts[row['group']] += row['post_count']
+            last_pub_dates[row['group']] = max(
+                last_pub_dates.get(row['group'], row['last_pub_date']),
+                row['last_pub_date'])
+        for row in posts.values('group', 'author').annotate(
+                post_count=Count('pk')):
+            author_counts[row['group'], row['author']] += row['post_count']
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id__in=group_ids).delete()
+        GroupAuthorStats.objects.filter(group_id__in=group_ids).delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=group_id,
+                post_count=post_count,
+                last_pub_date=last_pub_dates[group_id],
+            )
+            for group_id, post_count in post_counts.items()
+        )
+        GroupAuthorStats.objects.bulk_create(
+            GroupAuthorStats(
+                group_id=group_id,
+                author_id=author_id,
+                post_count=post_count,
+            )
+            for (group_id, author_id), post_count in author_counts.items()
+        )
+        for group_id in group_ids:
+            refresh_top_authors(group_id)
+
+
+def rebuild():
+    """Пересчитывает все счётчики с нуля."""
+    recount(Group.objects.values_list('pk', flat=True))
+
+
+@contextmanager
+def paused():
+    """Отключает обновление счётчиков из сигналов.
+
+    Для массовых операций: после них нужно вызвать ``recount``.
+    """
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = False
+
+
+def is_paused():
+    return getattr(_state, 'paused', False)
@@ -0,0 +1,115 @@
+"""Хештеги и упоминания постов.
+
+Теги и имена разбираются из текста (``posts.text``) и раскладываются по
+таблицам ``PostTag`` и ``Mention``. Индекс обновляется пачкой постов за
+несколько запросов: меняются только строки, которые появились или
+пропали, поэтому повторное сохранение того же текста ничего не пишет.
+"""
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.dispatch import Signal
+
+from .models import Mention, Post, PostTag, Tag
+from .text import extract_mentions, extract_tags
+
+User = get_user_model()
+
+# Отправляется после сохранения поста, в котором появились новые
+# упоминания; ``user_ids`` — кого упомянули.
+mentions_added = Signal(providing_args=['post', 'user_ids'])
+
+
+def _tag_ids(names):
+    if not names:
+        return {}
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = set(names) - ids.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list(
+            'name', 'pk'))
+    return ids
+
+
+def _sync(model, field, wanted, post_ids):
+    """Приводит пары ``(post_id, field_id)`` к ``wanted``.
+
+    ``wanted`` — словарь пар в дату публикации поста. Возвращает
+    добавленные пары.
+    """
+    existing = set(model.objects.filter(post_id__in=post_ids).values_list(
+        'post_id', f'{field}_id'))
+    removed = existing - wanted.keys()
+    if removed:
+        condition = models.Q()
+        for post_id, other_id in removed:
+            condition |= models.Q(post_id=post_id, **{f'{field}_id': other_id})
+        model.objects.filter(condition).delete()
+    added = [pair for pair in wanted if pair not in existing]
+    model.objects.bulk_create(
+        [
+            model(post_id=post_id, pub_date=wanted[post_id, other_id],
+                  **{f'{field}_id': other_id})
+            for post_id, other_id in added
+        ],
+        ignore_conflicts=True,
+    )
+    return added
+
+
+def index_posts(entries):
+    """Индексирует ``[(post_id, pub_date, теги, имена), ...]``.
+
+    Возвращает новые упоминания как пары ``(post_id, user_id)``.
+    """
+    tag_ids = _tag_ids({name for _, _, names, _ in entries for name in names})
+    user_ids = dict(User.objects.filter(username__in={
+        username for *_, usernames in entries for username in usernames
+    }).values_list('username', 'pk'))
+    post_ids = [post_id for post_id, *_ in entries]
+    tags, mentions = {}, {}
+    for post_id, pub_date, names, usernames in entries:
+        for name in names:
+            tags[post_id, tag_ids[name]] = pub_date
+        for username in usernames:
+            if username in user_ids:
+                mentions[post_id, user_ids[username]] = pub_date
+    with transaction.atomic():
+        _sync(PostTag, 'tag', tags, post_ids)
+        return _sync(Mention, 'user', mentions, post_ids)
+
+
+def index_post(post):
+    return index_posts([(
+        post.pk, post.pub_date,
+        extract_tags(post.text), extract_mentions(post.text),
+    )])
+
+
+class TagFeed:
+    """Посты с тегом от новых к старым, для ``get_cursor_page``.
+
+    Ключи постов читаются из ``PostTag`` по индексу
+    ``(tag, -pub_date, -post)``, затем карточки загружаются по ``pk``.
+    """
+    ordered = True
+
+    def __init__(self, tag, cursor=None):
+        self.tag = tag
+        self.cursor = cursor
+
+    def before(self, cursor):
+        return TagFeed(self.tag, cursor)
+
+    def __getitem__(self, index):
+        rows = PostTag.objects.filter(tag=self.tag).order_by(
+            '-pub_date', '-post_id')
+        if self.cursor is not None:
+            pub_date, pk = self.cursor
+            rows = rows.filter(
+                models.Q(pub_date__lt=pub_date)
+                | models.Q(pub_date=pub_date, post_id__lt=pk))
+        pks = list(rows.values_list('post_id', flat=True)[index])
+        posts = Post.objects.cards().in_bulk(pks)
+        return [posts[pk] for pk in pks if pk in posts]
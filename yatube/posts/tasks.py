@@ -0,0 +1,8 @@
+from tasks.registry import task
+
+from . import images
+
+
+@task(priority=10)
+def process_post_image(post_id, publish=False):
+    images.process_post_image(post_id, publish)
@@ -0,0 +1,79 @@
+"""Персональные элементы карточек поверх общего фрагментного кеша.
+
+Список карточек кешируется один на всех читателей, а ссылки, которые
+зависят от читателя (подписка, лайк, отметка «Новое»), в кешированный
+фрагмент не попадают. Внутри ``{% personalize %}`` тег
+``{% post_controls post %}`` оставляет на их месте метку с данными
+поста, а ``personalize`` после рендера фрагмента заменяет метки
+шаблоном ``posts/includes/post_controls.html`` для текущего читателя.
+"""
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+from django import template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CONTROLS_TEMPLATE = 'posts/includes/post_controls.html'
+MARKER_RE = re.compile(
+    r'<!--controls (\d+) (\d+) ([01]) (\S+) ([\w.@+-]+?)-->')
+
+
+def _render_controls(context, post, extra):
+    controls = context.template.engine.get_template(CONTROLS_TEMPLATE)
+    with context.push(post=post, **extra):
+        return controls.render(context)
+
+
+@register.simple_tag(takes_context=True)
+def post_controls(context, post):
+    if not context.get('defer_controls'):
+        return _render_controls(context, post, {})
+    return mark_safe('<!--controls {} {} {:d} {} {}-->'.format(
+        post.pk, post.author_id, post.is_archived,
+        post.pub_date.isoformat(), post.author.username))
+
+
+class PersonalizeNode(template.Node):
+    def __init__(self, nodelist, extra):
+        self.nodelist = nodelist
+        self.extra = extra
+
+    def render(self, context):
+        with context.push(defer_controls=True):
+            html = self.nodelist.render(context)
+        extra = {
+            name: value.resolve(context)
+            for name, value in self.extra.items()
+        }
+
+        def replace(match):
+            pk, author_id, archived, pub_date, username = match.groups()
+            post = SimpleNamespace(
+                pk=int(pk),
+                author_id=int(author_id),
+                is_archived=archived == '1',
+                pub_date=datetime.fromisoformat(pub_date),
+                author=SimpleNamespace(username=username),
+            )
+            return _render_controls(context, post, extra)
+
+        return mark_safe(MARKER_RE.sub(replace, html))
+
+
+@register.tag
+def personalize(parser, token):
+    """``{% personalize [имя=значение ...] %}...{% endpersonalize %}``.
+
+    Переменные из аргументов доступны шаблону персональных элементов.
+    """
+    bits = token.split_contents()[1:]
+    extra = template.base.token_kwargs(bits, parser)
+    if bits:
+        raise template.TemplateSyntaxError(
+            "'personalize' принимает только именованные аргументы")
+    nodelist = parser.parse(('endpersonalize',))
+    parser.delete_first_token()
+    return PersonalizeNode(nodelist, extra)
@@ -0,0 +1,123 @@
+from collections import Counter
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import moderation
+from ..models import Comment, Group, GroupStats, Post, User
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(PostAdminTest.admin)
+        self.spam = [
+            Post.objects.create(text=f'Спам {i}', author=PostAdminTest.spammer,
+                                group=PostAdminTest.group)
+            for i in range(5)
+        ]
+        self.post = Post.objects.create(
+            text='Нормальный пост', author=PostAdminTest.author,
+            group=PostAdminTest.group)
+        for post in (self.spam[0], self.post):
+            Comment.objects.create(
+                text='Комментарий', post=post, author=PostAdminTest.spammer)
+
+    def run_action(self, action, posts, **data):
+        return self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            **data,
+        })
+
+    def test_changelist_opens(self):
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['cl'].show_full_result_count)
+
+    def test_reassign_group(self):
+        self.run_action('reassign_group', self.spam[:2],
+                        target_group=PostAdminTest.other_group.pk)
+        self.assertEqual(
+            Post.objects.filter(group=PostAdminTest.other_group).count(), 2)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostAdminTest.other_group).post_count, 2)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostAdminTest.group).post_count, 4)
+
+    def test_delete_by_author(self):
+        self.run_action('delete_by_author', self.spam[:1])
+        self.assertFalse(
+            Post.objects.filter(author=PostAdminTest.spammer).exists())
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostAdminTest.group).post_count, 1)
+
+    def test_purge_comments(self):
+        self.run_action('purge_comments', [self.post])
+        self.assertFalse(Comment.objects.filter(post=self.post).exists())
+        self.assertTrue(Comment.objects.filter(post=self.spam[0]).exists())
+
+    def test_operations_report_progress_per_chunk(self):
+        progress = list(moderation.delete_posts_by_authors(
+            [PostAdminTest.spammer.pk], chunk_size=2))
+        self.assertEqual(progress, [2, 4, 5])
+
+    def test_delete_queries_do_not_grow_with_chunk(self):
+        for post in self.spam:
+            root = Comment.objects.create(
+                text='Ещё', post=post, author=PostAdminTest.author)
+            for _ in range(2):
+                Comment.objects.create(
+                    text='Ответ', post=post, author=PostAdminTest.author,
+                    parent=root)
+        with CaptureQueriesContext(connection) as queries:
+            list(moderation.delete_posts_by_authors(
+                [PostAdminTest.spammer.pk]))
+        # Пачка удаляется одним запросом на таблицу, а не строкой за
+        # строкой с сигналом на каждую.
+        deletes = Counter(
+            query['sql'].split()[2] for query in queries.captured_queries
+            if query['sql'].startswith('DELETE'))
+        self.assertEqual(deletes['"posts_post"'], 1)
+        self.assertEqual(deletes['"posts_comment"'], 1)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'reply_count' in query['sql']])
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(GroupStats.objects.get(
+            group=PostAdminTest.group).post_count, 1)
+
+    def test_delete_comments_removes_replies(self):
+        root = Comment.objects.get(post=self.post)
+        reply = Comment.objects.create(
+            text='Ответ', post=self.post, author=PostAdminTest.author,
+            parent=root)
+        Comment.objects.create(
+            text='Ответ на ответ', post=self.post,
+            author=PostAdminTest.author, parent=reply)
+        other = Comment.objects.create(
+            text='Другой ответ', post=self.post,
+            author=PostAdminTest.author, parent=root)
+        progress = list(moderation.delete_comments(
+            Comment.objects.filter(pk=reply.pk)))
+        self.assertEqual(progress, [2])
+        self.assertEqual(
+            set(Comment.objects.filter(post=self.post)), {root, other})
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
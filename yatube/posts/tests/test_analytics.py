@@ -0,0 +1,75 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..analytics import record_daily, views_buffer
+from ..models import Post, PostViewDaily, User
+
+BROWSER = 'Mozilla/5.0 (X11; Linux x86_64) Firefox/118.0'
+
+
+# Иначе буфер сбросится после запроса, если с прошлого сброса прошло
+# больше интервала.
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class PostViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        views_buffer.clear()
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_views_are_buffered_and_bots_skipped(self):
+        client = Client(HTTP_USER_AGENT=BROWSER)
+        for _ in range(3):
+            client.get(self.url)
+        Client(HTTP_USER_AGENT='Googlebot/2.1').get(self.url)
+        Client().get(self.url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 0)
+        self.assertEqual(views_buffer.pending(self.post.pk), 3)
+
+        views_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 3)
+        self.assertEqual(PostViewDaily.objects.get().views, 3)
+
+    def test_detail_shows_flushed_views_despite_cached_payload(self):
+        client = Client(HTTP_USER_AGENT=BROWSER)
+        client.get(self.url)
+        views_buffer.flush()
+        response = client.get(self.url)
+        self.assertContains(response, 'Просмотров: 1')
+
+    def test_failed_rollup_leaves_views_count_unchanged(self):
+        views_buffer.add(self.post.pk, 2)
+        with mock.patch.object(
+                PostViewDaily.objects, 'bulk_create',
+                side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                views_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 0)
+        self.assertEqual(views_buffer.pending(self.post.pk), 2)
+        views_buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views_count, 2)
+        self.assertEqual(PostViewDaily.objects.get().views, 2)
+
+    def test_daily_rollup_adds_to_existing_rows(self):
+        other = Post.objects.create(text='Другой', author=self.author)
+        day = datetime.date(2024, 1, 1)
+        record_daily([(self.post.pk, 2)], day)
+        with self.assertNumQueries(2):
+            record_daily([(self.post.pk, 1), (other.pk, 5)], day)
+        self.assertEqual(
+            dict(PostViewDaily.objects.values_list('post_id', 'views')),
+            {self.post.pk: 3, other.pk: 5})
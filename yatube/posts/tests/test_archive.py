@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import stats
+from ..archive import archive_posts
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, Group, GroupStats, Like, Mention,
+    Post, PostTag, User,
+)
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        self.client = Client()
+        self.old_posts = [
+            Post.objects.create(text=f'Старый пост {i}',
+                                author=ArchiveTest.author,
+                                group=ArchiveTest.group)
+            for i in range(12)
+        ]
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.old_posts],
+        ).update(pub_date=timezone.now() - timedelta(days=400))
+        self.comment = Comment.objects.create(
+            text='Старый комментарий', post=self.old_posts[0],
+            author=ArchiveTest.author)
+        self.new_post = Post.objects.create(
+            text='Новый пост', author=ArchiveTest.author,
+            group=ArchiveTest.group)
+
+    def archive(self):
+        return list(archive_posts(
+            timezone.now() - timedelta(days=365), chunk_size=5))
+
+    def test_old_posts_and_comments_are_moved(self):
+        self.assertEqual(self.archive(), [5, 10, 12])
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        archived_comment = ArchivedComment.objects.get()
+        self.assertEqual(archived_comment.pk, self.comment.pk)
+        self.assertEqual(archived_comment.post_id, self.old_posts[0].pk)
+
+    def test_tags_and_mentions_move_to_archive(self):
+        reader = User.objects.create_user(username='reader')
+        post = Post.objects.get(pk=self.old_posts[1].pk)
+        post.text = 'Старый пост про #python для @reader'
+        post.save()
+        Like.objects.create(user=reader, post=post)
+        self.archive()
+        self.assertFalse(PostTag.objects.exists())
+        self.assertFalse(Mention.objects.exists())
+        self.assertFalse(Like.objects.exists())
+        archived = ArchivedPost.objects.get(pk=post.pk)
+        self.assertEqual(
+            list(archived.post_tags.values_list('tag__name', flat=True)),
+            ['python'])
+        self.assertEqual(
+            list(archived.mentions.values_list('user', flat=True)),
+            [reader.pk])
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertEqual(response.context['tags'], ['python'])
+
+    def test_comments_are_deleted_without_per_row_queries(self):
+        parent = self.comment
+        for number in range(50):
+            parent = Comment.objects.create(
+                text=f'Ответ {number}', post=self.old_posts[0],
+                author=ArchiveTest.author, parent=parent)
+        with CaptureQueriesContext(connection) as queries:
+            self.archive()
+        self.assertEqual(ArchivedComment.objects.count(), 51)
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(any(
+            query['sql'].startswith('UPDATE')
+            for query in queries.captured_queries))
+        comment_deletes = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_comment"')]
+        self.assertEqual(len(comment_deletes), 3)
+
+    def test_group_stats_keep_archived_posts(self):
+        self.archive()
+        self.assertEqual(GroupStats.objects.get(
+            group=ArchiveTest.group).post_count, 13)
+        stats.rebuild()
+        self.assertEqual(GroupStats.objects.get(
+            group=ArchiveTest.group).post_count, 13)
+
+    def test_post_detail_falls_back_to_archive(self):
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_posts[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['author_posts_count'], 13)
+        self.assertContains(response, 'Старый комментарий')
+        missing = self.client.get(reverse('posts:post_detail', args=[0]))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_profile_pages_continue_into_archive(self):
+        self.archive()
+        url = reverse('posts:profile', args=[ArchiveTest.author])
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(first.paginator.count, 13)
+        self.assertEqual(first[0], self.new_post)
+        self.assertEqual(len(second), 3)
+        self.assertIsInstance(second[0], ArchivedPost)
+
+    def test_command_archives_by_age(self):
+        call_command('archive_posts', days=500, stdout=StringIO())
+        self.assertFalse(ArchivedPost.objects.exists())
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), 12)
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class CardProjectionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', password='password')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number} ' + 'слово ' * 100,
+                author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cards_skip_text_and_user_columns(self):
+        sql = str(Post.objects.cards().query)
+        for column in ('"text"', '"text_html"', '"password"', '"email"'):
+            self.assertNotIn(column, sql)
+        self.assertIn('"text_excerpt"', sql)
+
+    def test_list_pages_render_cards_in_one_query(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[CardProjectionTest.group.slug]),
+            reverse('posts:profile', args=[CardProjectionTest.author]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                post_queries = [
+                    query for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                    and 'COUNT' not in query['sql']
+                ]
+                self.assertEqual(len(post_queries), 1)
+                self.assertContains(response, 'Пост 2 слово')
+                self.assertNotContains(response, 'слово ' * 40)
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..detail import COMMENT_THREAD_DEPTH
+from ..models import COMMENT_MAX_DEPTH, Comment, Post, User
+
+
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.other_post = Post.objects.create(text='Другой', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(CommentThreadTest.user)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            text=text, post=CommentThreadTest.post,
+            author=CommentThreadTest.user, parent=parent)
+
+    def chain(self, length):
+        comments = [self.comment('0')]
+        for number in range(1, length):
+            comments.append(self.comment(str(number), comments[-1]))
+        return comments
+
+    def test_thread_loads_in_path_order_with_one_query(self):
+        first, second = self.comment('1'), self.comment('2')
+        reply = self.comment('1.1', first)
+        nested = self.comment('1.1.1', reply)
+        late = self.comment('1.2', first)
+        with self.assertNumQueries(1):
+            thread = list(CommentThreadTest.post.comments.threads())
+        self.assertEqual(thread, [first, reply, nested, late, second])
+        self.assertEqual([c.depth for c in thread], [0, 1, 2, 1, 0])
+        first.refresh_from_db()
+        self.assertEqual(first.reply_count, 2)
+
+    def test_subtree_is_depth_limited(self):
+        chain = self.chain(6)
+        self.comment('сосед')
+        subtree = list(Comment.objects.subtree(chain[1], 2))
+        self.assertEqual(subtree, chain[2:4])
+
+    def test_depth_is_capped(self):
+        chain = self.chain(COMMENT_MAX_DEPTH + 3)
+        self.assertEqual(chain[-1].depth, COMMENT_MAX_DEPTH)
+        self.assertEqual(chain[-1].parent, chain[COMMENT_MAX_DEPTH - 1])
+
+    def test_reply_via_form(self):
+        parent = self.comment('Вопрос')
+        self.client.post(
+            reverse('posts:add_comment', args=[CommentThreadTest.post.pk]),
+            {'text': 'Ответ', 'parent': parent.pk})
+        self.assertTrue(Comment.objects.filter(
+            text='Ответ', parent=parent, depth=1).exists())
+
+        other = Comment.objects.create(
+            text='Чужой', post=CommentThreadTest.other_post,
+            author=CommentThreadTest.user)
+        self.client.post(
+            reverse('posts:add_comment', args=[CommentThreadTest.post.pk]),
+            {'text': 'Мимо', 'parent': other.pk})
+        self.assertIsNone(Comment.objects.get(text='Мимо').parent)
+
+    def test_deep_replies_are_loaded_lazily(self):
+        chain = self.chain(COMMENT_THREAD_DEPTH + 3)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[CommentThreadTest.post.pk]))
+        self.assertEqual(
+            list(response.context['comments']),
+            chain[:COMMENT_THREAD_DEPTH + 1])
+        replies_url = reverse('posts:comment_replies', args=[
+            CommentThreadTest.post.pk, chain[COMMENT_THREAD_DEPTH].pk])
+        self.assertContains(response, replies_url)
+
+        response = self.client.get(replies_url)
+        self.assertEqual(list(response.context['comments']),
+                         chain[COMMENT_THREAD_DEPTH + 1:])
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+
+
+class PostDetailCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Исходный текст', author=PostDetailCacheTest.author)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+        self.client = Client()
+        self.client.force_login(PostDetailCacheTest.author)
+
+    # Число уведомлений в шапке берётся из кеша, только если он общий.
+    @mock.patch('notifications.inbox.is_process_local', return_value=False)
+    def test_repeated_hits_skip_post_queries(self, _):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['post'], self.post)
+        self.assertEqual(response.context['author_posts_count'], 1)
+
+    def test_add_comment_invalidates_payload(self):
+        self.client.get(self.url)
+        self.client.post(reverse('posts:add_comment', args=[self.post.pk]),
+                         {'text': 'Новый комментарий'})
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Новый комментарий')
+
+    def test_post_edit_invalidates_payload(self):
+        self.client.get(self.url)
+        self.client.post(reverse('posts:post_edit', args=[self.post.pk]),
+                         {'text': 'Новый текст'})
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['post'].text, 'Новый текст')
+
+    def test_new_post_updates_author_count(self):
+        self.client.get(self.url)
+        Post.objects.create(text='Ещё пост', author=PostDetailCacheTest.author)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['author_posts_count'], 2)
+
+    def test_only_first_comment_page_is_cached(self):
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', post=self.post,
+                    author=PostDetailCacheTest.author)
+            for i in range(51)
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['comments']), 50)
+        self.assertTrue(response.context['has_more_comments'])
+        response = self.client.get(self.url + '?comments=all')
+        self.assertEqual(len(response.context['comments']), 51)
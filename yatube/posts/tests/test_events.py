@@ -0,0 +1,74 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.pubsub import get_broker
+
+from ..events import CHANNEL, publish_post
+from ..models import Follow, Post, User
+
+
+@override_settings(SSE_STREAM_TIMEOUT=0.2, SSE_HEARTBEAT_INTERVAL=0.1)
+class EventsViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(EventsViewTest.reader)
+
+    def read_stream(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def publish_posts(self):
+        # TestCase не фиксирует транзакцию, поэтому публикуем вручную.
+        for author in (EventsViewTest.author, EventsViewTest.other):
+            publish_post(
+                Post.objects.create(text=f'Пост {author}', author=author))
+
+    def post_events(self, body):
+        return [
+            json.loads(line[len('data: '):])
+            for line in body.splitlines() if line.startswith('data: ')
+        ]
+
+    def test_followed_posts_are_streamed_after_last_event_id(self):
+        self.publish_posts()
+        body = self.read_stream(reverse('posts:events'),
+                                HTTP_LAST_EVENT_ID='0')
+        events = self.post_events(body)
+        self.assertEqual(
+            [event['author_id'] for event in events],
+            [EventsViewTest.author.pk])
+        self.assertIn('Пост author', events[0]['html'])
+        self.assertIn('id: 1\n', body)
+        self.assertTrue(body.startswith('retry: '))
+
+    def test_stream_starts_from_now_and_sends_heartbeats(self):
+        self.publish_posts()
+        body = self.read_stream(reverse('posts:events'))
+        self.assertEqual(self.post_events(body), [])
+        self.assertIn(': ping', body)
+
+    def test_stream_is_only_for_logged_in_follow_feed(self):
+        response = Client().get(reverse('posts:events'))
+        self.assertEqual(response.status_code, 302)
+        index = self.client.get(reverse('posts:index'))
+        self.assertNotContains(index, reverse('posts:events'))
+        follow = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(follow, reverse('posts:events'))
+
+    def test_last_id_from_the_future_is_clamped(self):
+        get_broker(CHANNEL).publish({'author_id': 0, 'html': ''})
+        body = self.read_stream(reverse('posts:events') + '?last_id=100')
+        self.assertNotIn('id: ', body)
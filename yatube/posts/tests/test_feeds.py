@@ -0,0 +1,137 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feeds
+from ..feeds import MergedFeed
+from ..models import Follow, Post, User
+from ..utils import CursorPaginator, decode_cursor, get_cursor_page
+
+
+class MergedFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        cls.stranger = User.objects.create_user(username='stranger')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        now = timezone.now()
+        for number in range(12):
+            for author in (*cls.authors, cls.stranger):
+                post = Post.objects.create(
+                    text=f'Пост {number}', author=author)
+                # Часть постов с одинаковой датой: порядок решает pk.
+                Post.objects.filter(pk=post.pk).update(
+                    pub_date=now - timedelta(minutes=number // 2))
+        cls.author_ids = [author.pk for author in cls.authors]
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self):
+        return list(Post.objects.feed_for(MergedFeedTest.reader))
+
+    def test_merge_matches_sql_feed(self):
+        feed = MergedFeed(self.author_ids)
+        self.assertEqual(feed.count(), 36)
+        self.assertEqual(feed[0:10], self.expected()[0:10])
+        self.assertEqual(feed[10:20], self.expected()[10:20])
+
+    def test_cached_timelines_need_one_query(self):
+        feed = MergedFeed(self.author_ids)
+        feed[0:10]
+        with self.assertNumQueries(1):
+            MergedFeed(self.author_ids)[0:10]
+
+    def test_cold_timelines_load_in_one_query(self):
+        with self.assertNumQueries(2):
+            MergedFeed(self.author_ids)[0:10]
+        self.assertEqual(
+            feeds._load_timelines(self.author_ids, 4),
+            {author_id: feeds._load_timeline(author_id, limit=4)
+             for author_id in self.author_ids})
+
+    def test_new_post_resets_author_timeline(self):
+        MergedFeed(self.author_ids)[0:10]
+        post = Post.objects.create(
+            text='Свежий', author=MergedFeedTest.authors[1])
+        self.assertEqual(MergedFeed(self.author_ids)[0], post)
+        post.delete()
+        self.assertNotEqual(MergedFeed(self.author_ids)[0].pk, post.pk)
+
+    def test_deep_slices_fall_back_to_sql(self):
+        with mock.patch.object(feeds, 'TIMELINE_SIZE', 5):
+            feed = MergedFeed(self.author_ids)
+            self.assertEqual(feed[0:5], self.expected()[0:5])
+            self.assertEqual(feed[20:30], self.expected()[20:30])
+
+    def test_cursor_walk_reads_past_cached_timelines(self):
+        request = RequestFactory().get('/')
+        walked = []
+        with mock.patch.object(feeds, 'TIMELINE_SIZE', 4):
+            while True:
+                items, cursor = get_cursor_page(
+                    request, MergedFeed(self.author_ids), 5)
+                walked.extend(items)
+                if cursor is None:
+                    break
+                request = RequestFactory().get('/', {'cursor': cursor})
+                self.assertIsNotNone(decode_cursor(cursor))
+        self.assertEqual(walked, self.expected())
+
+    def test_page_past_cached_timelines_is_one_query(self):
+        with mock.patch.object(feeds, 'TIMELINE_SIZE', 4):
+            first = MergedFeed(self.author_ids)[0:4]
+            cursor = (first[-1].pub_date, first[-1].pk)
+            with self.assertNumQueries(1):
+                page = MergedFeed(self.author_ids).before(cursor)[0:4]
+        self.assertEqual(page, self.expected()[4:8])
+
+    def test_follow_index_switches_engine_by_follow_count(self):
+        client = Client()
+        client.force_login(MergedFeedTest.reader)
+        url = reverse('posts:follow_index')
+        with mock.patch.object(
+                feeds, 'MergedFeed', wraps=MergedFeed) as merged:
+            response = client.get(url)
+            self.assertTrue(merged.called)
+            self.assertEqual(
+                list(response.context['page_obj']), self.expected()[:10])
+            merged.reset_mock()
+            with override_settings(PULL_FEED_MAX_AUTHORS=2):
+                response = client.get(url)
+            self.assertFalse(merged.called)
+        self.assertEqual(
+            list(response.context['page_obj']), self.expected()[:10])
+
+    def test_follow_index_pages_by_cursor_without_count(self):
+        client = Client()
+        client.force_login(MergedFeedTest.reader)
+        url = reverse('posts:follow_index')
+        walked = []
+        params = {}
+        for number in range(4):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+            sql = [query['sql'] for query in queries.captured_queries]
+            self.assertFalse(any('COUNT(' in query for query in sql))
+            page_obj = response.context['page_obj']
+            self.assertIsInstance(page_obj.paginator, CursorPaginator)
+            self.assertEqual(page_obj.has_previous(), number > 0)
+            walked.extend(page_obj)
+            if not page_obj.has_next():
+                break
+            params = {'cursor': page_obj.paginator.next_cursor}
+        self.assertEqual(walked, self.expected())
+        self.assertContains(response, 'href="?"')
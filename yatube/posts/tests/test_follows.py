@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..follows import load_following
+from ..models import Follow, Post, User
+
+
+class FollowingSetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        for author in (cls.author, cls.other):
+            Post.objects.create(text=f'Пост {author}', author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FollowingSetTest.reader)
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query for query in queries if 'posts_follow' in query['sql']]
+
+    def test_following_is_loaded_once_and_cached(self):
+        Follow.objects.create(
+            user=FollowingSetTest.reader, author=FollowingSetTest.author)
+        url = reverse('posts:profile', args=[FollowingSetTest.author])
+
+        response, queries = self.follow_queries(url)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.follow_queries(url)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(queries, [])
+
+    def test_follow_and_unfollow_reset_cache(self):
+        self.assertNotIn(
+            FollowingSetTest.author.pk,
+            load_following(FollowingSetTest.reader))
+        self.client.get(
+            reverse('posts:profile_follow', args=[FollowingSetTest.author]))
+        self.assertIn(
+            FollowingSetTest.author.pk,
+            load_following(FollowingSetTest.reader))
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[FollowingSetTest.author]))
+        self.assertNotIn(
+            FollowingSetTest.author.pk,
+            load_following(FollowingSetTest.reader))
+
+    def test_cards_show_follow_state_without_per_author_queries(self):
+        Follow.objects.create(
+            user=FollowingSetTest.reader, author=FollowingSetTest.author)
+        response, queries = self.follow_queries(reverse('posts:index'))
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow', args=[FollowingSetTest.author]))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=[FollowingSetTest.other]))
+
+    def test_cached_cards_are_personalized_for_each_reader(self):
+        Follow.objects.create(
+            user=FollowingSetTest.reader, author=FollowingSetTest.author)
+        url = reverse('posts:index')
+        self.client.get(url)
+        # Фрагмент уже в кеше, но ссылки строятся для нового читателя.
+        author_client = Client()
+        author_client.force_login(FollowingSetTest.author)
+        response = author_client.get(url)
+        self.assertNotContains(response, reverse(
+            'posts:profile_follow', args=[FollowingSetTest.author]))
+        self.assertNotContains(response, reverse(
+            'posts:profile_unfollow', args=[FollowingSetTest.author]))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=[FollowingSetTest.other]))
+        self.assertNotContains(response, '<!--controls')
+
+    def test_fragment_key_depends_only_on_follow_set(self):
+        other_reader = User.objects.create_user(username='other_reader')
+        for user in (FollowingSetTest.reader, other_reader):
+            Follow.objects.create(user=user, author=FollowingSetTest.author)
+        self.assertEqual(
+            load_following(FollowingSetTest.reader).cache_key,
+            load_following(other_reader).cache_key)
+        self.assertNotEqual(
+            load_following(FollowingSetTest.reader).cache_key,
+            load_following(FollowingSetTest.author).cache_key)
@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, GroupStats, Post, User
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание')
+
+    def create_post(self, author, group):
+        return Post.objects.create(text='Пост', author=author, group=group)
+
+    def test_stats_follow_created_posts(self):
+        self.create_post(GroupStatsTest.author, GroupStatsTest.group)
+        self.create_post(GroupStatsTest.other_author, GroupStatsTest.group)
+        last = self.create_post(GroupStatsTest.other_author,
+                                GroupStatsTest.group)
+        stats = GroupStats.objects.get(group=GroupStatsTest.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.last_pub_date, last.pub_date)
+        self.assertEqual(
+            stats.top_author_ids(),
+            [GroupStatsTest.other_author.pk, GroupStatsTest.author.pk])
+
+    def test_stats_follow_group_change_and_delete(self):
+        post = self.create_post(GroupStatsTest.author, GroupStatsTest.group)
+        post = Post.objects.get(pk=post.pk)
+        post.group = GroupStatsTest.other_group
+        post.save()
+        stats = GroupStats.objects.get(group=GroupStatsTest.group)
+        self.assertEqual(stats.post_count, 0)
+        self.assertIsNone(stats.last_pub_date)
+        self.assertEqual(
+            GroupStats.objects.get(
+                group=GroupStatsTest.other_group).post_count, 1)
+
+        post.delete()
+        other_stats = GroupStats.objects.get(group=GroupStatsTest.other_group)
+        self.assertEqual(other_stats.post_count, 0)
+        self.assertEqual(other_stats.top_author_ids(), [])
+
+    def test_stats_follow_author_change(self):
+        post = self.create_post(GroupStatsTest.author, GroupStatsTest.group)
+        post = Post.objects.get(pk=post.pk)
+        post.author = GroupStatsTest.other_author
+        post.save()
+        stats = GroupStats.objects.get(group=GroupStatsTest.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(
+            stats.top_author_ids(), [GroupStatsTest.other_author.pk])
+
+    def test_rebuild_counts_bulk_created_posts(self):
+        Post.objects.bulk_create(
+            Post(text=str(i), author=GroupStatsTest.author,
+                 group=GroupStatsTest.group)
+            for i in range(5)
+        )
+        call_command('refresh_group_stats', stdout=StringIO())
+        stats = GroupStats.objects.get(group=GroupStatsTest.group)
+        self.assertEqual(stats.post_count, 5)
+        self.assertEqual(stats.top_author_ids(), [GroupStatsTest.author.pk])
+
+    def test_group_index_queries_do_not_grow(self):
+        self.create_post(GroupStatsTest.author, GroupStatsTest.group)
+        self.create_post(GroupStatsTest.other_author,
+                         GroupStatsTest.other_group)
+        with self.assertNumQueries(2):
+            response = Client().get(reverse('posts:group_index'))
+        groups = {group.pk: group for group in response.context['groups']}
+        self.assertEqual(groups[GroupStatsTest.group.pk].top_authors,
+                         [GroupStatsTest.author])
+        self.assertContains(response, GroupStatsTest.other_group.title)
+
+    def test_group_index_shows_renamed_author(self):
+        self.create_post(GroupStatsTest.author, GroupStatsTest.group)
+        author = User.objects.get(pk=GroupStatsTest.author.pk)
+        author.username = 'renamed'
+        author.save()
+        response = Client().get(reverse('posts:group_index'))
+        self.assertContains(
+            response, reverse('posts:profile', args=['renamed']))
@@ -0,0 +1,154 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.pubsub import get_broker
+from tasks.models import Task
+
+from ..events import CHANNEL
+from ..forms import PostForm
+from ..images import get_output_format, normalize_image, process_post_image
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, image_format='JPEG', exif=False):
+    image = Image.new('RGB', size, (200, 10, 10))
+    buffer = BytesIO()
+    options = {}
+    if exif:
+        exif_data = Image.Exif()
+        exif_data[0x010F] = 'Camera maker'
+        options['exif'] = exif_data.tobytes()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_DIMENSION=100)
+class PostImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_normalize_downsizes_and_strips_exif(self):
+        content, extension = normalize_image(
+            BytesIO(make_image((400, 200), exif=True)))
+        with Image.open(content) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertEqual(image.format, get_output_format())
+            self.assertFalse(image.getexif())
+        self.assertIn(extension, ('.jpg', '.webp'))
+
+    def test_normalize_skips_processed_image(self):
+        self.assertIsNone(normalize_image(BytesIO(make_image(
+            (80, 40), get_output_format()))))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_form_rejects_too_large_resolution(self):
+        form = PostForm(
+            data={'text': 'Большая картинка'},
+            files={'image': SimpleUploadedFile(
+                'big.png', make_image((20, 20), 'PNG'), 'image/png')},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_process_post_image_replaces_original(self):
+        post = Post.objects.create(
+            text='Пост с большой картинкой',
+            author=PostImageTest.user,
+            image=SimpleUploadedFile(
+                'big.png', make_image((300, 300), 'PNG'), 'image/png'),
+        )
+        original = post.image.name
+        process_post_image(post.pk)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original)
+        self.assertTrue(post.image.storage.exists(original))
+        with post.image.open('rb') as source, Image.open(source) as image:
+            self.assertEqual(image.size, (100, 100))
+
+    def test_form_queues_processing_once_per_image(self):
+        form = PostForm(
+            data={'text': 'Пост с картинкой'},
+            files={'image': SimpleUploadedFile(
+                'photo.png', make_image((20, 20), 'PNG'), 'image/png')},
+        )
+        self.assertTrue(form.is_valid())
+        post = form.save(commit=False)
+        post.author = PostImageTest.user
+        form.save()
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'posts.tasks.process_post_image')
+        self.assertEqual(
+            task.idempotency_key, f'post-image:{post.pk}:{post.image.name}')
+        form.save()
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_new_post_is_published_after_processing(self):
+        form = PostForm(
+            data={'text': 'Новый пост с картинкой'},
+            files={'image': SimpleUploadedFile(
+                'big.png', make_image((300, 300), 'PNG'), 'image/png')},
+        )
+        self.assertTrue(form.is_valid())
+        post = form.save(commit=False)
+        post.author = PostImageTest.user
+        form.save()
+        task = Task.objects.get()
+        self.assertEqual(json.loads(task.arguments)['args'], [post.pk, True])
+
+        broker = get_broker(CHANNEL)
+        last_id = broker.last_id()
+        process_post_image(post.pk, publish=True)
+        post.refresh_from_db()
+        [(_, event)] = broker.wait(last_id, 0)
+        self.assertEqual(event['post_id'], post.pk)
+        self.assertFalse(post.image.name.endswith('.png'))
+
+    def test_edited_image_is_not_published(self):
+        post = Post.objects.create(
+            text='Старый пост', author=PostImageTest.user)
+        form = PostForm(
+            instance=post, data={'text': post.text},
+            files={'image': SimpleUploadedFile(
+                'photo.png', make_image((20, 20), 'PNG'), 'image/png')},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(
+            json.loads(Task.objects.get().arguments)['args'],
+            [post.pk, False])
+
+    def test_collect_media_garbage_keeps_referenced_files(self):
+        image = make_image((10, 10), 'PNG')
+        first = Post.objects.create(
+            text='Первый', author=PostImageTest.user,
+            image=SimpleUploadedFile('a.png', image, 'image/png'))
+        second = Post.objects.create(
+            text='Второй', author=PostImageTest.user,
+            image=SimpleUploadedFile('b.png', image, 'image/png'))
+        self.assertEqual(first.image.name, second.image.name)
+        storage = first.image.storage
+
+        first.delete()
+        call_command('collect_media_garbage', grace=0, stdout=StringIO())
+        self.assertTrue(storage.exists(second.image.name))
+
+        second.delete()
+        call_command('collect_media_garbage', grace=0, stdout=StringIO())
+        self.assertFalse(storage.exists(second.image.name))
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..likes import LikedSet, likes_buffer
+from ..models import Like, Post, User
+
+
+# Иначе буфер сбросится после запроса, если с прошлого сброса прошло
+# больше интервала.
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class LikeTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        likes_buffer.clear()
+        self.user = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        self.posts = [
+            Post.objects.create(text=f'Пост {number}', author=author)
+            for number in range(3)
+        ]
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_like_is_idempotent_and_counted_after_flush(self):
+        post = self.posts[0]
+        url = reverse('posts:post_like', args=[post.pk])
+        self.client.post(url)
+        self.client.post(url)
+        self.assertEqual(Like.objects.filter(post=post).count(), 1)
+        self.assertEqual(likes_buffer.pending(post.pk), 1)
+        likes_buffer.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 1)
+
+        self.client.post(reverse('posts:post_unlike', args=[post.pk]))
+        likes_buffer.flush()
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 0)
+
+    def test_save_does_not_overwrite_flushed_count(self):
+        post = Post.objects.get(pk=self.posts[0].pk)
+        likes_buffer.add(post.pk, 3)
+        likes_buffer.flush()
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 3)
+
+    def test_liked_state_is_one_query_per_page(self):
+        Like.objects.create(user=self.user, post=self.posts[1])
+        liked = LikedSet(self.user, self.posts)
+        with self.assertNumQueries(1):
+            states = [post.pk in liked for post in self.posts]
+        self.assertEqual(states, [False, True, False])
+
+    def test_feed_cards_show_like_links(self):
+        self.client.post(reverse('posts:post_like', args=[self.posts[1].pk]))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response, reverse('posts:post_unlike', args=[self.posts[1].pk]))
+        self.assertContains(
+            response, reverse('posts:post_like', args=[self.posts[0].pk]))
+
+    def test_like_and_unlike_need_post(self):
+        post = self.posts[0]
+        for name in ('posts:post_like', 'posts:post_unlike'):
+            response = self.client.get(reverse(name, args=[post.pk]))
+            self.assertEqual(response.status_code, 405)
+        self.assertFalse(Like.objects.filter(post=post).exists())
+
+    @override_settings(RATELIMITS={'like': {'user': '2/m'}})
+    def test_toggling_shares_like_limit(self):
+        post = self.posts[0]
+        like_url = reverse('posts:post_like', args=[post.pk])
+        unlike_url = reverse('posts:post_unlike', args=[post.pk])
+        self.assertEqual(self.client.post(like_url).status_code, 302)
+        self.assertEqual(self.client.post(unlike_url).status_code, 302)
+        self.assertEqual(self.client.post(like_url).status_code, 429)
+        self.assertEqual(self.client.post(unlike_url).status_code, 429)
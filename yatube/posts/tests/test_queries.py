@@ -0,0 +1,108 @@
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from ..models import Follow, Group, Post, User
+from ..utils import decode_cursor, encode_cursor, get_cursor_page
+
+SELECT = (
+    'SELECT "posts_post"."id", "posts_post"."pub_date", '
+    '"posts_post"."text_excerpt", "posts_post"."author_id", '
+    '"posts_post"."group_id", "posts_post"."image", '
+    '"posts_post"."likes_count", "auth_user"."id", '
+    '"auth_user"."username", "auth_user"."first_name", '
+    '"auth_user"."last_name", "posts_group"."id", "posts_group"."title", '
+    '"posts_group"."slug" FROM "posts_post" '
+)
+JOINS = (
+    'INNER JOIN "auth_user" ON ("posts_post"."author_id" = '
+    '"auth_user"."id") LEFT OUTER JOIN "posts_group" ON '
+    '("posts_post"."group_id" = "posts_group"."id") '
+)
+ORDER = 'ORDER BY "posts_post"."pub_date" DESC, "posts_post"."id" DESC'
+
+
+class PostQuerySetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        # Повторная подписка не должна задваивать ленту.
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        now = timezone.now()
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group)
+            Post.objects.create(text=f'Чужой {number}', author=cls.other)
+        # Одинаковые даты проверяют, что курсор учитывает pk.
+        Post.objects.update(pub_date=now)
+
+    def assertQuery(self, queryset, sql):
+        self.assertEqual(str(queryset.query), sql)
+        with self.assertNumQueries(1):
+            posts = list(queryset)
+            for post in posts:
+                post.author.get_full_name(), post.author.username
+                post.excerpt, post.image
+                post.group and post.group.slug
+        return posts
+
+    def test_for_index(self):
+        posts = self.assertQuery(
+            Post.objects.for_index(), SELECT + JOINS + ORDER)
+        self.assertEqual(len(posts), 10)
+
+    def test_for_group(self):
+        posts = self.assertQuery(
+            Post.objects.for_group(PostQuerySetTest.group),
+            SELECT
+            + 'INNER JOIN "posts_group" ON ("posts_post"."group_id" = '
+            '"posts_group"."id") INNER JOIN "auth_user" ON '
+            '("posts_post"."author_id" = "auth_user"."id") '
+            f'WHERE "posts_post"."group_id" = {PostQuerySetTest.group.pk} '
+            + ORDER)
+        self.assertEqual(len(posts), 5)
+
+    def test_by_author(self):
+        posts = self.assertQuery(
+            Post.objects.by_author(PostQuerySetTest.other),
+            SELECT + JOINS
+            + f'WHERE "posts_post"."author_id" = {PostQuerySetTest.other.pk} '
+            + ORDER)
+        self.assertEqual(len(posts), 5)
+
+    def test_feed_for(self):
+        posts = self.assertQuery(
+            Post.objects.feed_for(PostQuerySetTest.reader),
+            SELECT + JOINS
+            + 'WHERE "posts_post"."author_id" IN (SELECT U0."author_id" '
+            'FROM "posts_follow" U0 WHERE U0."user_id" = '
+            f'{PostQuerySetTest.reader.pk}) ' + ORDER)
+        self.assertEqual(
+            {post.author_id for post in posts}, {PostQuerySetTest.author.pk})
+        self.assertEqual(len(posts), 5)
+
+    def test_cursor_pages_cover_feed_without_repeats(self):
+        factory = RequestFactory()
+        seen, cursor = [], None
+        while True:
+            request = factory.get('/', {'cursor': cursor} if cursor else {})
+            with self.assertNumQueries(1):
+                items, cursor = get_cursor_page(
+                    request, Post.objects.for_index(), 3)
+            seen.extend(post.pk for post in items)
+            if cursor is None:
+                break
+        self.assertEqual(
+            seen, list(Post.objects.for_index().values_list('pk', flat=True)))
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        self.assertEqual(decode_cursor(encode_cursor(post)),
+                         (post.pub_date, post.pk))
+        with self.assertRaises(ValueError):
+            decode_cursor('broken')
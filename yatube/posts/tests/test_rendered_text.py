@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.template.defaultfilters import linebreaksbr, truncatewords
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+
+TEXT = 'Первая <строка>\nвторая строка ' + 'слово ' * 40
+
+
+class RenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def test_save_renders_like_template_filters(self):
+        post = Post.objects.create(text=TEXT, author=RenderedTextTest.author)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, linebreaksbr(TEXT))
+        self.assertEqual(post.text_excerpt, truncatewords(TEXT, 30))
+
+    def test_update_fields_keeps_html_in_sync(self):
+        post = Post.objects.create(
+            text='Старый', author=RenderedTextTest.author)
+        post.text = 'Новый\nтекст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый<br>текст')
+
+    def test_pages_show_stored_html(self):
+        post = Post.objects.create(text=TEXT, author=RenderedTextTest.author)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, linebreaksbr(TEXT), html=False)
+        self.assertContains(response, 'Первая &lt;строка&gt;<br>вторая')
+
+    def test_bulk_create_renders_text(self):
+        Post.objects.bulk_create([
+            Post(text=TEXT, author=RenderedTextTest.author)])
+        post = Post.objects.cards().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(post.excerpt, truncatewords(TEXT, 30))
+
+    def test_backfill_fills_rows_saved_without_html(self):
+        for i in range(3):
+            Post.objects.create(text=f'Пост\n{i}',
+                                author=RenderedTextTest.author)
+        Post.objects.update(text_html='', text_excerpt='')
+        call_command('render_post_bodies', workers=0, chunk_size=2,
+                     stdout=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('text_html', flat=True)),
+            ['Пост<br>0', 'Пост<br>1', 'Пост<br>2'])
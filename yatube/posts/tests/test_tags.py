@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Mention, Post, PostTag, Tag, User
+from ..text import extract_mentions, extract_tags
+
+
+class ExtractionTest(TestCase):
+    def test_tags_and_mentions_are_found(self):
+        text = 'Привет, @leo. #Django и #django, a#b, &#39; email@host #тег'
+        self.assertEqual(extract_tags(text), ['django', 'тег'])
+        self.assertEqual(extract_mentions(text), ['leo'])
+
+
+class TagIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.leo = User.objects.create_user(username='leo')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_save_keeps_index_in_sync(self):
+        post = Post.objects.create(
+            text='#one #two для @leo и @nobody', author=self.author)
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'one', 'two'})
+        self.assertEqual(
+            list(post.mentions.values_list('user__username', flat=True)),
+            ['leo'])
+
+        post.text = '#two #three'
+        post.save()
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'two', 'three'})
+        self.assertFalse(Mention.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            post.save(update_fields=['text'])
+        writes = [query['sql'] for query in queries
+                  if query['sql'].startswith(('INSERT', 'DELETE', 'UPDATE'))]
+        self.assertEqual(len(writes), 1)
+
+    def test_tag_feed_walks_with_cursor(self):
+        now = timezone.now()
+        posts = []
+        for number in range(12):
+            post = Post.objects.create(
+                text=f'Пост {number} #python', author=self.author)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=number // 3))
+            PostTag.objects.filter(post=post).update(
+                pub_date=now - timedelta(minutes=number // 3))
+            posts.append(post)
+        Post.objects.create(text='Без тега', author=self.author)
+        expected = list(
+            Post.objects.filter(post_tags__tag__name='python')
+            .order_by('-pub_date', '-pk'))
+
+        client = Client()
+        url = reverse('posts:tag_posts', args=['Python'])
+        response = client.get(url)
+        walked = list(response.context['posts'])
+        response = client.get(
+            url, {'cursor': response.context['next_cursor']})
+        walked += response.context['posts']
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(walked, expected)
+
+    def test_reindex_command(self):
+        post = Post.objects.create(text='#old', author=self.author)
+        Post.objects.filter(pk=post.pk).update(text='#new @leo')
+        call_command('reindex_tags', workers=0, chunk_size=1,
+                     stdout=StringIO())
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['new'])
+        self.assertTrue(post.mentions.filter(user=self.leo).exists())
+        self.assertTrue(Tag.objects.filter(name='old').exists())
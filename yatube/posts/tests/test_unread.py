@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import FeedCursor, Follow, Post, User
+from ..unread import UNREAD_LIMIT, count_unread, get_seen_until
+
+
+class UnreadPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(UnreadPostsTest.reader)
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=UnreadPostsTest.author)
+        Post.objects.create(text='Чужой', author=UnreadPostsTest.stranger)
+
+    def unread(self):
+        return self.client.get(reverse('posts:unread_count')).json()
+
+    def test_visiting_feed_marks_posts_seen(self):
+        self.assertEqual(self.unread(), {'count': 3, 'label': '3'})
+        self.client.get(reverse('posts:follow_index'))
+        self.assertTrue(
+            FeedCursor.objects.filter(user=UnreadPostsTest.reader).exists())
+        self.assertEqual(self.unread()['count'], 0)
+
+        Post.objects.create(text='Новый', author=UnreadPostsTest.author)
+        Post.objects.create(text='Чужой', author=UnreadPostsTest.stranger)
+        self.assertEqual(self.unread()['count'], 1)
+
+    def test_visit_caches_new_cursor(self):
+        self.client.get(reverse('posts:follow_index'))
+        latest = Post.objects.filter(
+            author=UnreadPostsTest.author).latest('pub_date')
+        # Курсор не перечитывается из базы, где реплика могла отстать.
+        with self.assertNumQueries(0):
+            seen_until = get_seen_until(UnreadPostsTest.reader.pk)
+        self.assertEqual(seen_until, latest.pub_date)
+
+    def test_cached_count_needs_no_queries(self):
+        author_ids = {UnreadPostsTest.author.pk}
+        count_unread(UnreadPostsTest.reader.pk, author_ids)
+        with self.assertNumQueries(0):
+            unread = count_unread(UnreadPostsTest.reader.pk, author_ids)
+        self.assertEqual(unread.count, 3)
+
+    def test_count_is_bounded(self):
+        Post.objects.bulk_create(
+            Post(text='Пост', author=UnreadPostsTest.author)
+            for _ in range(UNREAD_LIMIT + 5))
+        self.assertEqual(self.unread(), {
+            'count': UNREAD_LIMIT + 1, 'label': f'{UNREAD_LIMIT}+'})
+        with override_settings(PULL_FEED_MAX_AUTHORS=0):
+            self.assertEqual(self.unread()['count'], UNREAD_LIMIT + 1)
+
+    def test_header_shows_badge(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<span class="badge bg-danger">3</span>')
@@ -1,6 +1,9 @@
+import hashlib
+import re
 import shutil
 import tempfile
 
+from core.storage import ContentAddressedStorage
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
@@ -12,6 +15,12 @@ from ..models import Follow, Group, Post, User
 from ..views import POSTS_PER_PAGE
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Токен CSRF в формах лайков маскируется заново при каждом рендере.
+CSRF_TOKEN_RE = re.compile(rb'name="csrfmiddlewaretoken" value="\w+"')
+
+
+def without_csrf_tokens(content):
+    return CSRF_TOKEN_RE.sub(b'name="csrfmiddlewaretoken"', content)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -60,6 +69,8 @@ class PostsPagesTest(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        cls.small_gif_name = ContentAddressedStorage().hashed_name(
+            'posts', hashlib.sha256(cls.small_gif).hexdigest(), '.gif')
 
     @classmethod
     def tearDownClass(cls):
@@ -201,7 +212,7 @@ class PostsPagesTest(TestCase):
             with self.subTest(url=url):
                 response = self.authorized_client.get(url)
                 post_image = response.context['page_obj'][0].image
-                self.assertEqual(post_image, 'posts/small.gif')
+                self.assertEqual(post_image, PostsPagesTest.small_gif_name)
 
     def test_post_detail_with_image_show_correct_context(self):
         uploaded = SimpleUploadedFile(
@@ -220,7 +231,7 @@ class PostsPagesTest(TestCase):
             kwargs={
                 'post_id': post.id}))
         post_detail_image = post_detail_response.context['post'].image
-        self.assertEqual(post_detail_image, 'posts/small1.gif')
+        self.assertEqual(post_detail_image, PostsPagesTest.small_gif_name)
 
     def test_index_page_cache(self):
         post = Post.objects.create(
@@ -234,13 +245,14 @@ class PostsPagesTest(TestCase):
         post.delete()
         response_after_delete = self.authorized_client.get(
             reverse('posts:index'))
-        self.assertEqual(response_before_delete.content,
-                         response_after_delete.content)
+        self.assertEqual(without_csrf_tokens(response_before_delete.content),
+                         without_csrf_tokens(response_after_delete.content))
         cache.clear()
         response_after_cache_clear = self.authorized_client.get(
             reverse('posts:index'))
-        self.assertNotEqual(response_after_cache_clear.content,
-                            response_after_delete.content)
+        self.assertNotEqual(
+            without_csrf_tokens(response_after_cache_clear.content),
+            without_csrf_tokens(response_after_delete.content))
 
     def test_authorized_user_can_follow(self):
         self.authorized_client.get(
@@ -0,0 +1,50 @@
+"""Подготовка текста поста к выводу и разбор хештегов и упоминаний.
+
+Результат совпадает с фильтрами ``linebreaksbr`` и ``truncatewords:30``,
+но считается один раз при сохранении, а не при каждом рендере.
+Модуль не обращается к настройкам Django, поэтому функции можно
+вызывать в процессах пула без ``django.setup()``.
+"""
+import re
+
+from django.utils.html import escape
+from django.utils.text import Truncator, normalize_newlines
+
+EXCERPT_WORDS = 30
+TAG_RE = re.compile(r'(?<![\w#&])#(\w{1,64})')
+# Символы имени пользователя Django; точка в конце — конец предложения.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+
+
+def render_body(text):
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def make_excerpt(text):
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+def render(text):
+    return render_body(text), make_excerpt(text)
+
+
+def render_rows(rows):
+    """``[(pk, text), ...]`` -> ``[(pk, html, excerpt), ...]``."""
+    return [(pk, *render(text)) for pk, text in rows]
+
+
+def extract_tags(text):
+    return sorted({name.lower() for name in TAG_RE.findall(text)})
+
+
+def extract_mentions(text):
+    return sorted({
+        username.rstrip('.') for username in MENTION_RE.findall(text)
+        if username.rstrip('.')
+    })
+
+
+def extract_rows(rows):
+    """``[(pk, text), ...]`` -> ``[(pk, теги, упоминания), ...]``."""
+    return [
+        (pk, extract_tags(text), extract_mentions(text)) for pk, text in rows]
@@ -0,0 +1,94 @@
+"""Число непрочитанных постов в ленте подписок.
+
+Пользователь дочитал ленту до ``FeedCursor.seen_until``. Новые посты
+считаются до ``UNREAD_LIMIT`` включительно, дальше показывается «99+»,
+поэтому подсчёт никогда не перебирает всю ленту.
+
+Для умеренного числа подписок считаются записи кешированных лент авторов
+(``posts.feeds``): их сбрасывает новый пост автора, так что счётчик
+обновляется без рассылки сбросов по подписчикам и без запросов к базе.
+Для больших подписок работает ограниченный ``COUNT`` по индексу
+``(author, -pub_date, -id)``, результат которого кешируется ненадолго.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core.caching import read_through, write_through
+
+from .feeds import get_timelines
+from .models import FeedCursor, Post
+
+# Должно быть меньше feeds.TIMELINE_SIZE, иначе подсчёт по лентам авторов
+# упрётся в их длину.
+UNREAD_LIMIT = 99
+SEEN_TIMEOUT = 60 * 60
+COUNT_TIMEOUT = 30
+
+
+class UnreadCount:
+    def __init__(self, count):
+        self.count = min(count, UNREAD_LIMIT + 1)
+
+    @property
+    def more(self):
+        return self.count > UNREAD_LIMIT
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __str__(self):
+        return f'{UNREAD_LIMIT}+' if self.more else str(self.count)
+
+
+def _seen_key(user_id):
+    return f'feed_seen:{user_id}'
+
+
+def get_seen_until(user_id):
+    return read_through(
+        _seen_key(user_id),
+        lambda: FeedCursor.objects.filter(user_id=user_id)
+        .values_list('seen_until', flat=True).first(),
+        SEEN_TIMEOUT,
+    )
+
+
+def mark_seen(user_id, pub_date):
+    """Сдвигает курсор вперёд; назад он не возвращается.
+
+    Новое значение кладётся в кеш сразу: сброс дал бы значку в шапке
+    пересобрать его с реплики, где курсор ещё старый.
+    """
+    seen_until = get_seen_until(user_id)
+    if seen_until is not None and seen_until >= pub_date:
+        return
+    FeedCursor.objects.update_or_create(
+        user_id=user_id, defaults={'seen_until': pub_date})
+    write_through(_seen_key(user_id), pub_date, SEEN_TIMEOUT)
+
+
+def count_unread(user_id, author_ids):
+    if not author_ids:
+        return UnreadCount(0)
+    seen_until = get_seen_until(user_id)
+    if len(author_ids) <= settings.PULL_FEED_MAX_AUTHORS:
+        count = 0
+        for timeline in get_timelines(author_ids).values():
+            # Ленты отсортированы от новых к старым.
+            for pub_date, _ in timeline:
+                if seen_until is not None and pub_date <= seen_until:
+                    break
+                count += 1
+            if count > UNREAD_LIMIT:
+                break
+        return UnreadCount(count)
+
+    key = f'unread:{user_id}:{seen_until and seen_until.timestamp()}'
+    count = cache.get(key)
+    if count is None:
+        posts = Post.objects.filter(author_id__in=author_ids)
+        if seen_until is not None:
+            posts = posts.filter(pub_date__gt=seen_until)
+        count = posts.values('pk')[:UNREAD_LIMIT + 1].count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return UnreadCount(count)
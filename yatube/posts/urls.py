@@ -6,7 +6,9 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
@@ -14,7 +16,15 @@ urlpatterns = [
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/replies/',
+         views.comment_replies,
+         name='comment_replies'),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path('posts/<int:post_id>/unlike/', views.post_unlike,
+         name='post_unlike'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/unread/', views.unread_count, name='unread_count'),
+    path('events/', views.events, name='events'),
     path('profile/<str:username>/follow/',
          views.profile_follow,
          name='profile_follow'),
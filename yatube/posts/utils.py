@@ -1,7 +1,144 @@
-from django.core.paginator import Paginator
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+ESTIMATE_THRESHOLD = 10000
+ESTIMATE_CACHE_TIMEOUT = 60
 
 
 def get_paginator_page_obj(request, object_list, per_page):
     page_number = request.GET.get('page')
     paginator = Paginator(object_list, per_page)
     return paginator.get_page(page_number)
+
+
+def encode_cursor(obj):
+    """Курсор для ``PostQuerySet.before``: дата публикации и ``pk``."""
+    raw = f'{obj.pub_date.isoformat()}|{obj.pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(token):
+    """Разбирает курсор, для испорченного поднимает ``ValueError``."""
+    try:
+        pub_date, pk = urlsafe_base64_decode(token).decode().split('|')
+    except (TypeError, UnicodeDecodeError):
+        raise ValueError(f'Некорректный курсор {token!r}')
+    parsed = parse_datetime(pub_date)
+    if parsed is None:
+        raise ValueError(f'Некорректный курсор {token!r}')
+    return parsed, int(pk)
+
+
+def request_cursor(request):
+    """Курсор из ``?cursor=``; ``None``, если его нет или он испорчен."""
+    token = request.GET.get('cursor')
+    if token:
+        try:
+            return decode_cursor(token)
+        except ValueError:
+            pass
+    return None
+
+
+def get_cursor_page(request, queryset, per_page):
+    """Страница по курсору из ``?cursor=`` и курсор следующей страницы.
+
+    В отличие от ``Paginator`` не считает строки и не пропускает
+    ``OFFSET`` записей: глубокие страницы стоят столько же, сколько первая.
+    """
+    cursor = request_cursor(request)
+    if cursor is not None:
+        queryset = queryset.before(cursor)
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor(items[-1])
+    return items, next_cursor
+
+
+class CursorPaginator:
+    """Пагинатор для ``Page`` со страницей, выбранной по курсору.
+
+    Строки не считаются: известно только, есть ли страницы до и после
+    текущей. Первая страница получает номер 1, остальные — 2, и
+    ``num_pages`` подобран так, чтобы ``has_previous``/``has_next`` у
+    ``Page`` отвечали верно.
+    """
+
+    def __init__(self, per_page, cursor, next_cursor):
+        # cursor и next_cursor — строки из ссылок ``?cursor=``.
+        self.per_page = per_page
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.number = 1 if cursor is None else 2
+        self.num_pages = self.number + (next_cursor is not None)
+
+
+def get_cursor_page_obj(request, queryset, per_page):
+    """``get_cursor_page`` в виде ``Page`` для шаблонов с ``page_obj``."""
+    items, next_cursor = get_cursor_page(request, queryset, per_page)
+    cursor = None
+    if request_cursor(request) is not None:
+        cursor = request.GET['cursor']
+    paginator = CursorPaginator(per_page, cursor, next_cursor)
+    return Page(items, paginator.number, paginator)
+
+
+def estimate_count(model, using='default'):
+    """Примерное число строк в таблице модели без COUNT(*)."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table])
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table])
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+    # Для остальных СУБД верхняя оценка по максимальному ключу.
+    return model._base_manager.using(using).aggregate(
+        last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор для больших таблиц.
+
+    Для запроса без фильтров берёт оценку размера таблицы из статистики СУБД
+    и считает точно, только если таблица маленькая. Остальные подсчёты
+    кешируются на минуту.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None:
+            return super().count
+        model = queryset.model
+        if not query.where:
+            estimate = estimate_count(model, queryset.db)
+            if estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        key = 'paginator-count:{}:{}'.format(
+            model._meta.label_lower,
+            hashlib.md5(str(query).encode()).hexdigest())
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, ESTIMATE_CACHE_TIMEOUT)
+        return count
@@ -1,72 +1,146 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db.models import F
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
+
+from core.db import primary_after_write, replica_reads
+from core.pubsub import get_broker
+from core.ratelimit import ratelimit
+
+from .analytics import record_view
+from .archive import author_posts
+from .detail import (
+    COMMENT_THREAD_DEPTH, get_author_posts_count, get_post_payload,
+)
+from .events import CHANNEL, stream_events
+from .feeds import feed_for
+from .follows import get_following
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
-from .utils import get_paginator_page_obj
+from .likes import LikedSet, like, unlike
+from .models import ArchivedComment, Comment, Follow, Group, Post, Tag
+from .tags import TagFeed
+from .unread import count_unread, get_seen_until, mark_seen
+from .utils import (
+    get_cursor_page, get_cursor_page_obj, get_paginator_page_obj,
+)
 
 User = get_user_model()
 POSTS_PER_PAGE = 10
+REPLIES_DEPTH = 3
 
 
+@replica_reads
 def index(request):
-    post_list = Post.objects.select_related('group', 'author').all()
+    post_list = Post.objects.for_index()
     page_obj = get_paginator_page_obj(request, post_list, POSTS_PER_PAGE)
     context = {
         'page_obj': page_obj,
+        'liked_posts': LikedSet(request.user, page_obj),
     }
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group', 'author').all()
+    posts = Post.objects.for_group(group)
     page_obj = get_paginator_page_obj(request, posts, POSTS_PER_PAGE)
 
     context = {
         'group': group,
         'page_obj': page_obj,
+        'liked_posts': LikedSet(request.user, page_obj),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+def group_index(request):
+    groups = list(Group.objects.select_related('stats').order_by(
+        F('stats__post_count').desc(nulls_last=True), 'title'))
+    # Лучшие авторы хранятся как id, чтобы не устаревать при смене
+    # имени; имена подтягиваются одним запросом на всю страницу.
+    top = {
+        group.pk: group.stats.top_author_ids()
+        for group in groups if hasattr(group, 'stats')
+    }
+    authors = User.objects.in_bulk(
+        {pk for author_ids in top.values() for pk in author_ids})
+    for group in groups:
+        group.top_authors = [
+            authors[pk] for pk in top.get(group.pk, ()) if pk in authors]
+    return render(request, 'posts/group_index.html', {'groups': groups})
+
+
+@replica_reads
 def profile(request, username):
-    following = False
     author = User.objects.get(username=username)
+    following = author.pk in get_following(request)
 
-    if request.user.is_authenticated:
-        if Follow.objects.filter(author=author).filter(
-                user=request.user).exists():
-            following = True
-
-    user_posts = author.posts.select_related('author', 'group').all()
-    page_obj = get_paginator_page_obj(request, user_posts, POSTS_PER_PAGE)
+    page_obj = get_paginator_page_obj(
+        request, author_posts(author), POSTS_PER_PAGE)
 
     context = {
         'following': following,
         'author': author,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'liked_posts': LikedSet(request.user, page_obj),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
 def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.select_related('group', 'author'), pk=post_id)
-    comments = post.comments.select_related('author').all()
-    is_author = request.user == post.author
+    payload = get_post_payload(post_id)
+    if payload is None:
+        raise Http404('Пост не найден')
+    post = payload['post']
+    archived = not isinstance(post, Post)
+    if not archived:
+        record_view(request, post)
+    comments = payload['comments']
+    if payload['has_more_comments'] and request.GET.get('comments') == 'all':
+        comments = post.comments.threads(COMMENT_THREAD_DEPTH)
+    is_author = request.user == post.author and not archived
 
     form = CommentForm()
 
     context = {'post': post,
                'is_author': is_author,
+               'archived': archived,
+               'author_posts_count': get_author_posts_count(post.author),
+               'liked_posts': LikedSet(request.user, [post]),
+               'tags': payload['tags'],
                'form': form,
-               'comments': comments}
+               'comments': comments,
+               'max_depth': COMMENT_THREAD_DEPTH,
+               'reply_to': request.GET.get('reply_to', ''),
+               'has_more_comments': (
+                   payload['has_more_comments']
+                   and comments is payload['comments'])}
     return render(request, 'posts/post_detail.html', context)
 
 
+@replica_reads
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = get_cursor_page(
+        request, TagFeed(tag), POSTS_PER_PAGE)
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'liked_posts': LikedSet(request.user, posts),
+    }
+    return render(request, 'posts/tag_posts.html', context)
+
+
 @login_required
+@ratelimit('post_create')
+@primary_after_write
 def post_create(request):
     is_edit = False
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -81,6 +155,7 @@ def post_create(request):
 
 
 @login_required
+@primary_after_write
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     is_edit = True
@@ -102,6 +177,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
+@primary_after_write
 def add_comment(request, post_id):
     post = get_object_or_404(
         Post.objects.select_related('group', 'author'), pk=post_id)
@@ -110,38 +187,128 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent', '')
+        if parent_id.isdigit():
+            # Отвечать можно только на комментарии того же поста.
+            comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
+def comment_replies(request, post_id, comment_id):
+    """Ответы на комментарий, которые не поместились в ветку поста."""
+    for model in (Comment, ArchivedComment):
+        comment = model.objects.filter(pk=comment_id, post_id=post_id).first()
+        if comment is not None:
+            break
+    else:
+        raise Http404('Комментарий не найден')
+    context = {
+        'comments': model.objects.subtree(comment, REPLIES_DEPTH),
+        'max_depth': comment.depth + REPLIES_DEPTH,
+        'archived': model is ArchivedComment,
+    }
+    return render(request, 'posts/comment_replies.html', context)
+
+
 @login_required
+@primary_after_write
+@replica_reads
 def follow_index(request):
-    post_list = Post.objects.select_related(
-        'group', 'author').filter(author__following__user=request.user).all()
+    post_list = feed_for(
+        request.user, get_following(request).author_ids)
 
-    page_obj = get_paginator_page_obj(request, post_list, POSTS_PER_PAGE)
+    page_obj = get_cursor_page_obj(request, post_list, POSTS_PER_PAGE)
+    last_seen = get_seen_until(request.user.pk)
+    if not page_obj.has_previous() and page_obj.object_list:
+        mark_seen(request.user.pk, page_obj.object_list[0].pub_date)
 
     context = {
         'page_obj': page_obj,
+        'last_seen': last_seen,
+        'liked_posts': LikedSet(request.user, page_obj),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+def unread_count(request):
+    unread = count_unread(request.user.pk, get_following(request).author_ids)
+    return JsonResponse({'count': unread.count, 'label': str(unread)})
+
+
+def redirect_back(request, post):
+    next_url = request.META.get('HTTP_REFERER')
+    if next_url and is_safe_url(
+            next_url, allowed_hosts={request.get_host()},
+            require_https=request.is_secure()):
+        return redirect(next_url)
+    return redirect('posts:post_detail', post_id=post.pk)
+
+
+@login_required
+@require_POST
+@ratelimit('like')
+@primary_after_write
+def post_like(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    like(request.user, post)
+    return redirect_back(request, post)
+
+
+@login_required
+@require_POST
+@ratelimit('like')
+@primary_after_write
+def post_unlike(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    unlike(request.user, post)
+    return redirect_back(request, post)
+
+
+@login_required
+@ratelimit('profile_follow', methods=('GET', 'POST'))
+@primary_after_write
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user == author:
         return redirect('posts:profile', request.user.username)
-    if Follow.objects.filter(user=request.user).filter(author=author).exists():
+    if author.pk in get_following(request):
         return redirect('posts:profile', username)
-    Follow.objects.create(user=request.user, author=author)
+    Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:follow_index')
 
 
 @login_required
+@primary_after_write
 def profile_unfollow(request, username):
     author = User.objects.get(username=username)
-    if Follow.objects.filter(user=request.user).filter(author=author).exists():
-        Follow.objects.filter(user=request.user).filter(author=author).delete()
+    if author.pk in get_following(request):
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:follow_index')
+
+
+@login_required
+def events(request):
+    """Новые посты авторов из подписок читателя.
+
+    Поток держит синхронный воркер до ``SSE_STREAM_TIMEOUT``, поэтому
+    он есть только у ленты подписок вошедших пользователей.
+    """
+    broker = get_broker(CHANNEL)
+    last_id = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'last_id')
+    try:
+        last_id = min(int(last_id), broker.last_id())
+    except (TypeError, ValueError):
+        last_id = broker.last_id()
+
+    response = StreamingHttpResponse(
+        stream_events(last_id, get_following(request).author_ids),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,163 @@
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.checks import is_process_local
+from tasks.pool import execute_in_process, init_process
+from tasks.worker import claim, execute, purge_done, release
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди в пуле процессов. '
+            'Можно запускать несколько воркеров одновременно.')
+    # Когда последний раз удалялись старые завершённые задачи.
+    purged_at = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Размер пула процессов. 0 — выполнять задачи в этом '
+                 'процессе.',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда готовые задачи закончатся.',
+        )
+
+    def handle(self, *args, **options):
+        # Задачи сбрасывают кеш сайта: с кешем в памяти процесса сброс
+        # до сайта не дойдёт, а в пуле — даже до соседних процессов.
+        if is_process_local():
+            if options['workers'] > 0:
+                raise CommandError(
+                    'Кеш виден только этому процессу: укажите общий кеш '
+                    'в CACHE_LOCATION или запустите с --workers 0.')
+            self.stderr.write(
+                'Кеш виден только этому процессу: сброс кеша из задач '
+                'не дойдёт до сайта.')
+        if options['workers'] == 0:
+            done = self.run_inline(options)
+        else:
+            done = self.run_pool(options)
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+
+    def purge_if_due(self):
+        """Удаляет старые завершённые задачи раз в ``TASKS_PURGE_INTERVAL``."""
+        now = time.monotonic()
+        if self.purged_at is not None and (
+                now - self.purged_at < settings.TASKS_PURGE_INTERVAL):
+            return
+        self.purged_at = now
+        removed = purge_done()
+        if removed:
+            logger.info('Удалено завершённых задач: %s', removed)
+
+    def run_inline(self, options):
+        done = 0
+        while True:
+            self.purge_if_due()
+            task_ids = claim(1)
+            if not task_ids:
+                if options['once']:
+                    return done
+                time.sleep(options['poll'])
+                continue
+            try:
+                execute(task_ids[0])
+            except Exception:
+                self.release_failed(task_ids[0])
+            else:
+                done += 1
+
+    def release_failed(self, task_id):
+        """Возвращает в очередь задачу, на которой упал сам ``execute``.
+
+        Например, отвалилась база: ошибку задачи ``execute`` записал бы
+        сам. Если не выходит и это, задачу заберут после конца аренды.
+        """
+        error = traceback.format_exc()
+        logger.exception('Не удалось выполнить задачу #%s', task_id)
+        try:
+            release([task_id], error)
+        except Exception:
+            logger.exception('Не удалось вернуть задачу #%s в очередь',
+                             task_id)
+
+    def collect(self, finished, running):
+        """Разбирает завершённые futures пула.
+
+        Возвращает число выполненных задач и задачи, потерянные вместе
+        со сломанным пулом.
+        """
+        done = 0
+        lost = []
+        for future in finished:
+            task_id = running.pop(future)
+            try:
+                future.result()
+            except BrokenProcessPool:
+                lost.append(task_id)
+            except Exception:
+                self.release_failed(task_id)
+            else:
+                done += 1
+        return done, lost
+
+    def make_pool(self, workers):
+        # Процессы запускаются через spawn: форк унаследовал бы открытые
+        # соединения с базой.
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process,
+        )
+
+    def run_pool(self, options):
+        workers = options['workers']
+        pool = self.make_pool(workers)
+        running = {}
+        done = 0
+        try:
+            while True:
+                self.purge_if_due()
+                for task_id in claim(workers - len(running)):
+                    future = pool.submit(execute_in_process, task_id)
+                    running[future] = task_id
+                if not running:
+                    if options['once']:
+                        return done
+                    time.sleep(options['poll'])
+                    continue
+                finished, _ = wait(
+                    running, timeout=options['poll'],
+                    return_when=FIRST_COMPLETED)
+                finished_count, lost = self.collect(finished, running)
+                done += finished_count
+                if lost:
+                    # Процесс пула упал (например, убит по памяти), и пул
+                    # больше не принимает задачи: все его задачи
+                    # возвращаются в очередь, а пул создаётся заново.
+                    lost.extend(running.values())
+                    logger.error(
+                        'Пул процессов сломан, задачи %s возвращены в '
+                        'очередь', lost)
+                    release(lost, 'Процесс пула аварийно завершился')
+                    running.clear()
+                    pool.shutdown(wait=False)
+                    pool = self.make_pool(workers)
+        finally:
+            pool.shutdown()
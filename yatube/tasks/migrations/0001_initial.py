@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='задача')),
+                ('arguments', models.TextField(default='{}', help_text='Аргументы вызова в JSON', verbose_name='аргументы')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Чем больше, тем раньше', verbose_name='приоритет')),
+                ('status', models.CharField(choices=[('queued', 'в очереди'), ('running', 'выполняется'), ('done', 'выполнена'), ('failed', 'ошибка')], default='queued', max_length=10, verbose_name='статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='попыток')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='запустить не раньше')),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('idempotency_key', models.CharField(blank=True, help_text='Повторная постановка с тем же ключом ничего не делает', max_length=200, null=True, unique=True)),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'задача',
+                'verbose_name_plural': 'задачи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', '-priority', 'run_at'], name='tasks_task_status_78d377_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+def set_finished(apps, schema_editor):
+    # Точное время выполнения неизвестно, берётся run_at: раньше него
+    # задача не запускалась.
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status='done').update(finished=models.F('run_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='finished',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='выполнена'),
+        ),
+        migrations.RunPython(set_finished, migrations.RunPython.noop),
+    ]
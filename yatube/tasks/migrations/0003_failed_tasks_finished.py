@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+def set_finished(apps, schema_editor):
+    # Как и для выполненных в 0002: время последней попытки неизвестно,
+    # берётся run_at.
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status='failed', finished__isnull=True).update(
+        finished=models.F('run_at'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_finished'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='finished',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='завершена'),
+        ),
+        migrations.RunPython(set_finished, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'ошибка'),
+    )
+
+    name = models.CharField('задача', max_length=200)
+    arguments = models.TextField('аргументы', default='{}',
+                                 help_text='Аргументы вызова в JSON')
+    priority = models.SmallIntegerField(
+        'приоритет', default=0, help_text='Чем больше, тем раньше')
+    status = models.CharField(
+        'статус', max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField('запустить не раньше', default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(
+        max_length=200, unique=True, null=True, blank=True,
+        help_text='Повторная постановка с тем же ключом ничего не делает',
+    )
+    last_error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField('завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,21 @@
+"""Точки входа для процессов пула ``run_worker``.
+
+Процессы запускаются через spawn и импортируют этот модуль до настройки
+Django, поэтому модели здесь импортируются только внутри функций.
+"""
+import django
+
+
+def init_process():
+    django.setup()
+
+
+def execute_in_process(task_id):
+    from django.db import connections
+
+    from .worker import execute
+
+    try:
+        return execute(task_id)
+    finally:
+        connections.close_all()
@@ -0,0 +1,82 @@
+"""Объявление и постановка фоновых задач.
+
+Задача — функция модуля ``<приложение>/tasks.py``, обёрнутая в ``task``.
+Аргументы сохраняются в JSON, поэтому передавать нужно идентификаторы,
+а не объекты моделей. Задача попадает в таблицу в текущей транзакции
+и станет видна воркеру только после коммита.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, priority=None,
+                idempotency_key=None, countdown=0):
+        return enqueue(
+            self.name, args, kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            idempotency_key=idempotency_key,
+            countdown=countdown,
+        )
+
+
+def task(priority=0, max_attempts=3, name=None):
+    def decorator(func):
+        task_function = TaskFunction(
+            func, name or f'{func.__module__}.{func.__name__}',
+            priority, max_attempts)
+        registry[task_function.name] = task_function
+        return task_function
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, max_attempts=3,
+            idempotency_key=None, countdown=0):
+    """Ставит задачу в очередь и возвращает её запись.
+
+    Если задача с таким ``idempotency_key`` уже есть, возвращается она.
+    При ``TASKS_EAGER`` задача выполняется в этом же процессе после
+    коммита: так удобно разрабатывать без запущенного воркера.
+    """
+    if name not in registry:
+        raise KeyError(f'Неизвестная задача {name}')
+    arguments = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+    try:
+        with transaction.atomic():
+            task = Task.objects.create(
+                name=name,
+                arguments=arguments,
+                priority=priority,
+                max_attempts=max_attempts,
+                idempotency_key=idempotency_key,
+                run_at=timezone.now() + timedelta(seconds=countdown),
+            )
+    except IntegrityError:
+        if idempotency_key is None:
+            raise
+        return Task.objects.get(idempotency_key=idempotency_key)
+    if settings.TASKS_EAGER:
+        from .worker import run_now
+        transaction.on_commit(lambda: run_now(task.pk))
+    return task
@@ -0,0 +1,203 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..management.commands import run_worker
+from ..models import Task
+from ..registry import enqueue, task
+from ..worker import claim, execute
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        call_command('run_worker', workers=0, once=True,
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_pool_refuses_process_local_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('run_worker', workers=2, once=True,
+                         stdout=StringIO())
+
+    def test_tasks_run_by_priority(self):
+        record.delay('low')
+        record.enqueue(('high',), priority=5)
+        self.run_worker()
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_idempotency_key_deduplicates(self):
+        first = record.enqueue(('once',), idempotency_key='key')
+        second = record.enqueue(('twice',), idempotency_key='key')
+        self.assertEqual(first.pk, second.pk)
+        self.run_worker()
+        self.run_worker()
+        self.assertEqual(calls, ['once'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_done_keyed_tasks_are_purged_after_retention(self):
+        record.enqueue(('old',), idempotency_key='old')
+        record.enqueue(('new',), idempotency_key='new')
+        self.run_worker()
+        Task.objects.filter(idempotency_key='old').update(
+            finished=timezone.now() - timedelta(days=2))
+        record.enqueue(('queued',), idempotency_key='queued')
+        with override_settings(TASKS_DONE_RETENTION=24 * 60 * 60):
+            self.run_worker()
+        self.assertEqual(
+            set(Task.objects.values_list('idempotency_key', flat=True)),
+            {'new', 'queued'})
+        record.enqueue(('again',), idempotency_key='old')
+        self.run_worker()
+        self.assertEqual(calls, ['old', 'new', 'queued', 'again'])
+
+    def test_failed_keyed_tasks_are_purged_after_retention(self):
+        fail.enqueue(idempotency_key='broken')
+        for _ in range(2):
+            Task.objects.update(run_at=timezone.now())
+            self.run_worker()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        record.enqueue(('blocked',), idempotency_key='broken')
+        self.run_worker()
+        self.assertEqual(calls, [])
+
+        Task.objects.update(finished=timezone.now() - timedelta(days=2))
+        with override_settings(TASKS_DONE_RETENTION=24 * 60 * 60):
+            self.run_worker()
+        self.assertFalse(Task.objects.exists())
+        record.enqueue(('again',), idempotency_key='broken')
+        self.run_worker()
+        self.assertEqual(calls, ['again'])
+
+    def test_failed_task_is_retried_later_then_marked_failed(self):
+        task_obj = fail.delay()
+        self.run_worker()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.QUEUED)
+        self.assertGreater(task_obj.run_at, timezone.now())
+        self.assertIn('boom', task_obj.last_error)
+
+        Task.objects.update(run_at=timezone.now())
+        self.run_worker()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.FAILED)
+        self.assertEqual(task_obj.attempts, 2)
+
+    def test_task_is_claimed_once_and_reclaimed_after_lease(self):
+        task_obj = record.delay('value')
+        self.assertEqual(claim(10), [task_obj.pk])
+        self.assertEqual(claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(claim(10), [task_obj.pk])
+        execute(task_obj.pk)
+        self.assertEqual(calls, ['value'])
+
+    def test_broken_pool_is_rebuilt_and_tasks_requeued(self):
+        first, second = record.delay('a'), record.delay('b')
+        pools = []
+
+        class BrokenPool:
+            def __init__(self, workers):
+                pools.append(self)
+
+            def submit(self, function, task_id):
+                future = Future()
+                future.set_exception(BrokenProcessPool())
+                return future
+
+            def shutdown(self, wait=True):
+                pass
+
+        command = run_worker.Command(stdout=StringIO())
+        with mock.patch.object(command, 'make_pool', BrokenPool), \
+                self.assertLogs('tasks', 'ERROR'):
+            done = command.run_pool({'workers': 2, 'once': True, 'poll': 0})
+        self.assertEqual(done, 0)
+        self.assertEqual(len(pools), 2)
+        for task_obj in (first, second):
+            task_obj.refresh_from_db()
+            self.assertEqual(task_obj.status, Task.QUEUED)
+            self.assertIsNone(task_obj.locked_until)
+            self.assertIn('аварийно', task_obj.last_error)
+
+    def test_pool_survives_errors_outside_the_task(self):
+        first = record.delay('a')
+        record.delay('b')
+
+        class FailingPool:
+            def __init__(self, workers):
+                pass
+
+            def submit(self, function, task_id):
+                future = Future()
+                if task_id == first.pk:
+                    future.set_exception(OperationalError('database'))
+                else:
+                    future.set_result(execute(task_id))
+                return future
+
+            def shutdown(self, wait=True):
+                pass
+
+        command = run_worker.Command(stdout=StringIO())
+        with mock.patch.object(command, 'make_pool', FailingPool), \
+                self.assertLogs('tasks', 'ERROR'):
+            done = command.run_pool({'workers': 2, 'once': True, 'poll': 0})
+        self.assertEqual(done, 1)
+        self.assertEqual(calls, ['b'])
+        first.refresh_from_db()
+        self.assertEqual(first.status, Task.QUEUED)
+        self.assertIsNone(first.locked_until)
+        self.assertIn('database', first.last_error)
+
+    def test_deleted_task_is_skipped(self):
+        task_obj = record.delay('gone')
+        self.assertEqual(claim(1), [task_obj.pk])
+        Task.objects.all().delete()
+        with self.assertLogs('tasks', 'WARNING'):
+            self.assertIsNone(execute(task_obj.pk))
+        self.assertEqual(calls, [])
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
+
+    def test_password_reset_mail_is_sent_by_task(self):
+        get_user_model().objects.create_user(
+            username='forgetful', email='forgetful@example.com',
+            password='password')
+        response = self.client.post(
+            reverse('users:password_reset'),
+            {'email': 'forgetful@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            Task.objects.get().name,
+            'users.tasks.send_password_reset_email')
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['forgetful@example.com'])
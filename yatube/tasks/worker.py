@@ -0,0 +1,127 @@
+"""Выборка и выполнение задач.
+
+Несколько воркеров могут работать с одной таблицей: задача забирается
+условным ``UPDATE`` и достаётся тому, у кого он изменил строку. Взятая
+задача арендуется на ``TASKS_LEASE_SECONDS``; если воркер упал, по
+истечении аренды её заберёт другой.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+PURGE_CHUNK = 1000
+
+
+def _claimable(now):
+    return (
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim_task(task_id, now=None):
+    now = now or timezone.now()
+    return bool(Task.objects.filter(_claimable(now), pk=task_id).update(
+        status=Task.RUNNING,
+        attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=settings.TASKS_LEASE_SECONDS),
+    ))
+
+
+def claim(limit):
+    """Забирает до ``limit`` готовых задач, самые приоритетные первыми."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(_claimable(now))
+        .order_by('-priority', 'run_at')
+        .values_list('pk', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for task_id in candidates:
+        if claim_task(task_id, now):
+            claimed.append(task_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def _failed(task, error):
+    """Откладывает повтор задачи или, если попытки кончились, бросает её."""
+    if task.attempts < task.max_attempts:
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.QUEUED, last_error=error, locked_until=None,
+            run_at=timezone.now() + timedelta(seconds=delay))
+        return Task.QUEUED
+    Task.objects.filter(pk=task.pk).update(
+        status=Task.FAILED, last_error=error, locked_until=None,
+        finished=timezone.now())
+    return Task.FAILED
+
+
+def release(task_ids, error):
+    """Снимает аренду с задач, которые не смогли доработать.
+
+    Задача считается упавшей: попытка засчитана, повтор — с той же
+    задержкой, что после ошибки.
+    """
+    for task in Task.objects.filter(pk__in=task_ids, status=Task.RUNNING):
+        _failed(task, error)
+
+
+def execute(task_id):
+    """Выполняет взятую задачу и записывает результат."""
+    task = Task.objects.filter(pk=task_id).first()
+    if task is None:
+        # Задачу удалили из админки, пока она ждала своего процесса.
+        logger.warning('Задача #%s удалена до выполнения', task_id)
+        return None
+    try:
+        arguments = json.loads(task.arguments)
+        registry[task.name](*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', task)
+        return _failed(task, traceback.format_exc())
+    if task.idempotency_key is None:
+        Task.objects.filter(pk=task_id).delete()
+    else:
+        # Запись с ключом остаётся, чтобы повторная постановка не прошла.
+        Task.objects.filter(pk=task_id).update(
+            status=Task.DONE, locked_until=None, finished=timezone.now())
+    return Task.DONE
+
+
+def purge_done(chunk_size=PURGE_CHUNK):
+    """Удаляет пачками задачи, завершённые раньше срока хранения.
+
+    Кроме выполненных удаляются и брошенные задачи с ключом: иначе
+    ключ навсегда запретил бы поставить задачу заново.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.TASKS_DONE_RETENTION)
+    expired = Task.objects.filter(
+        Q(status=Task.DONE)
+        | Q(status=Task.FAILED, idempotency_key__isnull=False),
+        finished__lt=cutoff)
+    removed = 0
+    while True:
+        task_ids = list(expired.values_list('pk', flat=True)[:chunk_size])
+        if not task_ids:
+            return removed
+        removed += Task.objects.filter(pk__in=task_ids).delete()[0]
+
+
+def run_now(task_id):
+    if claim_task(task_id):
+        return execute(task_id)
+    return None
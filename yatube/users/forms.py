@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 
 User = get_user_model()
 
@@ -8,3 +8,17 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ['first_name', 'last_name', 'username', 'email']
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Отправляет письмо для сброса пароля фоновой задачей."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        from .tasks import send_password_reset_email
+
+        context = dict(context, user=context['user'].pk)
+        send_password_reset_email.delay(
+            subject_template_name, email_template_name, context,
+            from_email, to_email, html_email_template_name)
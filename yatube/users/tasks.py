@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+
+from tasks.registry import task
+
+User = get_user_model()
+
+
+@task(priority=20, max_attempts=5)
+def send_password_reset_email(subject_template_name, email_template_name,
+                              context, from_email, to_email,
+                              html_email_template_name=None):
+    context['user'] = User.objects.get(pk=context['user'])
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context,
+        from_email, to_email, html_email_template_name)
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -26,9 +27,29 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Превью sorl-thumbnail сохраняются под заранее вычисленными именами,
+# поэтому им нужно обычное хранилище.
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# Обработка картинок постов
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_DIMENSION = 1920
+POST_IMAGE_QUALITY = 82
+# Превью, которые строятся сразу после загрузки. Должны совпадать
+# с параметрами {% thumbnail %} в шаблонах карточки и страницы поста.
+POST_IMAGE_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Заголовки кеширования для core.middleware.StaticFilesMiddleware
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_DEFAULT_MAX_AGE = 60 * 60
 
 # Application definition
 
@@ -44,15 +65,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'tasks.apps.TasksConfig',
+    'notifications.apps.NotificationsConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,16 +91,23 @@ TEMPLATES = [
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
-                'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.following',
+                'posts.context_processors.unread_posts',
+                'notifications.context_processors.unread_notifications',
             ],
         },
     },
 ]
 
+# Переменные debug-процессора нужны только при разработке.
+if DEBUG:
+    TEMPLATES[0]['OPTIONS']['context_processors'].insert(
+        0, 'django.template.context_processors.debug')
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -90,6 +121,23 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: пути к файлам SQLite через запятую.
+# Локально их можно получить копированием основной базы командой
+# sync_replicas.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -109,12 +157,98 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Новые пароли хешируются первым хешером списка, остальные нужны, чтобы
+# проверять старые хеши: при входе они пересчитываются первым хешером.
+PASSWORD_HASHERS = [
+    'core.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+if importlib.util.find_spec('argon2'):
+    PASSWORD_HASHERS.insert(
+        0, PASSWORD_HASHERS.pop(PASSWORD_HASHERS.index(
+            'django.contrib.auth.hashers.Argon2PasswordHasher')))
+# Сколько паролей хешируется одновременно (core.hashers).
+PASSWORD_HASHING_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Кеш общий для всех процессов сайта и воркера задач: через него идут
+# сброс закешированных объектов (core.caching) и блокировки. Адреса
+# memcached задаются через запятую в CACHE_LOCATION; без них
+# используется LocMemCache, который годится только для одного процесса
+# (разработка и тесты). При WEB_CONCURRENCY > 1 с таким кешем сайт
+# не запустится (core.checks).
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Число процессов сайта (так же его читает gunicorn).
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+# До скольких подписок лента собирается слиянием лент авторов
+# (posts.feeds); при большем числе работает запрос с подзапросом.
+PULL_FEED_MAX_AUTHORS = 200
+
+# Как часто буферы core.counters записывают накопленное в базу, секунд.
+COUNTER_FLUSH_INTERVAL = 5
+
+# Посты старше этого срока команда archive_posts переносит в архив.
+POST_ARCHIVE_AFTER_DAYS = 365
+
+# Лимиты запросов к изменяющим вьюхам (core.ratelimit): отдельно на
+# пользователя и на IP, в формате "число/период" (s, m, h, d) — корзина
+# на "число" запросов, которая целиком пополняется за "период".
+# RATELIMIT_CACHE должен быть общим для всех процессов сайта.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'default'
+RATELIMITS = {
+    'post_create': {'user': '20/m', 'ip': '60/m'},
+    'add_comment': {'user': '30/m', 'ip': '120/m'},
+    'profile_follow': {'user': '60/m', 'ip': '240/m'},
+    'like': {'user': '60/m', 'ip': '240/m'},
+    'signup': {'ip': '20/h'},
 }
 
+# Очередь фоновых задач (приложение tasks, воркер: manage.py run_worker).
+# С TASKS_EAGER задачи выполняются сразу после коммита в том же процессе.
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False') == 'True'
+TASKS_LEASE_SECONDS = 300
+TASKS_RETRY_DELAY = 30
+# Сколько хранить выполненные и брошенные задачи с ключом
+# идемпотентности (пока запись есть, задача с тем же ключом не ставится)
+# и как часто воркер удаляет устаревшие, секунд.
+TASKS_DONE_RETENTION = 24 * 60 * 60
+TASKS_PURGE_INTERVAL = 60 * 60
+
+# Окно, за которое события сворачиваются в уведомления, секунд.
+NOTIFICATIONS_DELAY = 30
+
+# Server-Sent Events (/events/). Длинные соединения держат поток воркера,
+# поэтому в проде их стоит обслуживать асинхронными воркерами
+# (например, gunicorn -k gevent) или отдельным пулом.
+SSE_STREAM_TIMEOUT = 30
+SSE_HEARTBEAT_INTERVAL = 15
+SSE_RETRY_MS = 3000
+
+# Сессии читаются из кеша, а в базу идут только при промахе.
+# Для сессий без сервера подойдёт
+# 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+# Сколько секунд пользователь живёт в кеше core.auth (0 — не кешировать).
+AUTH_USER_CACHE_TIMEOUT = 30
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.11/topics/i18n/
 